@@ -0,0 +1,160 @@
+"""Micro-benchmark cases for the decorator and the failure path.
+
+Each case is a zero-argument callable timed as-is, so all setup (generated
+modules, contexts, source files) happens in ``build_cases``.  Cases are
+grouped by name prefix:
+
+    wrapper/<shape>         a decorated call that succeeds
+    raw/<shape>             the same call undecorated (overhead = difference)
+    capture/<variant>       ``capture_context`` inside the except block, with
+                            the module's source already parsed (steady state)
+    redact/<entries>        ``redact`` over a context with that many variables
+    replace/<lines>         ``build_replacement_source`` for a file that long
+
+``meta`` carries the size a case was built for (``bytes`` of JSON for the
+redact cases), so throughput can be derived from the timing.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from healing_agent.code_replacer import build_replacement_source
+from healing_agent.healing_agent import healing_agent
+from healing_agent.redactor import redact
+
+Case = Tuple[Callable[[], Any], Dict[str, Any]]
+
+CONFIG = {"REDACT_SECRETS": True}
+
+ARG_SHAPES: Dict[str, Tuple[tuple, dict]] = {
+    "no_args": ((), {}),
+    "three_positional": ((1, 2.5, "x"), {}),
+    "five_keywords": ((), {"a": 1, "b": 2, "c": 3, "d": 4, "e": 5}),
+    "large_list": ((list(range(10_000)),), {}),
+}
+
+CAPTURE_VARIANTS: Dict[str, Dict[str, int]] = {
+    "module_100_lines": {"lines": 100, "globals": 10, "value_bytes": 100},
+    "module_10000_lines": {"lines": 10_000, "globals": 10, "value_bytes": 100},
+    "globals_1000": {"lines": 100, "globals": 1_000, "value_bytes": 100},
+    "value_1mb": {"lines": 100, "globals": 10, "value_bytes": 1_000_000},
+    "globals_1000_bounded": {"lines": 100, "globals": 1_000, "value_bytes": 100, "max_bytes": 64 * 1024},
+}
+
+REDACT_SIZES = (100, 1_000, 10_000)
+REPLACE_SIZES = (100, 1_000, 10_000)
+
+
+def _target(*args: Any, **kwargs: Any) -> int:
+    return len(args) + len(kwargs)
+
+
+def _filler(lines: int) -> str:
+    return "".join(f"def _filler_{i}(x):\n    return x + {i}\n\n" for i in range(lines // 3))
+
+
+def _load(path: Path, name: str) -> Any:
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _capture_module(directory: Path, name: str, lines: int, globals_: int, value_bytes: int) -> Any:
+    source = (
+        "from healing_agent.exception_handler import capture_context\n\n"
+        + "".join(f"GLOBAL_{i} = {i}\n" for i in range(globals_))
+        + f"PAYLOAD = 'x' * {value_bytes}\n\n"
+        + _filler(lines)
+        + "def target(payload, limit=3):\n"
+        + "    total = len(payload)\n"
+        + "    return total / 0\n\n\n"
+        + "def capture(config):\n"
+        + "    blob = PAYLOAD\n"
+        + "    try:\n"
+        + "        target(blob)\n"
+        + "    except Exception as error:\n"
+        + "        return capture_context(target, (blob,), None, config, error)\n"
+    )
+    path = directory / f"{name}.py"
+    path.write_text(source, encoding="utf-8")
+    return _load(path, name)
+
+
+def _context(entries: int) -> Dict[str, Any]:
+    previews = {
+        f"var_{i}": {"type": "str", "value_preview": f"value {i} " * 8}
+        for i in range(entries)
+    }
+    for i in range(0, entries, 50):
+        previews[f"api_token_{i}"] = {"type": "str", "value_preview": "secret"}
+    return {
+        "function_info": {"name": "target", "source_code": "def target():\n    pass"},
+        "function_arguments": {"payload": {"value": "x" * 100, "type": "str"}},
+        "variables": {"locals": previews, "globals": {"headers": {"Authorization": "Bearer x"}}},
+        "error": {"type": "ValueError", "message": "bad", "traceback": "Traceback ...\n" * 20},
+    }
+
+
+def _replace_case(directory: Path, lines: int) -> Case:
+    path = directory / f"replace_{lines}.py"
+    half = _filler(lines // 2)
+    path.write_text(
+        half + "def target(x):\n    return x / 0\n\n\n" + half, encoding="utf-8"
+    )
+    context = {"error": {"file": str(path)}, "function_info": {"name": "target"}}
+    fixed = "def target(x):\n    return x\n"
+    return (lambda: build_replacement_source(context, fixed)), {"lines": lines}
+
+
+def case_names() -> List[str]:
+    """Every case name, without building the cases."""
+    names = [f"{group}/{shape}" for shape in ARG_SHAPES for group in ("wrapper", "raw")]
+    names += [f"capture/{variant}" for variant in CAPTURE_VARIANTS]
+    names += [f"redact/{entries}" for entries in REDACT_SIZES]
+    names += [f"replace/{lines}" for lines in REPLACE_SIZES]
+    return names
+
+
+def build_cases(directory: Path) -> Dict[str, Case]:
+    """Build every case, writing generated modules and files to ``directory``."""
+    directory.mkdir(parents=True, exist_ok=True)
+    cases: Dict[str, Case] = {}
+
+    decorated = healing_agent(_target)
+    for shape, (args, kwargs) in ARG_SHAPES.items():
+        cases[f"wrapper/{shape}"] = (lambda a=args, k=kwargs: decorated(*a, **k)), {}
+        cases[f"raw/{shape}"] = (lambda a=args, k=kwargs: _target(*a, **k)), {}
+
+    for variant, sizes in CAPTURE_VARIANTS.items():
+        module = _capture_module(
+            directory,
+            f"bench_capture_{variant}",
+            sizes["lines"],
+            sizes["globals"],
+            sizes["value_bytes"],
+        )
+        config = dict(CONFIG)
+        if "max_bytes" in sizes:
+            config["CONTEXT_MAX_BYTES"] = sizes["max_bytes"]
+        module.capture(config)  # parse the module once: measure the steady state
+        cases[f"capture/{variant}"] = (lambda m=module, c=config: m.capture(c)), dict(sizes)
+
+    for entries in REDACT_SIZES:
+        context = _context(entries)
+        size = len(json.dumps(context))
+        cases[f"redact/{entries}"] = (
+            (lambda c=context: redact(c, CONFIG)),
+            {"entries": entries, "bytes": size},
+        )
+
+    for lines in REPLACE_SIZES:
+        cases[f"replace/{lines}"] = _replace_case(directory, lines)
+
+    return cases
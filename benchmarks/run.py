@@ -0,0 +1,157 @@
+"""Time the micro-benchmark cases and check them against a baseline.
+
+Runs without extra dependencies (``timeit``; each case reports the best of
+``--repeat`` runs per call).  With pytest-benchmark installed the same cases
+run under ``python -m pytest benchmarks``, and its ``--benchmark-json``
+output is accepted by ``--results``.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare benchmarks/baseline.json
+    python benchmarks/run.py --results bench.json --compare benchmarks/baseline.json
+    python benchmarks/run.py --output benchmarks/baseline.json   # new baseline
+
+A case regresses when it is more than ``--threshold`` (relative) slower than
+the baseline, ignoring differences below ``--noise-floor`` seconds per call.
+The defaults (50%, 1 us) tolerate shared-runner noise while still catching
+work added to the success path.  Baselines are machine-specific: record them
+on the machine that checks them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_NOISE_FLOOR = 1e-6
+
+
+def time_case(func: Any, repeat: int = 5, min_time: float = 0.1) -> Dict[str, float]:
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    runs = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {"seconds": min(runs), "mean": sum(runs) / len(runs), "number": number}
+
+
+def derive(results: Dict[str, Dict[str, Any]]) -> None:
+    """Add wrapper overhead and redact throughput to ``results`` in place."""
+    for name, result in results.items():
+        group, _, variant = name.partition("/")
+        raw = results.get(f"raw/{variant}")
+        if group == "wrapper" and raw:
+            result["overhead_seconds"] = result["seconds"] - raw["seconds"]
+        size = result.get("meta", {}).get("bytes")
+        if group == "redact" and size:
+            result["bytes_per_second"] = size / result["seconds"]
+
+
+def run(name_filter: Optional[str] = None, repeat: int = 5, min_time: float = 0.1) -> Dict[str, Any]:
+    from cases import build_cases
+
+    with tempfile.TemporaryDirectory(prefix="healing-agent-microbench-") as scratch:
+        results = {}
+        for name, (func, meta) in build_cases(Path(scratch)).items():
+            if name_filter and not name.startswith(name_filter):
+                continue
+            results[name] = {**time_case(func, repeat, min_time), "meta": meta}
+    derive(results)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "results": results,
+    }
+
+
+def load_results(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Results from this script's output or pytest-benchmark's JSON."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if "benchmarks" in data:
+        return {
+            bench["params"]["name"]: {"seconds": bench["stats"]["min"], "mean": bench["stats"]["mean"]}
+            for bench in data["benchmarks"]
+        }
+    return data["results"]
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+    noise_floor: float = DEFAULT_NOISE_FLOOR,
+) -> List[str]:
+    """Names of cases that are slower than ``baseline`` beyond the threshold."""
+    regressions = []
+    for name, result in sorted(results.items()):
+        before = baseline.get(name)
+        if before is None:
+            continue
+        delta = result["seconds"] - before["seconds"]
+        if delta > noise_floor and delta > threshold * before["seconds"]:
+            regressions.append(name)
+    return regressions
+
+
+def _format(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def report(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    lines = []
+    for name, result in results.items():
+        line = f"{name:<32}{_format(result['seconds']):>14}"
+        if "overhead_seconds" in result:
+            line += f"   overhead {_format(result['overhead_seconds'])}"
+        if "bytes_per_second" in result:
+            line += f"   {result['bytes_per_second'] / 1e6:.1f} MB/s"
+        if baseline and name in baseline:
+            change = result["seconds"] / baseline[name]["seconds"] - 1
+            line += f"   {change:+.1%} vs baseline"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", help="only run cases whose name starts with this")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per case")
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per timing run")
+    parser.add_argument("--results", type=Path, help="check these results instead of running")
+    parser.add_argument("--output", type=Path, help="write the results here")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to check against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--noise-floor", type=float, default=DEFAULT_NOISE_FLOOR)
+    arguments = parser.parse_args(argv)
+
+    if arguments.results:
+        results = load_results(arguments.results)
+    else:
+        output = run(arguments.filter, arguments.repeat, arguments.min_time)
+        results = output["results"]
+        if arguments.output:
+            arguments.output.write_text(json.dumps(output, indent=2) + "\n", encoding="utf-8")
+
+    baseline = load_results(arguments.compare) if arguments.compare else None
+    print(report(results, baseline))
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, arguments.threshold, arguments.noise_floor)
+    for name in regressions:
+        print(f"♣ Regression: {name} is more than {arguments.threshold:.0%} slower than baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    sys.exit(main())
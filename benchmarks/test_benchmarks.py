@@ -0,0 +1,26 @@
+"""pytest-benchmark runner for ``cases``.
+
+    python -m pytest benchmarks --benchmark-json=bench.json
+    python benchmarks/run.py --results bench.json --compare benchmarks/baseline.json
+
+Skipped when pytest-benchmark is not installed; ``benchmarks/run.py`` times
+the same cases without it.
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from cases import build_cases, case_names  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def cases(tmp_path_factory):
+    return build_cases(tmp_path_factory.mktemp("microbench"))
+
+
+@pytest.mark.parametrize("name", case_names())
+def test_case(benchmark, cases, name):
+    func, meta = cases[name]
+    benchmark.extra_info.update(meta)
+    benchmark(func)
@@ -1,15 +1,17 @@
-from .healing_agent import healing_agent as _healing_agent
+import sys
+import types
+
+from .healing_agent import healing_agent
+from .prewarm import prewarm
+
 
-# Make the module callable by implementing __call__
-class HealingAgentModule:
-    def __init__(self):
-        self.healing_agent = _healing_agent
-    
+# Make the module callable (``@healing_agent``) while keeping it a real
+# package, so submodules such as ``healing_agent.cli`` stay importable.
+class HealingAgentModule(types.ModuleType):
     def __call__(self, *args, **kwargs):
         return self.healing_agent(*args, **kwargs)
 
-# Replace the module with our callable instance
-import sys
-sys.modules[__name__] = HealingAgentModule()
 
-__all__ = ['healing_agent']
+sys.modules[__name__].__class__ = HealingAgentModule
+
+__all__ = ['healing_agent', 'prewarm']
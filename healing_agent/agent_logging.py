@@ -0,0 +1,147 @@
+"""Logging for the ``healing_agent`` logger hierarchy.
+
+Every module logs to ``logging.getLogger(__name__)`` with %-style arguments,
+so nothing is formatted for records below the configured level.  Records
+carry ``heal_id``, ``function`` and ``stage`` attributes for the heal that
+emitted them (``"-"`` outside a heal), usable in any formatter, for example
+``"%(asctime)s %(heal_id)s %(stage)s %(message)s"``.
+
+Until the application configures logging itself, records are written to
+stdout in the classic ``♣ message`` form; once the root logger has handlers
+they simply propagate there.  ``LOG_QUEUE = True`` moves handler I/O to a
+``QueueListener`` thread so the failing thread only enqueues the record.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import sys
+import threading
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Optional
+
+LOGGER_NAME = "healing_agent"
+FIELDS = ("heal_id", "function", "stage")
+
+_fields: ContextVar[Dict[str, str]] = ContextVar("healing_agent_log_fields", default={})
+
+
+def bind(**fields: str) -> Token:
+    """Attach ``fields`` to records logged in this context; undo with ``unbind``."""
+    return _fields.set({**_fields.get(), **fields})
+
+
+def unbind(token: Token) -> None:
+    _fields.reset(token)
+
+
+class HealContextFilter(logging.Filter):
+    """Adds the current heal's ``heal_id``, ``function`` and ``stage`` to records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        fields = _fields.get()
+        for name in FIELDS:
+            if not hasattr(record, name):
+                setattr(record, name, fields.get(name, "-"))
+        return True
+
+
+_context_filter = HealContextFilter()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """The logger for a ``healing_agent`` module, with heal fields attached."""
+    logger = logging.getLogger(name)
+    if _context_filter not in logger.filters:
+        logger.addFilter(_context_filter)
+    return logger
+
+
+class DefaultHandler(logging.Handler):
+    """Writes ``♣ message`` lines to the current ``sys.stdout``.
+
+    Steps aside as soon as the root logger has handlers, so an application
+    that configures logging gets each record once, in its own format.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.setFormatter(logging.Formatter("♣ %(message)s"))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if logging.getLogger().handlers:
+            return
+        try:
+            stream = sys.stdout
+            stream.write(self.format(record) + "\n")
+            stream.flush()
+        except Exception:
+            self.handleError(record)
+
+
+_package_logger = get_logger(LOGGER_NAME)
+_default_handler = DefaultHandler()
+_package_logger.addHandler(_default_handler)
+_package_logger.setLevel(logging.INFO)
+
+_configured: Optional[tuple] = None
+_listener: Optional["logging.handlers.QueueListener"] = None
+_configure_lock = threading.Lock()
+
+
+def _level(config: Dict[str, Any]) -> int:
+    level = config.get("LOG_LEVEL")
+    if level is None:
+        return logging.DEBUG if config.get("DEBUG") else logging.INFO
+    if isinstance(level, str):
+        return logging.getLevelName(level.upper())
+    return level
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is None:
+        return
+    from logging.handlers import QueueHandler
+
+    _listener.stop()  # flushes queued records
+    for handler in _listener.handlers:
+        _package_logger.addHandler(handler)
+    for handler in list(_package_logger.handlers):
+        if isinstance(handler, QueueHandler):
+            _package_logger.removeHandler(handler)
+    _listener = None
+
+
+def configure(config: Dict[str, Any]) -> None:
+    """Apply ``LOG_LEVEL``/``DEBUG`` and ``LOG_QUEUE``; cheap when unchanged."""
+    global _configured, _listener
+    wanted = (_level(config), bool(config.get("LOG_QUEUE", False)))
+    if wanted == _configured:
+        return
+    with _configure_lock:
+        if wanted == _configured:
+            return
+        level, use_queue = wanted
+        _package_logger.setLevel(level)
+        if use_queue and _listener is None:
+            # logging.handlers pulls in socket and pickle: only load it here.
+            from logging.handlers import QueueHandler, QueueListener
+
+            handlers = list(_package_logger.handlers)
+            for handler in handlers:
+                _package_logger.removeHandler(handler)
+            log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+            _package_logger.addHandler(QueueHandler(log_queue))
+            _listener = QueueListener(
+                log_queue, *handlers, respect_handler_level=True
+            )
+            _listener.start()
+        elif not use_queue:
+            _stop_listener()
+        _configured = wanted
+
+
+atexit.register(_stop_listener)
@@ -3,6 +3,10 @@ import sys
 import re
 from typing import Optional, Tuple
 
+from .. import agent_logging
+
+logger = agent_logging.get_logger(__name__)
+
 def extract_module_info(error_message: str) -> Optional[Tuple[str, str]]:
     """
     Extract module name and suggested install command from error message.
@@ -41,13 +45,13 @@ def install_missing_module(error_message: str, debug: bool = False) -> bool:
     module_info = extract_module_info(error_message)
     if not module_info:
         if debug:
-            print("♣ Could not extract module name from error message")
+            logger.warning("Could not extract module name from error message")
         return False
     
     module_name, install_name = module_info
     
     if debug:
-        print(f"♣ Attempting to install missing module: {install_name}")
+        logger.info("Attempting to install missing module: %s", install_name)
     
     try:
         subprocess.check_call(
@@ -56,9 +60,9 @@ def install_missing_module(error_message: str, debug: bool = False) -> bool:
             stderr=subprocess.PIPE if not debug else None
         )
         if debug:
-            print(f"♣ Successfully installed {install_name}")
+            logger.info("Successfully installed %s", install_name)
         return True
     except subprocess.CalledProcessError as e:
         if debug:
-            print(f"♣ Failed to install {install_name}: {str(e)}")
+            logger.warning("Failed to install %s: %s", install_name, e)
         return False 
\ No newline at end of file
@@ -2,7 +2,11 @@
 
 import json
 from typing import Any, Dict
+from .. import agent_logging
 from ..ai_code_fixer import get_ai_response
+from ..local_fixers import normalize_json_text
+
+logger = agent_logging.get_logger(__name__)
 
 def fix_json_ai(context: Dict[str, Any], config: Dict[str, Any]) -> Any:
     """
@@ -31,22 +35,18 @@ Return only the fixed JSON data without any explanations or markdown formatting.
         
         return fixed_data
     except Exception as e:
-        print(f"♣ JSON fixing with AI failed: {str(e)}")
+        logger.warning("JSON fixing with AI failed: %s", e)
         return None
 
 def fix_json_lint(context: Dict[str, Any], config: Dict[str, Any]) -> Any:
     """
-    Attempt to fix JSON data using a JSON linter.
+    Attempt to fix JSON data with the deterministic normalizer (BOM, trailing commas).
     """
     try:
         json_data = context['error']['json_details']['response_text']
-        # Use a JSON linter library to identify and fix syntax errors
-        # Example using jsonlint:
-        # fixed_data = jsonlint.parse(json_data)
-        # return fixed_data
-        pass
+        return json.loads(normalize_json_text(json_data))
     except Exception as e:
-        print(f"♣ JSON linting failed: {str(e)}")
+        logger.warning("JSON linting failed: %s", e)
         return None
 
 def fix_json_fallback(context: Dict[str, Any], config: Dict[str, Any]) -> Any:
@@ -59,7 +59,7 @@ def fix_json_fallback(context: Dict[str, Any], config: Dict[str, Any]) -> Any:
         fixed_data = json.loads(json_data, strict=False)
         return fixed_data
     except json.JSONDecodeError as e:
-        print(f"♣ Fallback JSON parsing failed: {str(e)}")
+        logger.warning("Fallback JSON parsing failed: %s", e)
         return None
 
 def fix_json(context: Dict[str, Any], config: Dict[str, Any]) -> Any:
@@ -75,6 +75,6 @@ def fix_json(context: Dict[str, Any], config: Dict[str, Any]) -> Any:
     elif strategy == 'fallback':
         return fix_json_fallback(context, config)
     else:
-        print(f"♣ Unknown JSON fix strategy: {strategy}")
+        logger.warning("Unknown JSON fix strategy: %s", strategy)
         return None
 
@@ -5,6 +5,10 @@ import ast
 import json
 from typing import Dict, List, Optional, Union
 
+from .. import agent_logging
+
+logger = agent_logging.get_logger(__name__)
+
 def get_function_details(file_path: str) -> List[Dict[str, str]]:
     """
     Extract function names and docstrings from a Python file.
@@ -28,7 +32,7 @@ def get_function_details(file_path: str) -> List[Dict[str, str]]:
                     "docstring": docstring if docstring else "No description available"
                 })
     except Exception as e:
-        print(f"Error parsing {file_path}: {str(e)}")
+        logger.warning("Error parsing %s: %s", file_path, e)
         return []
         
     return functions
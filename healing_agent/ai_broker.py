@@ -1,10 +1,112 @@
-from typing import Dict
+from typing import Any, Callable, Dict
+import os
+import sys
+import threading
 import time
-import httpx
-import requests
-import openai
 from functools import wraps
 
+from . import agent_logging, metrics
+
+logger = agent_logging.get_logger(__name__)
+
+# Provider SDKs and HTTP clients are imported by the provider functions that
+# use them, on the first heal, so ``import healing_agent`` stays cheap.
+
+
+def _connection_errors() -> tuple:
+    """Connection error types of the HTTP clients loaded so far.
+
+    An exception of a client's type can only exist once that client has been
+    imported, so looking in ``sys.modules`` is enough.
+    """
+    errors = [ConnectionError, TimeoutError]
+    httpx = sys.modules.get('httpx')
+    if httpx is not None:
+        errors.append(httpx.ConnectError)
+    requests = sys.modules.get('requests')
+    if requests is not None:
+        errors += [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+    return tuple(errors)
+
+
+def _openai_connection_error() -> tuple:
+    openai = sys.modules.get('openai')
+    return (openai.APIConnectionError,) if openai is not None else ()
+
+
+def _record_usage(usage: Any, prompt_field: str, completion_field: str) -> None:
+    """Count a response's token usage against the current heal's metrics."""
+    if usage is not None:
+        metrics.record_tokens(
+            getattr(usage, prompt_field, None), getattr(usage, completion_field, None)
+        )
+
+
+def _azure_client(config: Dict) -> Any:
+    import openai
+    return openai.AzureOpenAI(
+        api_key=config['api_key'],
+        api_version=config['api_version'],
+        azure_endpoint=config['endpoint']
+    )
+
+
+def _openai_client(config: Dict) -> Any:
+    import openai
+    return openai.OpenAI(
+        api_key=config['api_key'],
+        organization=config.get('organization_id'),
+        base_url=config.get('base_url')
+    )
+
+
+def _anthropic_client(config: Dict) -> Any:
+    import anthropic
+    return anthropic.Anthropic(api_key=config['api_key'], base_url=config.get('base_url'))
+
+
+def _ollama_client(config: Dict) -> Any:
+    import requests
+    return requests.Session()
+
+
+_CLIENT_FACTORIES: Dict[str, Callable[[Dict], Any]] = {
+    'azure': _azure_client,
+    'openai': _openai_client,
+    'anthropic': _anthropic_client,
+    'ollama': _ollama_client,
+}
+_clients: Dict[tuple, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(provider: str, config: Dict) -> Any:
+    """
+    The shared client for a provider and its settings.
+
+    Clients keep their connection pools, so reusing one across heals saves
+    the TCP and TLS handshakes a fresh client would repeat on every call.
+    """
+    key = (provider, tuple(sorted((name, repr(value)) for name, value in config.items())))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = _CLIENT_FACTORIES[provider](config)
+    return client
+
+
+def warm_connection(provider: str, config: Dict) -> None:
+    """Open a pooled connection to the provider with one cheap request."""
+    if provider == 'ollama':
+        get_client(provider, config).get(
+            f"{config['host']}/api/tags", timeout=config.get('timeout', 120)
+        )
+    elif provider in ('azure', 'openai', 'anthropic'):
+        get_client(provider, config).models.list()
+    elif provider == 'litellm':
+        import litellm  # noqa: F401  (module-level API, no client to pool)
+
+
 def handle_connection_errors(provider_name: str):
     """Simple decorator to handle connection errors with basic logging"""
     def decorator(func):
@@ -12,35 +114,29 @@ def handle_connection_errors(provider_name: str):
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
-            except (
-                httpx.ConnectError,
-                requests.exceptions.ConnectionError,
-                requests.exceptions.Timeout,
-                ConnectionError,
-                TimeoutError
-            ) as e:
-                print(f"♣ Connection error in {provider_name}: {str(e)}")
+            except _connection_errors() as e:
+                logger.warning("Connection error in %s: %s", provider_name, e)
                 # Wait briefly before retrying
                 time.sleep(2)
                 try:
                     return func(*args, **kwargs)
                 except Exception as retry_error:
-                    print(f"♣ Retry failed for {provider_name}: {str(retry_error)}")
+                    logger.warning("Retry failed for %s: %s", provider_name, retry_error)
                     raise
-            except openai.APIConnectionError as e:
+            except _openai_connection_error() as e:
                 if 'OpenAI' in provider_name or 'Azure' in provider_name:
-                    print(f"♣ Connection error in {provider_name}: {str(e)}")
+                    logger.warning("Connection error in %s: %s", provider_name, e)
                     # Wait briefly before retrying
                     time.sleep(2)
                     try:
                         return func(*args, **kwargs)
                     except Exception as retry_error:
-                        print(f"♣ Retry failed for {provider_name}: {str(retry_error)}")
+                        logger.warning("Retry failed for %s: %s", provider_name, retry_error)
                         raise
                 else:
                     raise
             except Exception as e:
-                print(f"♣ Unexpected error in {provider_name}: {str(e)}")
+                logger.error("Unexpected error in %s: %s", provider_name, e)
                 raise
         return wrapper
     return decorator
@@ -49,11 +145,7 @@ def handle_connection_errors(provider_name: str):
 def _get_azure_response(prompt: str, config: Dict, system_prompt: str) -> str:
     """Handle Azure OpenAI API requests"""
     import openai
-    client = openai.AzureOpenAI(
-        api_key=config['api_key'],
-        api_version=config['api_version'],
-        azure_endpoint=config['endpoint']
-    )
+    client = get_client('azure', config)
     
     try:
         response = client.chat.completions.create(
@@ -64,19 +156,17 @@ def _get_azure_response(prompt: str, config: Dict, system_prompt: str) -> str:
             ],
             timeout=config.get('timeout', 30)
         )
+        _record_usage(getattr(response, 'usage', None), 'prompt_tokens', 'completion_tokens')
         return response.choices[0].message.content.strip()
     except openai.APIError as e:
-        print(f"♣ Azure API error: {str(e)}")
+        logger.warning("Azure API error: %s", e)
         raise
 
 @handle_connection_errors("OpenAI")
 def _get_openai_response(prompt: str, config: Dict, system_prompt: str) -> str:
     """Handle OpenAI direct API requests"""
     import openai
-    client = openai.OpenAI(
-        api_key=config['api_key'],
-        organization=config.get('organization_id')
-    )
+    client = get_client('openai', config)
     
     try:
         response = client.chat.completions.create(
@@ -87,16 +177,16 @@ def _get_openai_response(prompt: str, config: Dict, system_prompt: str) -> str:
             ],
             timeout=config.get('timeout', 30)
         )
+        _record_usage(getattr(response, 'usage', None), 'prompt_tokens', 'completion_tokens')
         return response.choices[0].message.content.strip()
     except openai.APIError as e:
-        print(f"♣ OpenAI API error: {str(e)}")
+        logger.warning("OpenAI API error: %s", e)
         raise
 
 @handle_connection_errors("Anthropic")
 def _get_anthropic_response(prompt: str, config: Dict, system_prompt: str) -> str:
     """Handle Anthropic API requests"""
-    import anthropic
-    client = anthropic.Anthropic(api_key=config['api_key'])
+    client = get_client('anthropic', config)
 
     try:
         request_kwargs = {
@@ -111,16 +201,18 @@ def _get_anthropic_response(prompt: str, config: Dict, system_prompt: str) -> st
             request_kwargs["temperature"] = float(config['temperature'])
 
         response = client.messages.create(**request_kwargs)
+        _record_usage(getattr(response, 'usage', None), 'input_tokens', 'output_tokens')
         return response.content[0].text
     except Exception as e:
-        print(f"♣ Anthropic API error: {str(e)}")
+        logger.warning("Anthropic API error: %s", e)
         raise
 
 @handle_connection_errors("Ollama")
 def _get_ollama_response(prompt: str, config: Dict) -> str:
     """Handle Ollama API requests"""
+    import requests
     try:
-        response = requests.post(
+        response = get_client('ollama', config).post(
             f"{config['host']}/api/generate",
             json={
                 "model": config['model'],
@@ -130,9 +222,11 @@ def _get_ollama_response(prompt: str, config: Dict) -> str:
             timeout=config.get('timeout', 120)
         )
         response.raise_for_status()
-        return response.json()['response']
+        body = response.json()
+        metrics.record_tokens(body.get('prompt_eval_count'), body.get('eval_count'))
+        return body['response']
     except requests.exceptions.RequestException as e:
-        print(f"♣ Ollama API error: {str(e)}")
+        logger.warning("Ollama API error: %s", e)
         raise
 
 @handle_connection_errors("LiteLLM")
@@ -157,11 +251,12 @@ def _get_litellm_response(prompt: str, config: Dict, system_prompt: str) -> str:
             
         if not response.choices[0].message or not response.choices[0].message.content:
             raise ValueError("Invalid response format - missing message content")
-            
+
+        _record_usage(getattr(response, 'usage', None), 'prompt_tokens', 'completion_tokens')
         return response.choices[0].message.content.strip()
         
     except Exception as e:
-        print(f"♣ LiteLLM API error: {str(e)}")
+        logger.warning("LiteLLM API error: %s", e)
         raise
 
 def get_ai_response(prompt: str, config: Dict, system_role: str = "code_fixer") -> str:
@@ -192,19 +287,30 @@ def get_ai_response(prompt: str, config: Dict, system_role: str = "code_fixer")
     
     try:
         provider = config['AI_PROVIDER'].lower() if 'AI_PROVIDER' in config else 'azure'
-        if provider == 'azure':
-            return _get_azure_response(prompt, config['AZURE'], system_prompt)
-        elif provider == 'openai':
-            return _get_openai_response(prompt, config['OPENAI'], system_prompt)
-        elif provider == 'anthropic':
-            return _get_anthropic_response(prompt, config['ANTHROPIC'], system_prompt)
-        elif provider == 'ollama':
-            return _get_ollama_response(prompt, config['OLLAMA'])
-        elif provider == 'litellm':
-            return _get_litellm_response(prompt, config['LITELLM'], system_prompt)
-        else:
-            raise ValueError(f"Unsupported AI provider: {provider}")
-            
+        if config.get('CASSETTE_MODE') not in (None, 'off') or 'HEALING_AGENT_CASSETTE_MODE' in os.environ:
+            from . import cassette
+            provider_config = config.get(provider.upper()) or {}
+            model = provider_config.get('deployment_name' if provider == 'azure' else 'model', '')
+            return cassette.play(
+                config, provider, str(model), system_role, system_prompt, prompt,
+                lambda: _call_provider(provider, prompt, config, system_prompt)
+            )
+        return _call_provider(provider, prompt, config, system_prompt)
     except Exception as e:
-        print(f"♣ Error getting AI response: {str(e)}")
-        raise
\ No newline at end of file
+        logger.error("Error getting AI response: %s", e)
+        raise
+
+
+def _call_provider(provider: str, prompt: str, config: Dict, system_prompt: str) -> str:
+    if provider == 'azure':
+        return _get_azure_response(prompt, config['AZURE'], system_prompt)
+    elif provider == 'openai':
+        return _get_openai_response(prompt, config['OPENAI'], system_prompt)
+    elif provider == 'anthropic':
+        return _get_anthropic_response(prompt, config['ANTHROPIC'], system_prompt)
+    elif provider == 'ollama':
+        return _get_ollama_response(prompt, config['OLLAMA'])
+    elif provider == 'litellm':
+        return _get_litellm_response(prompt, config['LITELLM'], system_prompt)
+    else:
+        raise ValueError(f"Unsupported AI provider: {provider}")
\ No newline at end of file
@@ -1,7 +1,18 @@
 import ast
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+from . import agent_logging
 from .ai_broker import get_ai_response
+from .code_replacer import apply_line_edits
+
+logger = agent_logging.get_logger(__name__)
+
+# Line-range edit blocks returned by the model in edit mode:
+#   <<<<<<< LINES 12-14
+#   replacement lines (empty body deletes the range)
+#   >>>>>>>
+_EDIT_START = re.compile(r'^<{3,}\s*LINES\s+(\d+)\s*-\s*(\d+)\s*$')
+_EDIT_END = re.compile(r'^>{3,}\s*$')
 
 def ensure_healing_agent_decorator(code: str) -> str:
     """
@@ -26,15 +37,15 @@ def ensure_healing_agent_decorator(code: str) -> str:
     return decorator + code
 
 
-def prepare_fix_prompt(context: Dict[str, Any]) -> str:
+def _failure_details(context: Dict[str, Any]) -> str:
     """
-    Prepare the prompt for AI based on the context.
-    
+    Describe the error, traceback, function and arguments for a fix prompt.
+
     Args:
         context (Dict[str, Any]): The error context
-        
+
     Returns:
-        str: Formatted prompt for the AI
+        str: Prompt section shared by the function and edit prompts
     """
     # Extract function info if available
     function_info = context.get('function_info', {})
@@ -77,31 +88,127 @@ Module: {function_info.get('module')}
     if context.get('ai_hint'):
         ai_hint = f"\nAI Analysis:\n{context['ai_hint']}"
 
-    return f"""
-Fix the following Python code that produced an error, or at least handle the exceptions, add more info that could help debugging next time:
-
-Original Code:
-{context['function_info']['source_code']}
-
-Error Type: {context['error']['type']}
+    return f"""Error Type: {context['error']['type']}
 Error Message: {context['error']['message']}
 Error Line Number: {context['error'].get('line_number')}
 Error Line: {context['error'].get('error_line')}
 
 {error_details}
 {traceback_info}
-{func_info}{arg_info}{ai_hint}
+{func_info}{arg_info}{ai_hint}"""
 
-Return only the fixed code without any explanations or markdown formatting.
-Return exactly ONE top-level function definition. Place any imports and helper functions INSIDE the function body, never at module level.
-Ensure the fixed code maintains the same function name and signature.
-Add appropriate error handling where necessary.
+
+_REPAIR_RULES = """Add appropriate error handling where necessary.
 If the error was caused by input data whose structure changed (renamed columns or fields, different column order, changed nesting or format), adapt the code so it handles BOTH the previous and the new structure — e.g. inspect the actual headers/fields at runtime and map known aliases — instead of hardcoding one layout.
 Map fields only by names that are synonyms or translations of the SAME business concept as the expected field. An identifier, order number, code, date or other unrelated field is NEVER a valid alias for a required field (such as an amount), even if its values have a compatible type. Do not add a field to an alias mapping merely because it appears in the current input's headers.
 When comparing header/field names, always compare normalized forms: lowercase, trimmed, and accent/diacritic-insensitive (e.g. strip diacritics with unicodedata), because real-world data varies in casing, whitespace and accents.
 Never invent values for missing required business data; raise a clear error when a required field cannot be confidently identified or a record cannot be mapped.
 """
 
+
+def prepare_fix_prompt(context: Dict[str, Any]) -> str:
+    """
+    Prepare the prompt for AI based on the context.
+
+    Args:
+        context (Dict[str, Any]): The error context
+
+    Returns:
+        str: Formatted prompt for the AI
+    """
+    return f"""
+Fix the following Python code that produced an error, or at least handle the exceptions, add more info that could help debugging next time:
+
+Original Code:
+{context['function_info']['source_code']}
+
+{_failure_details(context)}
+
+Return only the fixed code without any explanations or markdown formatting.
+Return exactly ONE top-level function definition. Place any imports and helper functions INSIDE the function body, never at module level.
+Ensure the fixed code maintains the same function name and signature.
+{_REPAIR_RULES}"""
+
+
+def prepare_edit_prompt(context: Dict[str, Any]) -> str:
+    """
+    Prepare a prompt asking for line-range edits instead of a whole function.
+
+    Args:
+        context (Dict[str, Any]): The error context
+
+    Returns:
+        str: Formatted prompt for the AI
+    """
+    numbered_source = '\n'.join(
+        f"{int(number):>6}| {line}"
+        for number, line in sorted(
+            context['function_info']['source_lines'].items(),
+            key=lambda item: int(item[0]),
+        )
+    )
+    return f"""
+Fix the following Python function that produced an error, or at least handle the exceptions. The function is long, so answer with targeted line edits instead of rewriting it.
+
+Original Code (absolute line numbers, then "| ", then the line):
+{numbered_source}
+
+{_failure_details(context)}
+
+Return only edit blocks, without any explanations or markdown formatting. Each block replaces an inclusive range of the numbered lines:
+<<<<<<< LINES 12-14
+replacement lines, with their full indentation
+>>>>>>>
+An empty block deletes the range. To insert lines without removing any, use an end line one less than the start line (LINES 15-14 inserts before line 15).
+Use the line numbers shown above, never renumber after your own edits, and never let ranges overlap.
+Place any new imports and helper functions INSIDE the function body, never at module level.
+Keep the same function name and signature.
+{_REPAIR_RULES}"""
+
+
+def parse_line_edits(response: str) -> List[Tuple[int, int, List[str]]]:
+    """
+    Parse the edit blocks returned for an edit prompt.
+
+    Args:
+        response (str): The raw AI response
+
+    Returns:
+        List[Tuple[int, int, List[str]]]: ``(start, end, lines)`` edits
+
+    Raises:
+        ValueError: If a block is unterminated or no block is present
+    """
+    edits: List[Tuple[int, int, List[str]]] = []
+    current = None
+    for line in response.splitlines():
+        if current is None:
+            match = _EDIT_START.match(line.strip())
+            if match:
+                current = (int(match.group(1)), int(match.group(2)), [])
+            continue
+        if _EDIT_END.match(line.strip()):
+            edits.append(current)
+            current = None
+        else:
+            current[2].append(line)
+    if current is not None:
+        raise ValueError(f"Unterminated edit block for lines {current[0]}-{current[1]}")
+    if not edits:
+        raise ValueError("Response contains no edit blocks")
+    return edits
+
+
+def _use_edit_protocol(context: Dict[str, Any], config: Dict[str, Any]) -> bool:
+    """Decide whether a fix should be requested as line edits."""
+    fix_format = config.get('FIX_FORMAT', 'function')
+    source_lines = context.get('function_info', {}).get('source_lines')
+    if fix_format == 'function' or not source_lines:
+        return False
+    if fix_format == 'edits':
+        return True
+    return len(source_lines) >= config.get('EDIT_MIN_LINES', 300)
+
 def validate_fixed_code(fixed_code: str) -> bool:
     """
     Validate the fixed code is syntactically correct.
@@ -118,20 +225,20 @@ def validate_fixed_code(fixed_code: str) -> bool:
         
         # Basic checks for common issues
         if not fixed_code.strip():
-            print("♣ Generated code is empty")
+            logger.warning("Generated code is empty")
             return False
             
         if "def " not in fixed_code:
-            print("♣ Generated code doesn't contain function definition")
+            logger.warning("Generated code doesn't contain function definition")
             return False
             
         return True
         
     except SyntaxError as e:
-        print(f"♣ Syntax error in generated code: {str(e)}")
+        logger.warning("Syntax error in generated code: %s", e)
         return False
     except Exception as e:
-        print(f"♣ Validation error: {str(e)}")
+        logger.warning("Validation error: %s", e)
         return False
 
 def fix(context: Dict[str, Any], config: Dict[str, Any]) -> str:
@@ -150,13 +257,27 @@ def fix(context: Dict[str, Any], config: Dict[str, Any]) -> str:
         str: The fixed version of the code
     """
     try:
-        # Prepare the prompt for AI
-        prompt = prepare_fix_prompt(context)
+        # Large functions are repaired through line edits so output tokens
+        # scale with the size of the change, not the size of the function.
+        edit_mode = _use_edit_protocol(context, config)
 
         # Generation is non-deterministic: validate, and retry once on an
         # invalid candidate instead of giving up the whole repair attempt.
         for generation_attempt in range(2):
-            fixed_code = get_ai_response(prompt, config, "code_fixer")
+            if edit_mode:
+                response = get_ai_response(prepare_edit_prompt(context), config, "code_fixer")
+                try:
+                    fixed_code = apply_line_edits(
+                        context['function_info']['source_lines'],
+                        parse_line_edits(response),
+                    )
+                except (ValueError, SyntaxError) as edit_error:
+                    # The retry asks for the whole function instead.
+                    logger.warning("Generated edits could not be applied: %s", edit_error)
+                    edit_mode = False
+                    continue
+            else:
+                fixed_code = get_ai_response(prepare_fix_prompt(context), config, "code_fixer")
 
             # Remove markdown code fences robustly (```python, ```py, ``` …)
             fixed_code = fixed_code.strip()
@@ -175,9 +296,9 @@ def fix(context: Dict[str, Any], config: Dict[str, Any]) -> str:
             except SyntaxError:
                 single_function = True  # let validate_fixed_code report it
             if not single_function:
-                print(
-                    "♣ Generated code is not a single function definition"
-                    + (", retrying once" if generation_attempt == 0 else "")
+                logger.warning(
+                    "Generated code is not a single function definition%s",
+                    ", retrying once" if generation_attempt == 0 else "",
                 )
                 continue
 
@@ -188,17 +309,14 @@ def fix(context: Dict[str, Any], config: Dict[str, Any]) -> str:
             if validate_fixed_code(fixed_code):
                 return fixed_code
 
-            print(
-                "♣ Generated fix failed validation"
-                + (", retrying once" if generation_attempt == 0 else "")
+            logger.warning(
+                "Generated fix failed validation%s",
+                ", retrying once" if generation_attempt == 0 else "",
             )
         return
 
     except Exception as e:
-        print(f"♣ Error during code fixing: {str(e)}")
-        print(f"♣ Error type: {type(e).__name__}")
-        print(f"♣ Error details: {repr(e)}")
-        print(f"♣ Error traceback:")
-        import traceback
-        traceback.print_exc()
+        logger.error(
+            "Error during code fixing: %s (%s)", e, type(e).__name__, exc_info=True
+        )
         return
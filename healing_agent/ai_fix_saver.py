@@ -2,6 +2,11 @@ import os
 import datetime
 from typing import Optional
 
+from . import agent_logging
+
+logger = agent_logging.get_logger(__name__)
+
+
 def save_ai_fix(context: dict) -> Optional[str]:
     """
     Save AI-generated code fixes to a separate file.
@@ -37,9 +42,9 @@ def save_ai_fix(context: dict) -> Optional[str]:
             return file_path
 
         except Exception as write_error:
-            print(f"♣ Failed to write AI fix to {file_path}: {str(write_error)}")
+            logger.warning("Failed to write AI fix to %s: %s", file_path, write_error)
             return None
 
     except Exception as save_error:
-        print(f"♣ Failed to save AI fix: {str(save_error)}")
+        logger.warning("Failed to save AI fix: %s", save_error)
         return None 
\ No newline at end of file
@@ -0,0 +1,428 @@
+"""Retention limits for the ``_healing_agent_*`` artifact directories.
+
+Backups, saved contexts and fixes are written next to the source files and
+would otherwise grow without bound on long-running hosts.  ``ARTIFACT_RETENTION``
+sets per-kind limits::
+
+    ARTIFACT_RETENTION = {
+        "backups":    {"max_count": 200, "max_bytes": 50_000_000, "max_age_days": 30},
+        "exceptions": {"max_count": 1000, "max_age_days": 7, "compact": True},
+    }
+
+Limits are enforced incrementally: each directory's files are scanned once
+into an in-memory index ordered by modification time (refreshed every few
+minutes to notice other writers), every new artifact updates it, and the
+oldest files are evicted until the directory is back within its limits.
+Files that share a stem (a ``.patch`` and its ``.json`` sidecar) are evicted
+together.  With ``compact`` evicted files are moved into a monthly zip
+archive in ``<dir>/_archive`` instead of being deleted; ``max_archives``
+bounds those.  Backup stores (``BACKUP_FORMAT="store"``) are limited by
+manifest entries, after which unreferenced objects are collected.  Context
+bundles (``CONTEXT_FORMAT="bundle"``) fall under the ``exceptions`` limits:
+records count towards ``max_count`` and whole rotated segments are evicted
+together with their index entries.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from . import agent_logging, context_bundle
+from .backup_store import MANIFEST_NAME, OBJECTS_DIR, BackupStore, is_backup_store
+
+logger = agent_logging.get_logger(__name__)
+
+ARTIFACT_KINDS = {
+    "_healing_agent_backups": "backups",
+    "_healing_agent_exceptions": "exceptions",
+    "_healing_agent_fixes": "fixes",
+}
+ARCHIVE_DIR = "_archive"
+# Bookkeeping files that are never evicted as artifacts.
+_RESERVED = {MANIFEST_NAME}
+_RESCAN_SECONDS = 300.0
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Limits for one artifact kind; None means unlimited."""
+
+    max_count: Optional[int] = None
+    max_bytes: Optional[int] = None
+    max_age_days: Optional[float] = None
+    compact: bool = False
+    max_archives: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], kind: str) -> Optional["RetentionPolicy"]:
+        limits = (config.get("ARTIFACT_RETENTION") or {}).get(kind)
+        return cls(**limits) if limits else None
+
+
+def artifact_kind(directory: Path | str) -> Optional[str]:
+    return ARTIFACT_KINDS.get(Path(directory).name)
+
+
+@dataclass
+class _Entry:
+    size: int
+    mtime: float
+
+
+def _stem(name: str) -> str:
+    return os.path.splitext(name)[0]
+
+
+class _DirectoryIndex:
+    """Sizes and modification times of one directory's artifacts.
+
+    ``by_age`` is a heap of ``(mtime, name)``; pairs for removed or rewritten
+    files stay in it until they reach the top and are discarded there.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.entries: Dict[str, _Entry] = {}
+        self.groups: Dict[str, Set[str]] = {}
+        self.by_age: List[Tuple[float, str]] = []
+        self.total_bytes = 0
+        self.scanned_at = 0.0
+
+    def scan(self) -> None:
+        self.entries.clear()
+        self.groups.clear()
+        self.by_age = []
+        self.total_bytes = 0
+        try:
+            with os.scandir(self.directory) as items:
+                for item in items:
+                    if (
+                        item.name.startswith(".")
+                        or item.name in _RESERVED
+                        or not item.is_file(follow_symlinks=False)
+                    ):
+                        continue
+                    stat = item.stat(follow_symlinks=False)
+                    self._insert(item.name, _Entry(stat.st_size, stat.st_mtime), push=False)
+        except FileNotFoundError:
+            pass
+        self.by_age = [(entry.mtime, name) for name, entry in self.entries.items()]
+        heapq.heapify(self.by_age)
+        self.scanned_at = time.monotonic()
+
+    def _insert(self, name: str, entry: _Entry, push: bool = True) -> None:
+        self.entries[name] = entry
+        self.total_bytes += entry.size
+        self.groups.setdefault(_stem(name), set()).add(name)
+        if push:
+            heapq.heappush(self.by_age, (entry.mtime, name))
+
+    def add(self, name: str) -> None:
+        try:
+            stat = (self.directory / name).stat()
+        except FileNotFoundError:
+            return
+        self.remove(name)
+        self._insert(name, _Entry(stat.st_size, stat.st_mtime))
+        if len(self.by_age) > 2 * len(self.entries) + 64:
+            self.by_age = [(entry.mtime, name) for name, entry in self.entries.items()]
+            heapq.heapify(self.by_age)
+
+    def remove(self, name: str) -> None:
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+            group = self.groups[_stem(name)]
+            group.discard(name)
+            if not group:
+                del self.groups[_stem(name)]
+
+    def oldest(self) -> Optional[str]:
+        """The least recently modified artifact, dropping stale heap pairs."""
+        while self.by_age:
+            mtime, name = self.by_age[0]
+            entry = self.entries.get(name)
+            if entry is not None and entry.mtime == mtime:
+                return name
+            heapq.heappop(self.by_age)
+        return None
+
+
+@dataclass
+class _Segment:
+    records: int
+    size: int
+    mtime: float
+
+
+class _BundleIndex:
+    """Record counts, sizes and modification times of a bundle's segments.
+
+    Segment numbers only grow, so insertion order is age order.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.segments: "OrderedDict[str, _Segment]" = OrderedDict()
+        self.records = 0
+        self.total_bytes = 0
+        self.scanned_at = 0.0
+
+    def scan(self) -> None:
+        self.segments.clear()
+        self.records = 0
+        self.total_bytes = 0
+        counts = context_bundle.records_per_segment(self.directory)
+        for path in context_bundle.segment_paths(self.directory):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            self._put(path.name, _Segment(counts.get(path.name, 0), stat.st_size, stat.st_mtime))
+        self.scanned_at = time.monotonic()
+
+    def _put(self, name: str, segment: _Segment) -> None:
+        self.segments[name] = segment
+        self.records += segment.records
+        self.total_bytes += segment.size
+
+    def add_record(self) -> None:
+        """Account for one record appended to the newest segment."""
+        paths = context_bundle.segment_paths(self.directory)
+        if not paths:
+            return
+        try:
+            stat = paths[-1].stat()
+        except FileNotFoundError:
+            return
+        segment = self.remove(paths[-1].name) or _Segment(0, 0, 0.0)
+        self._put(paths[-1].name, _Segment(segment.records + 1, stat.st_size, stat.st_mtime))
+
+    def remove(self, name: str) -> Optional[_Segment]:
+        segment = self.segments.pop(name, None)
+        if segment is not None:
+            self.records -= segment.records
+            self.total_bytes -= segment.size
+        return segment
+
+
+class RetentionManager:
+    """Applies retention policies as artifacts are written."""
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._indexes: Dict[Path, _DirectoryIndex] = {}
+        self._bundles: Dict[Path, _BundleIndex] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, directory: Path) -> _DirectoryIndex:
+        index = self._indexes.get(directory)
+        if index is None:
+            index = self._indexes[directory] = _DirectoryIndex(directory)
+        if time.monotonic() - index.scanned_at > _RESCAN_SECONDS:
+            index.scan()
+        return index
+
+    def _bundle(self, directory: Path) -> _BundleIndex:
+        bundle = self._bundles.get(directory)
+        if bundle is None:
+            bundle = self._bundles[directory] = _BundleIndex(directory)
+        return bundle
+
+    def record(self, path: Path | str, policy: RetentionPolicy) -> List[str]:
+        """Account for a newly written artifact and enforce ``policy``.
+
+        Returns the names of the evicted files.
+        """
+        artifact = Path(path).resolve()
+        with self._lock:
+            index = self._index(artifact.parent)
+            index.add(artifact.name)
+            return self._enforce(index, policy, keep=artifact.name)
+
+    def record_bundle(self, directory: Path | str, policy: RetentionPolicy) -> List[str]:
+        """Account for a record appended to a context bundle and enforce ``policy``.
+
+        Returns the names of the evicted segments.
+        """
+        with self._lock:
+            bundle = self._bundle(Path(directory).resolve())
+            if time.monotonic() - bundle.scanned_at > _RESCAN_SECONDS:
+                bundle.scan()  # already includes the new record
+            else:
+                bundle.add_record()
+            return self._enforce_bundle(bundle, policy)
+
+    def enforce(self, directory: Path | str, policy: RetentionPolicy) -> List[str]:
+        """Rescan ``directory`` and enforce ``policy`` on it now."""
+        with self._lock:
+            index = self._index(Path(directory).resolve())
+            index.scan()
+            return self._enforce(index, policy)
+
+    def enforce_bundle(self, directory: Path | str, policy: RetentionPolicy) -> List[str]:
+        """Rescan the bundle in ``directory`` and enforce ``policy`` on it now."""
+        with self._lock:
+            bundle = self._bundle(Path(directory).resolve())
+            bundle.scan()
+            return self._enforce_bundle(bundle, policy)
+
+    def _cutoff(self, policy: RetentionPolicy) -> Optional[float]:
+        if policy.max_age_days is None:
+            return None
+        return self._clock() - policy.max_age_days * 86400
+
+    def _enforce(
+        self, index: _DirectoryIndex, policy: RetentionPolicy, keep: Optional[str] = None
+    ) -> List[str]:
+        cutoff = self._cutoff(policy)
+        evicted: List[str] = []
+        kept: List[Tuple[float, str]] = []
+        while True:
+            name = index.oldest()
+            if name is None:
+                break
+            over_count = policy.max_count is not None and len(index.entries) > policy.max_count
+            over_bytes = policy.max_bytes is not None and index.total_bytes > policy.max_bytes
+            expired = cutoff is not None and index.entries[name].mtime < cutoff
+            if not (over_count or over_bytes or expired):
+                break  # everything after this is newer
+            group = sorted(index.groups[_stem(name)])
+            if keep in group:
+                kept.append(heapq.heappop(index.by_age))
+                continue
+            self._evict(index.directory, group, policy)
+            for member in group:
+                index.remove(member)
+            evicted.extend(group)
+        for pair in kept:
+            heapq.heappush(index.by_age, pair)
+        return evicted
+
+    def _enforce_bundle(self, bundle: _BundleIndex, policy: RetentionPolicy) -> List[str]:
+        cutoff = self._cutoff(policy)
+        evicted: List[str] = []
+        # The newest segment is still being appended to.
+        while len(bundle.segments) > 1:
+            name, segment = next(iter(bundle.segments.items()))
+            over_count = policy.max_count is not None and bundle.records > policy.max_count
+            over_bytes = policy.max_bytes is not None and bundle.total_bytes > policy.max_bytes
+            expired = cutoff is not None and segment.mtime < cutoff
+            if not (over_count or over_bytes or expired):
+                break
+            bundle.remove(name)
+            evicted.append(name)
+        if evicted:
+            if policy.compact:
+                self._archive(bundle.directory, evicted, policy)
+            context_bundle.drop_segments(bundle.directory, evicted)
+        return evicted
+
+    def _evict(self, directory: Path, names: List[str], policy: RetentionPolicy) -> None:
+        if policy.compact:
+            self._archive(directory, names, policy)
+        for name in names:
+            try:
+                (directory / name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _archive(self, directory: Path, names: List[str], policy: RetentionPolicy) -> None:
+        import zipfile
+
+        archive_dir = directory / ARCHIVE_DIR
+        archive_dir.mkdir(exist_ok=True)
+        month = time.strftime("%Y%m", time.localtime(self._clock()))
+        archive = archive_dir / f"{directory.name.strip('_')}-{month}.zip"
+        with zipfile.ZipFile(archive, "a", compression=zipfile.ZIP_DEFLATED) as bundle:
+            for name in names:
+                try:
+                    bundle.write(directory / name, arcname=name)
+                except FileNotFoundError:
+                    continue
+        if policy.max_archives is not None:
+            archives = sorted(archive_dir.glob("*.zip"))
+            for stale in archives[: max(0, len(archives) - policy.max_archives)]:
+                stale.unlink(missing_ok=True)
+
+
+_manager = RetentionManager()
+
+
+def enforce_retention(path: Any, config: Dict[str, Any]) -> List[str]:
+    """Apply the configured policy after ``path`` was written; never raises."""
+    if not path or not config.get("ARTIFACT_RETENTION"):
+        return []
+    try:
+        bundle_dir, separator, _ = str(path).rpartition("#")
+        if separator and context_bundle.is_bundle(bundle_dir):
+            # "<bundle dir>#<heal id>" from CONTEXT_FORMAT="bundle".
+            policy = RetentionPolicy.from_config(config, "exceptions")
+            return _manager.record_bundle(bundle_dir, policy) if policy else []
+        artifact = Path(path)
+        if artifact.parent.parent.name == OBJECTS_DIR:
+            # A backup-store object: prune the store's manifest instead.
+            root = artifact.parents[2]
+            policy = RetentionPolicy.from_config(config, artifact_kind(root) or "")
+            return _prune_store(root, policy) if policy else []
+        kind = artifact_kind(artifact.parent)
+        policy = RetentionPolicy.from_config(config, kind) if kind else None
+        if policy is None or not artifact.is_file():
+            return []
+        return _manager.record(artifact, policy)
+    except Exception as error:
+        logger.warning("Artifact retention failed for %s: %s", path, error)
+        return []
+
+
+def _prune_store(root: Path, policy: RetentionPolicy) -> List[str]:
+    """Apply ``policy`` to a backup store; ``compact`` does not apply to it."""
+    dropped = BackupStore(root).prune(
+        max_count=policy.max_count,
+        max_bytes=policy.max_bytes,
+        max_age_days=policy.max_age_days,
+    )
+    return [f"{entry['sha256'][:12]} ({entry['time']})" for entry in dropped]
+
+
+def prune(root: Path | str, config: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Enforce every configured policy on the artifact directories under ``root``.
+
+    Context bundles inside ``_healing_agent_exceptions`` and the configured
+    ``CONTEXT_BUNDLE_DIR`` are held to the ``exceptions`` limits.
+    """
+    evicted: Dict[str, List[str]] = {}
+    for directory_name, kind in ARTIFACT_KINDS.items():
+        policy = RetentionPolicy.from_config(config, kind)
+        if policy is None:
+            continue
+        for directory in Path(root).rglob(directory_name):
+            if directory.is_dir():
+                removed = _manager.enforce(directory, policy)
+                if is_backup_store(directory):
+                    removed += _prune_store(directory, policy)
+                if removed:
+                    evicted[str(directory)] = removed
+
+    policy = RetentionPolicy.from_config(config, "exceptions")
+    if policy is not None:
+        bundles = {
+            directory / "bundle"
+            for directory in Path(root).rglob("_healing_agent_exceptions")
+            if directory.is_dir()
+        }
+        if config.get("CONTEXT_BUNDLE_DIR"):
+            bundles.add(Path(config["CONTEXT_BUNDLE_DIR"]))
+        for bundle in sorted(bundles):
+            if context_bundle.is_bundle(bundle):
+                removed = _manager.enforce_bundle(bundle, policy)
+                if removed:
+                    evicted[str(bundle)] = removed
+    return evicted
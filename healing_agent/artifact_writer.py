@@ -0,0 +1,111 @@
+"""Background persistence of heal artifacts.
+
+Saved contexts, AI fixes and backups are for later review; writing them on
+the failing thread puts every disk stall into heal latency.  With
+``ASYNC_ARTIFACTS`` the healing path hands each write to a bounded queue
+drained by one daemon thread, and an ``atexit`` hook flushes what is still
+queued when the interpreter exits.
+
+A full queue applies a short backpressure wait, then drops the write and
+counts it per artifact kind.  Writes submitted with ``required=True`` (source
+backups) are never dropped: they run inline instead.
+"""
+
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+from . import agent_logging
+
+logger = agent_logging.get_logger(__name__)
+
+DEFAULT_QUEUE_SIZE = 256
+
+
+class ArtifactWriter:
+    """A bounded, single-threaded write queue with drop counters."""
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE, put_timeout: float = 0.05):
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize)
+        self._dropped: Counter = Counter()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def dropped(self) -> Dict[str, int]:
+        """Writes dropped because the queue was full, by artifact kind."""
+        with self._lock:
+            return dict(self._dropped)
+
+    def submit(
+        self, kind: str, write: Callable[..., Any], *args: Any, required: bool = False
+    ) -> bool:
+        """Queue ``write(*args)``; False if it was dropped."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="healing-agent-artifacts", daemon=True
+                )
+                self._thread.start()
+        try:
+            self._queue.put((kind, write, args), timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            pass
+        if required:
+            self._write(kind, write, args)
+            return True
+        with self._lock:
+            self._dropped[kind] += 1
+            dropped = self._dropped[kind]
+        if dropped == 1 or dropped % 100 == 0:
+            logger.warning(
+                "Artifact queue full: dropped %s %s write(s) so far", dropped, kind
+            )
+        return False
+
+    @staticmethod
+    def _write(kind: str, write: Callable[..., Any], args: tuple) -> None:
+        try:
+            write(*args)
+        except Exception as error:
+            logger.warning("Failed to write %s artifact: %s", kind, error)
+
+    def _run(self) -> None:
+        while True:
+            kind, write, args = self._queue.get()
+            try:
+                self._write(kind, write, args)
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued write has finished; False on timeout."""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(
+                lambda: not self._queue.unfinished_tasks, timeout
+            )
+
+
+_writer: Optional[ArtifactWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_artifact_writer(maxsize: int = DEFAULT_QUEUE_SIZE) -> ArtifactWriter:
+    """The process-wide writer; ``maxsize`` applies when it is first created."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ArtifactWriter(maxsize)
+            atexit.register(_writer.flush, 10.0)
+        return _writer
+
+
+def flush_artifacts(timeout: Optional[float] = None) -> bool:
+    """Wait for queued artifact writes; True when nothing is pending."""
+    return _writer.flush(timeout) if _writer is not None else True
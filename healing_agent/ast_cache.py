@@ -0,0 +1,28 @@
+"""Shared parse cache for source files of decorated functions.
+
+Capturing context, splicing a fix and hot-patching each parse the same
+module source.  Parsing once per distinct source text and sharing the tree
+keeps that cost off the failure path, and ``prewarm`` can fill the cache
+ahead of the first failure.  Cached trees are shared: callers must not
+mutate them (copy a node before changing it).
+"""
+
+from __future__ import annotations
+
+import ast
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple
+
+
+@lru_cache(maxsize=64)
+def parse_source(source: str, filename: str = "<unknown>") -> ast.Module:
+    """Parse ``source``; repeated calls with the same text return the same tree."""
+    return ast.parse(source, filename)
+
+
+def parse_file(path: Path | str) -> Tuple[str, ast.Module]:
+    """Read and parse a UTF-8 source file; returns ``(source, tree)``."""
+    with open(path, "r", encoding="utf-8") as source_file:
+        source = source_file.read()
+    return source, parse_source(source, str(path))
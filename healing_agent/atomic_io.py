@@ -0,0 +1,105 @@
+"""Crash-safe file writes.
+
+Readers must never observe a half-written artifact, queue job or source file.
+Content is written to a temporary file in the destination directory, flushed
+to disk and moved into place with ``os.replace``, which is atomic on POSIX and
+Windows when source and destination share a filesystem.  An existing file's
+permission bits are kept.
+
+Writers that read, modify and write back a shared file (the source file a
+fix is spliced into) hold ``locked_directory`` around the whole cycle so
+concurrent writers cannot lose each other's updates.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_thread_lock = threading.RLock()
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Persist a rename in ``directory``; a no-op where unsupported."""
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def atomic_write_bytes(path: Path | str, data: bytes, sync_directory: bool = False) -> Path:
+    """Atomically replace ``path`` with ``data``.
+
+    With ``sync_directory`` the containing directory is fsynced as well, so
+    the rename itself survives a power loss.
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = target.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+    descriptor, temp_name = tempfile.mkstemp(
+        prefix=f".{target.name}.", suffix=".tmp", dir=target.parent
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            if mode is not None:
+                os.chmod(temp_name, mode)
+            os.fsync(temp_file.fileno())
+        os.replace(temp_name, target)
+        if sync_directory:
+            _fsync_directory(target.parent)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+    return target
+
+
+def atomic_write_text(
+    path: Path | str, text: str, encoding: str = "utf-8", sync_directory: bool = False
+) -> Path:
+    """Atomically replace ``path`` with ``text``."""
+    return atomic_write_bytes(path, text.encode(encoding), sync_directory)
+
+
+@contextlib.contextmanager
+def locked_directory(path: Path | str) -> Iterator[None]:
+    """Hold an exclusive advisory lock for writers of files in ``path``'s directory.
+
+    The lock is taken on the directory itself rather than on the file, since
+    ``os.replace`` swaps the file's inode on every write.  Threads of this
+    process are serialized as well; where ``fcntl`` is unavailable only they
+    are.
+    """
+    directory = Path(path).resolve().parent
+    with _thread_lock:
+        if fcntl is None:
+            yield
+            return
+        descriptor = os.open(directory, os.O_RDONLY)
+        try:
+            fcntl.flock(descriptor, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(descriptor)  # also releases the lock
@@ -0,0 +1,105 @@
+"""Non-blocking healing on a background worker thread.
+
+In background mode the decorator captures the failure context on the failing
+thread, hands the expensive provider/write work to this queue and re-raises
+the original exception immediately, so request latency never includes model
+time.  One daemon thread drains the queue; a function with a heal already
+queued or running is not queued again, and a function whose heals keep
+failing stops being queued after ``MAX_ATTEMPTS`` consecutive failures.  A
+heal the handler cannot vouch for (a fix installed without verification)
+counts as a failure until ``confirm`` reports that the fix worked.
+
+The handler receives jobs in batches: everything queued when the thread
+picks up work, plus whatever arrives within the first job's batch window.
+Failures that break several functions at once are then repaired together.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from . import agent_logging
+
+logger = agent_logging.get_logger(__name__)
+
+
+class BackgroundHealer:
+    """A single-threaded, deduplicating heal job queue."""
+
+    def __init__(self, handler: Callable[[List[Any]], List[bool]]):
+        self._handler = handler
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._pending: Set[str] = set()
+        self._failures: Dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def accepts(self, key: str, max_attempts: int) -> bool:
+        """True if a new heal for ``key`` would be queued."""
+        with self._condition:
+            return (
+                key not in self._pending
+                and self._failures.get(key, 0) < max_attempts
+            )
+
+    def confirm(self, key: str) -> None:
+        """A later call showed the heal for ``key`` worked: reset its failures."""
+        with self._condition:
+            self._failures.pop(key, None)
+
+    def submit(self, key: str, job: Any, batch_window: float = 0.0) -> bool:
+        """Queue ``job`` unless a heal for ``key`` is already pending.
+
+        ``batch_window`` is how long the worker waits for more jobs to batch
+        with this one when it is the first of a batch.
+        """
+        with self._condition:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="healing-agent-background", daemon=True
+                )
+                self._thread.start()
+        self._queue.put((key, job, batch_window))
+        return True
+
+    def _next_batch(self) -> List[tuple]:
+        key, job, batch_window = self._queue.get()
+        batch = [(key, job)]
+        deadline = time.monotonic() + batch_window
+        while True:
+            try:
+                key, job, _ = self._queue.get(
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
+            except queue.Empty:
+                return batch
+            batch.append((key, job))
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            healed = [False] * len(batch)
+            try:
+                healed = [bool(result) for result in self._handler([job for _, job in batch])]
+            except Exception as error:
+                logger.warning("Background healing failed: %s", error)
+            finally:
+                with self._condition:
+                    for index, (key, _) in enumerate(batch):
+                        if index < len(healed) and healed[index]:
+                            self._failures.pop(key, None)
+                        else:
+                            self._failures[key] = self._failures.get(key, 0) + 1
+                        self._pending.discard(key)
+                    self._condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until no heal is queued or running; False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending, timeout)
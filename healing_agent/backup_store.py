@@ -0,0 +1,211 @@
+"""Content-addressed, deduplicated source backups.
+
+Instead of a full timestamped copy per heal, ``BACKUP_FORMAT="store"`` keeps
+each distinct file state once, addressed by its SHA-256, next to the source::
+
+    _healing_agent_backups/objects/ab/cdef...   codec byte + compressed content
+    _healing_agent_backups/manifest.jsonl       one line per backup
+
+A manifest line records the source path, time, heal id and object digest, so
+rolling a file back to any earlier state is a manifest lookup.  Objects are
+written atomically and never rewritten; manifest appends and pruning take an
+advisory lock (where ``fcntl`` is available).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import datetime
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .atomic_io import atomic_write_bytes, atomic_write_text, locked_directory
+from .compression import CODEC_NONE, compress, decompress
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+BACKUP_DIR = "_healing_agent_backups"
+MANIFEST_NAME = "manifest.jsonl"
+OBJECTS_DIR = "objects"
+
+_thread_lock = threading.Lock()
+
+
+class BackupStore:
+    """The backup store in one ``_healing_agent_backups`` directory."""
+
+    def __init__(self, root: Path | str, compress_objects: bool = True):
+        self.root = Path(root)
+        self.compress_objects = compress_objects
+
+    @classmethod
+    def for_source(cls, source_path: Path | str, **options: Any) -> "BackupStore":
+        return cls(Path(source_path).resolve().parent / BACKUP_DIR, **options)
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / MANIFEST_NAME
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / OBJECTS_DIR / digest[:2] / digest[2:]
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with _thread_lock, open(self.root / ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def put(
+        self,
+        source_path: Path | str,
+        data: bytes,
+        heal_id: Optional[str] = None,
+    ) -> str:
+        """Store ``data`` as a backup of ``source_path``; returns the object path."""
+        digest = self.digest(data)
+        target = self.object_path(digest)
+        entry = {
+            "file": str(Path(source_path).resolve()),
+            "sha256": digest,
+            "size": len(data),
+            "time": datetime.datetime.now().isoformat(timespec="microseconds"),
+            "heal_id": heal_id,
+        }
+        # Object and manifest line are written under one lock so pruning
+        # never collects an object whose manifest line is still pending.
+        with self._locked():
+            if not target.exists():
+                codec, payload = (
+                    compress(data) if self.compress_objects else (CODEC_NONE, data)
+                )
+                atomic_write_bytes(target, bytes([codec]) + payload)
+            with open(self.manifest_path, "a", encoding="utf-8") as manifest:
+                manifest.write(json.dumps(entry) + "\n")
+        return str(target)
+
+    def read(self, digest: str) -> bytes:
+        blob = self.object_path(digest).read_bytes()
+        data = decompress(blob[0], blob[1:])
+        if self.digest(data) != digest:
+            raise ValueError(f"Backup object {digest} is corrupt")
+        return data
+
+    def entries(self, source_path: Optional[Path | str] = None) -> List[Dict[str, Any]]:
+        """Manifest entries, oldest first, optionally for one source file."""
+        wanted = str(Path(source_path).resolve()) if source_path else None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as manifest:
+                lines = manifest.readlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn final line
+            if wanted is None or entry.get("file") == wanted:
+                entries.append(entry)
+        return entries
+
+    def find(
+        self,
+        source_path: Path | str,
+        ref: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """The newest backup of ``source_path`` matching ``ref``/``before``.
+
+        ``ref`` matches a heal id or a digest prefix; ``before`` is an ISO
+        timestamp and selects the last backup taken before it.
+        """
+        for entry in reversed(self.entries(source_path)):
+            if ref and not (
+                entry.get("heal_id") == ref or entry["sha256"].startswith(ref)
+            ):
+                continue
+            if before and entry["time"] >= before:
+                continue
+            return entry
+        return None
+
+    def restore(
+        self,
+        source_path: Path | str,
+        ref: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Atomically roll ``source_path`` back to a stored state."""
+        entry = self.find(source_path, ref, before)
+        if entry is None:
+            raise LookupError(f"No matching backup of {source_path}")
+        with locked_directory(source_path):
+            atomic_write_bytes(source_path, self.read(entry["sha256"]), sync_directory=True)
+        return entry
+
+    def prune(
+        self,
+        max_count: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+        now: Optional[datetime.datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Drop the oldest manifest entries beyond the limits, then collect
+        objects no remaining entry references.  Returns the dropped entries.
+        """
+        with self._locked():
+            entries = self.entries()
+            cutoff = None
+            if max_age_days is not None:
+                moment = (now or datetime.datetime.now()) - datetime.timedelta(days=max_age_days)
+                cutoff = moment.isoformat()
+            kept: List[Dict[str, Any]] = []
+            stored: Dict[str, int] = {}
+            # Walk newest first so the most recent states are kept.
+            for entry in reversed(entries):
+                if max_count is not None and len(kept) >= max_count:
+                    continue
+                if cutoff is not None and entry["time"] < cutoff:
+                    continue
+                extra = 0 if entry["sha256"] in stored else self._object_size(entry["sha256"])
+                if max_bytes is not None and kept and sum(stored.values()) + extra > max_bytes:
+                    continue
+                stored.setdefault(entry["sha256"], extra)
+                kept.append(entry)
+            kept.reverse()
+            kept_ids = {id(entry) for entry in kept}
+            dropped = [entry for entry in entries if id(entry) not in kept_ids]
+            if not dropped:
+                return []
+            atomic_write_text(
+                self.manifest_path, "".join(json.dumps(entry) + "\n" for entry in kept)
+            )
+            live = {entry["sha256"] for entry in kept}
+            objects = self.root / OBJECTS_DIR
+            for bucket in objects.iterdir() if objects.is_dir() else ():
+                for blob in bucket.iterdir():
+                    if bucket.name + blob.name not in live:
+                        blob.unlink(missing_ok=True)
+            return dropped
+
+    def _object_size(self, digest: str) -> int:
+        try:
+            return self.object_path(digest).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+
+def is_backup_store(directory: Path | str) -> bool:
+    return (Path(directory) / MANIFEST_NAME).is_file()
@@ -0,0 +1,386 @@
+"""Offline heal benchmark: ``healing-agent bench``.
+
+Runs a corpus of buggy functions and data-drift scenarios through the real
+healing path (capture, local fixers, provider round trip, write, hot patch)
+against ``StandInProvider``, a scripted local server speaking the providers'
+wire formats, so no network or keys are needed.  Each scenario module is
+written fresh for every iteration, the decorated function is called with
+the failing input, and the result is compared with the expected value:
+
+    healed     the call returned the expected value
+    false_fix  the call returned, but with a wrong value
+    failed     the original error (or another one) was raised
+
+The report has per-stage latency percentiles (from ``metrics``), heal
+latency percentiles, heals per second, tracemalloc peaks per heal and the
+process's peak RSS, and success and false-fix rates.  ``--min-success-rate``
+and ``--max-false-fix-rate`` turn it into a CI gate.
+
+``--record``/``--replay`` run the bench through a provider cassette (see
+``cassette``), so a recording from a real provider can be replayed offline.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from . import cassette as cassettes, metrics
+from .stand_in_provider import StandInProvider
+
+PERCENTILES = (50, 95, 99)
+
+_PREAMBLE = "from healing_agent.healing_agent import healing_agent\n\n\n"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A decorated function that fails on ``args`` and the scripted repair."""
+
+    name: str
+    kind: str  # "bug" or "drift"
+    function: str
+    source: str
+    args: tuple
+    expected: Any
+    hint: str
+    fix: str
+
+
+CORPUS: List[Scenario] = [
+    Scenario(
+        name="zero_division",
+        kind="bug",
+        function="ratio",
+        source="@healing_agent\ndef ratio(a, b):\n    return a / b\n",
+        args=(1, 0),
+        expected=0,
+        hint="Guard the division against a zero denominator.",
+        fix="def ratio(a, b):\n    return a / b if b else 0\n",
+    ),
+    Scenario(
+        name="none_attribute",
+        kind="bug",
+        function="title_case",
+        source="@healing_agent\ndef title_case(name):\n    return name.title()\n",
+        args=(None,),
+        expected="",
+        hint="Treat a missing name as an empty string.",
+        fix="def title_case(name):\n    return (name or '').title()\n",
+    ),
+    Scenario(
+        name="empty_index",
+        kind="bug",
+        function="first_item",
+        source="@healing_agent\ndef first_item(items):\n    return items[0]\n",
+        args=([],),
+        expected=None,
+        hint="Return None for an empty list.",
+        fix="def first_item(items):\n    return items[0] if items else None\n",
+    ),
+    Scenario(
+        name="str_int_concat",
+        kind="bug",
+        function="label",
+        source="@healing_agent\ndef label(count):\n    return 'items: ' + count\n",
+        args=(3,),
+        expected="items: 3",
+        hint="Convert the count to a string before concatenating.",
+        fix="def label(count):\n    return 'items: ' + str(count)\n",
+    ),
+    Scenario(
+        name="average_wrong_fix",
+        kind="bug",
+        function="average",
+        source="@healing_agent\ndef average(values):\n    return sum(values) / len(values)\n",
+        args=([],),
+        expected=0.0,
+        hint="Handle an empty list.",
+        # Deliberately wrong: scores as a false fix.
+        fix="def average(values):\n    return None\n",
+    ),
+    Scenario(
+        name="drift_renamed_key",
+        kind="drift",
+        function="order_total",
+        source=(
+            "@healing_agent\n"
+            "def order_total(order):\n"
+            "    return order['amount'] * order['quantity']\n"
+        ),
+        args=({"total_amount": 5, "quantity": 2},),
+        expected=10,
+        hint="The 'amount' field was renamed to 'total_amount'.",
+        fix=(
+            "def order_total(order):\n"
+            "    amount = order.get('amount', order.get('total_amount'))\n"
+            "    return amount * order['quantity']\n"
+        ),
+    ),
+    Scenario(
+        name="drift_string_price",
+        kind="drift",
+        function="gross_price",
+        source=(
+            "@healing_agent\n"
+            "def gross_price(record):\n"
+            "    return round(record['price'] * 1.1, 2)\n"
+        ),
+        args=({"price": "10.00"},),
+        expected=11.0,
+        hint="The price now arrives as a string; convert it to a number.",
+        fix=(
+            "def gross_price(record):\n"
+            "    return round(float(record['price']) * 1.1, 2)\n"
+        ),
+    ),
+    Scenario(
+        name="drift_json_trailing_comma",
+        kind="drift",
+        function="load_settings",
+        source=(
+            "@healing_agent\n"
+            "def load_settings(text):\n"
+            "    import json\n"
+            "    return json.loads(text)\n"
+        ),
+        args=('{"retries": 3,}',),
+        expected={"retries": 3},
+        hint="The settings JSON now has a trailing comma.",
+        fix=(
+            "def load_settings(text):\n"
+            "    import json, re\n"
+            "    return json.loads(re.sub(r',\\s*([}\\]])', r'\\1', text))\n"
+        ),
+    ),
+]
+
+
+def _percentiles(values: Sequence[float], scale: float = 1.0) -> Dict[str, float]:
+    """Nearest-rank percentiles of ``values``, multiplied by ``scale``."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {}
+    for percentile in PERCENTILES:
+        rank = max(1, -(-percentile * len(ordered) // 100))
+        result[f"p{percentile}"] = round(ordered[rank - 1] * scale, 3)
+    return result
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _write_config(
+    workdir: Path, provider: str, stand_in: StandInProvider, extra: Dict[str, Any]
+) -> Path:
+    template = Path(__file__).with_name("config_template.py").read_text(encoding="utf-8")
+    overrides = {
+        "AI_PROVIDER": provider,
+        provider.upper(): stand_in.provider_config(provider),
+        "MAX_ATTEMPTS": 1,
+        "HEALING_MODE": "blocking",
+        "RELOAD_MODE": "hotpatch",
+        "LOG_LEVEL": "WARNING",
+        "METRICS_SINKS": ["memory"],
+        # Every iteration repeats the same failures on purpose.
+        "CIRCUIT_BREAKER_THRESHOLD": None,
+        "FINGERPRINT_INDEX": False,
+        **extra,
+    }
+    lines = [template, "\n# healing-agent bench overrides\n"]
+    lines += [f"{name} = {value!r}\n" for name, value in overrides.items()]
+    config_path = workdir / "healing_agent_config.py"
+    config_path.write_text("".join(lines), encoding="utf-8")
+    return config_path
+
+
+def _run_scenario(scenario: Scenario, directory: Path, module_name: str) -> str:
+    path = directory / f"{module_name}.py"
+    path.write_text(_PREAMBLE + scenario.source, encoding="utf-8")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+        try:
+            result = getattr(module, scenario.function)(*scenario.args)
+        except Exception:
+            return "failed"
+        return "healed" if result == scenario.expected else "false_fix"
+    finally:
+        sys.modules.pop(module_name, None)
+
+
+def run_bench(
+    iterations: int = 5,
+    provider: str = "ollama",
+    scenarios: Optional[Sequence[str]] = None,
+    latency: float = 0.0,
+    workdir: Optional[str] = None,
+    trace_memory: bool = True,
+    responses: Optional[Dict[str, Dict[str, str]]] = None,
+    cassette: Optional[str] = None,
+    cassette_mode: str = "off",
+    cassette_latency: Any = None,
+) -> Dict[str, Any]:
+    """
+    Heal every selected scenario ``iterations`` times and report the results.
+
+    Args:
+        iterations (int): Runs per scenario.
+        provider (str): Wire format the stand-in is reached through.
+        scenarios (list, optional): Scenario names; all of ``CORPUS`` by default.
+        latency (float): Simulated provider latency per request, in seconds.
+        workdir (str, optional): Where scenario modules and artifacts are
+            written; a temporary directory by default.
+        trace_memory (bool): Measure per-heal allocation peaks with tracemalloc
+            (slows heals down noticeably).
+        responses (dict, optional): Scripted responses overriding the corpus
+            ones, keyed by function name.
+        cassette (str, optional): Cassette file to record to or replay from.
+        cassette_mode (str): ``"off"``, ``"record"`` or ``"replay"``. When
+            set, the default workdir is a fixed temporary path so that
+            replayed prompts match the recorded ones.
+        cassette_latency: Replay delay: seconds, ``"recorded"`` or None.
+
+    Returns:
+        dict: The JSON-serializable report.
+    """
+    selected = [s for s in CORPUS if not scenarios or s.name in scenarios]
+    unknown = set(scenarios or ()) - {s.name for s in CORPUS}
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+    script = {s.function: {"hint": s.hint, "fix": s.fix} for s in selected}
+    script.update(responses or {})
+
+    extra: Dict[str, Any] = {}
+    if cassette_mode != "off":
+        extra = {
+            "CASSETTE_MODE": cassette_mode,
+            "CASSETTE_PATH": cassette,
+            "CASSETTE_LATENCY": cassette_latency,
+        }
+        if workdir is None:
+            workdir = os.path.join(tempfile.gettempdir(), "healing-agent-bench")
+            shutil.rmtree(workdir, ignore_errors=True)
+        cassettes.reset()
+
+    with tempfile.TemporaryDirectory(prefix="healing-agent-bench-") as scratch:
+        root = Path(workdir or scratch)
+        root.mkdir(parents=True, exist_ok=True)
+        registry = metrics.get_registry()
+        registry.reset()
+        keep_last = registry.keep_last
+        registry.keep_last = len(selected) * iterations
+        previous_config = os.environ.get("HEALING_AGENT_CONFIG")
+        outcomes: Dict[str, Dict[str, int]] = {s.name: {} for s in selected}
+        latencies: List[float] = []
+        memory_peaks: List[int] = []
+        with StandInProvider(script, latency=latency) as stand_in:
+            os.environ["HEALING_AGENT_CONFIG"] = str(_write_config(root, provider, stand_in, extra))
+            if trace_memory:
+                tracemalloc.start()
+            started = time.perf_counter()
+            try:
+                for iteration in range(iterations):
+                    for scenario in selected:
+                        if trace_memory:
+                            tracemalloc.reset_peak()
+                        heal_started = time.perf_counter()
+                        outcome = _run_scenario(
+                            scenario, root, f"bench_{scenario.name}_{iteration}"
+                        )
+                        latencies.append(time.perf_counter() - heal_started)
+                        if trace_memory:
+                            memory_peaks.append(tracemalloc.get_traced_memory()[1])
+                        counts = outcomes[scenario.name]
+                        counts[outcome] = counts.get(outcome, 0) + 1
+                elapsed = time.perf_counter() - started
+            finally:
+                if trace_memory:
+                    tracemalloc.stop()
+                if previous_config is None:
+                    os.environ.pop("HEALING_AGENT_CONFIG", None)
+                else:
+                    os.environ["HEALING_AGENT_CONFIG"] = previous_config
+                registry.keep_last = keep_last
+            provider_requests = dict(stand_in.requests)
+
+    stage_samples: Dict[str, List[float]] = {}
+    for heal in registry.snapshot()["recent"]:
+        for stage, seconds in heal["stages"].items():
+            stage_samples.setdefault(stage, []).append(seconds)
+    totals = {"healed": 0, "false_fix": 0, "failed": 0}
+    for counts in outcomes.values():
+        for outcome, count in counts.items():
+            totals[outcome] += count
+    runs = sum(totals.values())
+    return {
+        "provider": provider,
+        "cassette_mode": cassette_mode,
+        "iterations": iterations,
+        "runs": runs,
+        "elapsed_seconds": round(elapsed, 4),
+        "heals_per_second": round(runs / elapsed, 2) if elapsed else None,
+        "success_rate": round(totals["healed"] / runs, 4) if runs else None,
+        "false_fix_rate": round(totals["false_fix"] / runs, 4) if runs else None,
+        "outcomes": totals,
+        "scenarios": outcomes,
+        "heal_latency_ms": _percentiles(latencies, 1000),
+        "stage_latency_ms": {
+            stage: _percentiles(samples, 1000)
+            for stage, samples in sorted(stage_samples.items())
+        },
+        "memory": {
+            "heal_peak_bytes": _percentiles(memory_peaks),
+            "max_heal_peak_bytes": max(memory_peaks) if memory_peaks else None,
+            "process_peak_rss_bytes": _peak_rss_bytes(),
+        },
+        "counters": registry.snapshot()["counters"],
+        "provider_requests": provider_requests,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a ``run_bench`` report as a short text table."""
+    outcomes = report["outcomes"]
+    lines = [
+        f"{report['runs']} heal(s) via {report['provider']} in "
+        f"{report['elapsed_seconds']}s ({report['heals_per_second']} heals/s)",
+        f"healed {outcomes['healed']}, false fixes {outcomes['false_fix']}, "
+        f"failed {outcomes['failed']} (success rate {report['success_rate']}, "
+        f"false-fix rate {report['false_fix_rate']})",
+        "",
+        f"{'latency (ms)':<16}{'p50':>10}{'p95':>10}{'p99':>10}",
+    ]
+    rows = [("heal", report["heal_latency_ms"])] + list(report["stage_latency_ms"].items())
+    for name, percentiles in rows:
+        lines.append(
+            f"{name:<16}"
+            + "".join(f"{percentiles.get(f'p{p}', '-'):>10}" for p in PERCENTILES)
+        )
+    memory = report["memory"]
+    if memory["max_heal_peak_bytes"] is not None:
+        lines.append("")
+        lines.append(
+            f"tracemalloc peak per heal: p50 {memory['heal_peak_bytes']['p50']:.0f} B, "
+            f"max {memory['max_heal_peak_bytes']} B"
+        )
+    if memory["process_peak_rss_bytes"] is not None:
+        lines.append(f"process peak RSS: {memory['process_peak_rss_bytes']} B")
+    return "\n".join(lines)
@@ -0,0 +1,207 @@
+"""Record and replay provider traffic.
+
+With ``CASSETTE_MODE = "record"`` every provider response is appended to a
+cassette, keyed by ``(prompt hash, role, provider, model)``; the prompt hash
+covers the system prompt and the prompt.  With ``"replay"`` those responses
+are served from the cassette without contacting the provider, after an
+optional simulated latency, so benchmarks and drift tests run offline and
+prompt or compaction changes can be compared against identical model output.
+
+A cassette is a JSON Lines file, gzip-compressed when its name ends in
+``.gz``.  Each line holds the key fields, the response, the token usage seen
+while recording and the live call's duration.  A key recorded more than once
+is replayed in recorded order, the last response repeating once exhausted.
+A replayed prompt that was never recorded raises ``CassetteMiss``.
+
+Prompts include module names and file paths, so exact matching needs the
+recorded code at the same location.  ``CASSETTE_MATCH = "sequence"`` ignores
+the prompt and serves each ``(role, provider, model)`` its responses in
+recorded order instead, which replays runs from temporary directories and
+lets a changed prompt be compared against the outputs recorded for the old.
+
+``HEALING_AGENT_CASSETTE_MODE``, ``HEALING_AGENT_CASSETTE`` and
+``HEALING_AGENT_CASSETTE_MATCH`` override ``CASSETTE_MODE``,
+``CASSETTE_PATH`` and ``CASSETTE_MATCH``, so a test run can switch to replay
+without editing the config file.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, List, Tuple
+
+from . import agent_logging, metrics
+
+logger = agent_logging.get_logger(__name__)
+
+DEFAULT_CASSETTE_PATH = Path.home() / ".healing_agent" / "cassette.jsonl.gz"
+MODES = ("off", "record", "replay")
+MATCHES = ("exact", "sequence")
+
+Key = Tuple[str, str, str, str]
+
+
+class CassetteMiss(LookupError):
+    """A replayed request has no recorded response."""
+
+
+def prompt_hash(system_prompt: str, prompt: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(system_prompt.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def settings(config: Dict[str, Any]) -> Tuple[str, Path, str]:
+    """``(mode, path, match)`` from the config and environment overrides."""
+    mode = os.environ.get("HEALING_AGENT_CASSETTE_MODE") or config.get("CASSETTE_MODE") or "off"
+    path = os.environ.get("HEALING_AGENT_CASSETTE") or config.get("CASSETTE_PATH")
+    match = os.environ.get("HEALING_AGENT_CASSETTE_MATCH") or config.get("CASSETTE_MATCH") or "exact"
+    return (
+        str(mode).lower(),
+        Path(path or DEFAULT_CASSETTE_PATH).expanduser(),
+        str(match).lower(),
+    )
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _usage() -> Tuple[float, float]:
+    recorder = metrics.current()
+    if not recorder.enabled:
+        return 0, 0
+    counters = recorder.counters
+    return counters.get("prompt_tokens", 0), counters.get("completion_tokens", 0)
+
+
+class Cassette:
+    """The recorded responses of one cassette file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[Key, List[Dict[str, Any]]] = defaultdict(list)
+        self.sequences: Dict[Tuple[str, ...], List[Dict[str, Any]]] = defaultdict(list)
+        self._cursor: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        if path.exists():
+            with _open(path, "r") as cassette_file:
+                for line in cassette_file:
+                    if line.strip():
+                        self._add(json.loads(line))
+
+    def _add(self, entry: Dict[str, Any]) -> None:
+        key = (entry["prompt"], entry["role"], entry["provider"], entry["model"])
+        self.entries[key].append(entry)
+        self.sequences[key[1:]].append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.entries.values())
+
+    def rewind(self) -> None:
+        """Replay every key from its first recorded response again."""
+        with self._lock:
+            self._cursor.clear()
+
+    def record(self, key: Key, live: Callable[[], str]) -> str:
+        """Call the provider and append its response to the cassette."""
+        prompt_tokens, completion_tokens = _usage()
+        started = time.monotonic()
+        response = live()
+        seconds = time.monotonic() - started
+        after_prompt, after_completion = _usage()
+        entry = dict(zip(("prompt", "role", "provider", "model"), key))
+        entry.update(
+            response=response,
+            usage=[after_prompt - prompt_tokens, after_completion - completion_tokens],
+            seconds=round(seconds, 6),
+        )
+        with self._lock:
+            self._add(entry)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with _open(self.path, "a") as cassette_file:
+                cassette_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        logger.debug("Recorded %s response from %s/%s to %s", key[1], key[2], key[3], self.path)
+        return response
+
+    def replay(self, key: Key, latency: Any = None, match: str = "exact") -> str:
+        """The next recorded response for ``key``, after the simulated latency."""
+        with self._lock:
+            if match == "sequence":
+                lookup = key[1:]
+                entries = self.sequences.get(lookup)
+                index = self._cursor[lookup]
+                if not entries or index >= len(entries):
+                    raise CassetteMiss(
+                        f"No recorded {key[1]} response from {key[2]}/{key[3]} left "
+                        f"(request {index + 1}) in {self.path}"
+                    )
+            else:
+                lookup = key
+                entries = self.entries.get(key)
+                index = self._cursor[lookup]
+                if not entries:
+                    raise CassetteMiss(
+                        f"No recorded {key[1]} response from {key[2]}/{key[3]} for prompt "
+                        f"{key[0][:12]} in {self.path}"
+                    )
+            self._cursor[lookup] = index + 1
+        entry = entries[min(index, len(entries) - 1)]
+        delay = entry.get("seconds", 0) if latency == "recorded" else latency
+        if delay:
+            time.sleep(delay)
+        metrics.record_tokens(*(entry.get("usage") or (None, None)))
+        logger.debug("Replayed %s response %d for %s/%s", key[1], index + 1, key[2], key[3])
+        return entry["response"]
+
+
+_cassettes: Dict[Path, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: Path) -> Cassette:
+    """The shared ``Cassette`` for ``path``, loaded on first use."""
+    path = Path(path).expanduser()
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = _cassettes[path] = Cassette(path)
+    return cassette
+
+
+def reset() -> None:
+    """Forget loaded cassettes, so the next use re-reads them from disk."""
+    with _cassettes_lock:
+        _cassettes.clear()
+
+
+def play(
+    config: Dict[str, Any],
+    provider: str,
+    model: str,
+    role: str,
+    system_prompt: str,
+    prompt: str,
+    live: Callable[[], str],
+) -> str:
+    """Answer one provider request according to the cassette settings."""
+    mode, path, match = settings(config)
+    if mode == "off":
+        return live()
+    key = (prompt_hash(system_prompt, prompt), role, provider, model)
+    if mode == "record":
+        return get_cassette(path).record(key, live)
+    if mode == "replay":
+        return get_cassette(path).replay(key, config.get("CASSETTE_LATENCY"), match)
+    raise ValueError(f"CASSETTE_MODE must be one of: {', '.join(MODES)}")
@@ -0,0 +1,160 @@
+"""Error-storm protection for the healing wrapper.
+
+When a dependency dies, every call to a decorated function fails at once.
+Healing each failure floods the provider and the artifact directories, so
+failures are keyed by function and error fingerprint and pass two gates
+before any capture work happens:
+
+* a circuit breaker per key: after ``CIRCUIT_BREAKER_THRESHOLD`` failures
+  within ``CIRCUIT_BREAKER_WINDOW`` seconds it opens, and further failures
+  re-raise instantly.  After ``CIRCUIT_BREAKER_COOLDOWN`` seconds one failure
+  is let through as a half-open probe; a successful heal closes the breaker,
+  anything else re-opens it;
+* deterministic samplers: ``OBSERVATION_SAMPLE_RATE`` decides which failures
+  are captured at all and ``REPAIR_SAMPLE_RATE`` which captured failures are
+  also repaired.  A rate of ``0.1`` admits the first failure of a key and
+  then every tenth, so behavior is reproducible rather than random.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Optional
+
+from . import agent_logging
+
+logger = agent_logging.get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class _BreakerState:
+    state: str = CLOSED
+    failures: Deque[float] = field(default_factory=deque)
+    open_until: float = 0.0
+
+
+class CircuitBreaker:
+    """Per-key closed/open/half-open breaker over a sliding failure window."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._states: Dict[str, _BreakerState] = {}
+        self._lock = threading.Lock()
+
+    def state(self, key: str) -> str:
+        with self._lock:
+            entry = self._states.get(key)
+            return entry.state if entry else CLOSED
+
+    def is_open(self, key: str) -> bool:
+        """Cheap pre-check: True while ``key`` is open and cooling down."""
+        entry = self._states.get(key)
+        if entry is None:
+            return False
+        if entry.state == HALF_OPEN:
+            return True
+        return entry.state == OPEN and self._clock() < entry.open_until
+
+    def allow(self, key: str, threshold: int, window: float, cooldown: float) -> bool:
+        """Record one failure for ``key`` and report whether it may proceed."""
+        now = self._clock()
+        with self._lock:
+            entry = self._states.setdefault(key, _BreakerState())
+            if entry.state == HALF_OPEN:
+                return False  # a probe is already in flight
+            if entry.state == OPEN:
+                if now < entry.open_until:
+                    return False
+                entry.state = HALF_OPEN
+                return True
+            entry.failures.append(now)
+            while entry.failures and entry.failures[0] <= now - window:
+                entry.failures.popleft()
+            if len(entry.failures) > threshold:
+                entry.state = OPEN
+                entry.open_until = now + cooldown
+                entry.failures.clear()
+                logger.warning(
+                    "Circuit opened for %s: more than %s failures in %ss; "
+                    "healing paused for %ss",
+                    key,
+                    threshold,
+                    window,
+                    cooldown,
+                )
+                return False
+            return True
+
+    def record_result(self, key: str, healed: bool, cooldown: float) -> None:
+        """Close the breaker after a successful heal; re-open a failed probe."""
+        with self._lock:
+            entry = self._states.get(key)
+            if entry is None:
+                return
+            if healed:
+                self._states.pop(key, None)
+            elif entry.state == HALF_OPEN:
+                entry.state = OPEN
+                entry.open_until = self._clock() + cooldown
+
+
+class DeterministicSampler:
+    """Admit a fixed fraction of events per key: the first, then every 1/rate-th."""
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def sample(self, key: str, rate: float) -> bool:
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        with self._lock:
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+        return math.ceil(count * rate - 1e-9) > math.ceil((count - 1) * rate - 1e-9)
+
+
+class StormGuard:
+    """The breaker and both samplers, configured from a healing config."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.breaker = CircuitBreaker(clock)
+        self._observation = DeterministicSampler()
+        self._repair = DeterministicSampler()
+
+    def is_open(self, key: str) -> bool:
+        return self.breaker.is_open(key)
+
+    def admit(self, key: str, config: dict) -> bool:
+        """Count the failure and decide whether it is captured at all."""
+        threshold: Optional[int] = config.get("CIRCUIT_BREAKER_THRESHOLD")
+        cooldown = config.get("CIRCUIT_BREAKER_COOLDOWN", 300)
+        if threshold and not self.breaker.allow(
+            key,
+            threshold,
+            config.get("CIRCUIT_BREAKER_WINDOW", 60),
+            cooldown,
+        ):
+            return False
+        if self._observation.sample(key, config.get("OBSERVATION_SAMPLE_RATE", 1.0)):
+            return True
+        # A half-open probe that is sampled out never reaches record_result:
+        # re-open the breaker so the next cooldown can probe again.
+        self.breaker.record_result(key, False, cooldown)
+        return False
+
+    def sample_repair(self, key: str, config: dict) -> bool:
+        return self._repair.sample(key, config.get("REPAIR_SAMPLE_RATE", 1.0))
+
+    def record_result(self, key: str, healed: bool, config: dict) -> None:
+        self.breaker.record_result(key, healed, config.get("CIRCUIT_BREAKER_COOLDOWN", 300))
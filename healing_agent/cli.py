@@ -0,0 +1,241 @@
+"""Command-line interface: ``healing-agent <command>``.
+
+Commands:
+    worker    Drain the durable heal queue and write fixes as Git patches.
+    contexts  List the failure contexts in a bundle, or print one of them.
+    prune     Apply ARTIFACT_RETENTION to the artifact directories under a root.
+    rollback  List a file's stored backups or restore one of them.
+    bench     Heal a corpus of failures against a local stand-in provider.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+
+def _worker(arguments: argparse.Namespace) -> int:
+    from .agent_logging import configure
+    from .config_loader import load_config
+    from .heal_queue import HealQueue
+    from .heal_worker import run_worker
+
+    config, config_path = load_config(arguments.config)
+    configure(config)
+    queue = HealQueue(arguments.queue or config.get("HEAL_QUEUE_DIR"))
+    print(f"♣ Healer worker using {config_path}, draining {queue.directory}")
+    try:
+        claimed = run_worker(
+            queue,
+            config,
+            concurrency=arguments.concurrency,
+            rate_limit=arguments.rate_limit,
+            once=arguments.once,
+            poll_interval=arguments.poll_interval,
+            max_attempts=arguments.max_attempts,
+            retry_backoff=arguments.retry_backoff,
+        )
+    except KeyboardInterrupt:
+        print("♣ Healer worker stopped")
+        return 0
+    print(f"♣ Healer worker processed {claimed} job(s)")
+    return 0
+
+
+def _contexts(arguments: argparse.Namespace) -> int:
+    from .context_bundle import iter_index, read_context
+
+    if arguments.heal_id:
+        context = read_context(arguments.bundle, arguments.heal_id)
+        if context is None:
+            print(f"♣ No single context matches {arguments.heal_id}", file=sys.stderr)
+            return 1
+        print(json.dumps(context, indent=2, ensure_ascii=False))
+        return 0
+    for entry in iter_index(arguments.bundle):
+        print(
+            f"{entry['heal_id']}  {entry.get('timestamp') or '-'}  "
+            f"{entry.get('error_type') or '-'}  {entry.get('function') or '-'}"
+        )
+    return 0
+
+
+def _prune(arguments: argparse.Namespace) -> int:
+    from .artifact_retention import prune
+    from .config_loader import load_config
+
+    config, _ = load_config(arguments.config)
+    if not config.get("ARTIFACT_RETENTION"):
+        print("♣ ARTIFACT_RETENTION is not configured; nothing to prune")
+        return 0
+    evicted = prune(arguments.root, config)
+    for directory, names in evicted.items():
+        print(f"♣ {directory}: evicted {len(names)} file(s)")
+    print(f"♣ Pruned {sum(len(names) for names in evicted.values())} file(s)")
+    return 0
+
+
+def _rollback(arguments: argparse.Namespace) -> int:
+    from .backup_store import BackupStore
+
+    store = BackupStore.for_source(arguments.file)
+    if arguments.list:
+        for entry in store.entries(arguments.file):
+            print(f"{entry['sha256'][:12]}  {entry['time']}  {entry.get('heal_id') or '-'}")
+        return 0
+    try:
+        entry = store.restore(arguments.file, arguments.ref, arguments.before)
+    except LookupError as error:
+        print(f"♣ {error}", file=sys.stderr)
+        return 1
+    print(f"♣ Restored {arguments.file} to {entry['sha256'][:12]} from {entry['time']}")
+    return 0
+
+
+def _replay_latency(value: str) -> object:
+    return value if value == "recorded" else float(value)
+
+
+def _bench(arguments: argparse.Namespace) -> int:
+    from .bench import format_report, run_bench
+
+    responses = None
+    if arguments.responses:
+        with open(arguments.responses, "r", encoding="utf-8") as responses_file:
+            responses = json.load(responses_file)
+    try:
+        report = run_bench(
+            iterations=arguments.iterations,
+            provider=arguments.provider,
+            scenarios=arguments.scenario,
+            latency=arguments.latency,
+            workdir=arguments.workdir,
+            trace_memory=not arguments.no_tracemalloc,
+            responses=responses,
+            cassette=arguments.record or arguments.replay,
+            cassette_mode="record" if arguments.record else "replay" if arguments.replay else "off",
+            cassette_latency=arguments.replay_latency,
+        )
+    except ValueError as error:
+        print(f"♣ {error}", file=sys.stderr)
+        return 2
+    print(format_report(report))
+    if arguments.json:
+        with open(arguments.json, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+    failed = []
+    if arguments.min_success_rate is not None and report["success_rate"] < arguments.min_success_rate:
+        failed.append(f"success rate {report['success_rate']} < {arguments.min_success_rate}")
+    if arguments.max_false_fix_rate is not None and report["false_fix_rate"] > arguments.max_false_fix_rate:
+        failed.append(f"false-fix rate {report['false_fix_rate']} > {arguments.max_false_fix_rate}")
+    for message in failed:
+        print(f"♣ Bench threshold failed: {message}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="healing-agent", description="Healing Agent command-line tools"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker = commands.add_parser(
+        "worker", help="drain the heal queue and write fixes as patches"
+    )
+    worker.add_argument("--config", help="path to healing_agent_config.py")
+    worker.add_argument("--queue", help="queue directory (default: HEAL_QUEUE_DIR)")
+    worker.add_argument("--concurrency", type=int, default=1, help="parallel heal jobs")
+    worker.add_argument(
+        "--rate-limit", type=float, help="maximum heal jobs started per minute"
+    )
+    worker.add_argument(
+        "--poll-interval", type=float, default=2.0, help="seconds between empty polls"
+    )
+    worker.add_argument(
+        "--max-attempts", type=int, default=3, help="attempts before a job fails"
+    )
+    worker.add_argument(
+        "--retry-backoff",
+        type=float,
+        default=30.0,
+        help="seconds before the first retry of a failed job (doubles per attempt)",
+    )
+    worker.add_argument(
+        "--once", action="store_true", help="exit when the queue is empty"
+    )
+    worker.set_defaults(handler=_worker)
+
+    contexts = commands.add_parser(
+        "contexts", help="list or show failure contexts saved in a bundle"
+    )
+    contexts.add_argument("bundle", help="bundle directory (CONTEXT_FORMAT=\"bundle\")")
+    contexts.add_argument(
+        "heal_id", nargs="?", help="print this context (a unique prefix is enough)"
+    )
+    contexts.set_defaults(handler=_contexts)
+
+    prune = commands.add_parser(
+        "prune", help="apply artifact retention limits under a directory"
+    )
+    prune.add_argument("root", nargs="?", default=".", help="directory to search (default: .)")
+    prune.add_argument("--config", help="path to healing_agent_config.py")
+    prune.set_defaults(handler=_prune)
+
+    rollback = commands.add_parser(
+        "rollback", help="restore a source file from the backup store"
+    )
+    rollback.add_argument("file", help="source file to restore")
+    rollback.add_argument(
+        "ref", nargs="?", help="heal id or digest prefix (default: latest backup)"
+    )
+    rollback.add_argument("--before", help="restore the last backup before this ISO time")
+    rollback.add_argument("--list", action="store_true", help="list backups instead")
+    rollback.set_defaults(handler=_rollback)
+
+    bench = commands.add_parser(
+        "bench", help="heal a corpus of failures against a local stand-in provider"
+    )
+    bench.add_argument("--iterations", type=int, default=5, help="runs per scenario")
+    bench.add_argument(
+        "--provider",
+        choices=["ollama", "openai", "azure", "anthropic"],
+        default="ollama",
+        help="wire format used to reach the stand-in (default: ollama)",
+    )
+    bench.add_argument(
+        "--scenario", action="append", help="run only this scenario (repeatable)"
+    )
+    bench.add_argument(
+        "--latency", type=float, default=0.0, help="simulated provider latency in seconds"
+    )
+    bench.add_argument(
+        "--responses", help="JSON file of scripted {function: {hint, fix}} responses"
+    )
+    cassette = bench.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="CASSETTE", help="record provider responses here")
+    cassette.add_argument("--replay", metavar="CASSETTE", help="replay recorded responses offline")
+    bench.add_argument(
+        "--replay-latency",
+        type=_replay_latency,
+        help="delay per replayed response: seconds or 'recorded'",
+    )
+    bench.add_argument("--workdir", help="keep scenario modules and artifacts here")
+    bench.add_argument("--json", help="also write the report to this file")
+    bench.add_argument(
+        "--no-tracemalloc", action="store_true", help="skip per-heal allocation peaks"
+    )
+    bench.add_argument("--min-success-rate", type=float, help="exit 1 below this rate")
+    bench.add_argument("--max-false-fix-rate", type=float, help="exit 1 above this rate")
+    bench.set_defaults(handler=_bench)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arguments = build_parser().parse_args(argv)
+    return arguments.handler(arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,82 @@
 import os
 import shutil
 from datetime import datetime
-from typing import Optional
+from functools import partial
+from typing import Callable, Optional, Tuple
 
-def create_backup(context: dict) -> Optional[str]:
+from . import agent_logging
+from .atomic_io import atomic_write_bytes
+from .backup_store import BackupStore
+
+logger = agent_logging.get_logger(__name__)
+
+
+def backup_path_for(context: dict) -> str:
+    """
+    Choose the backup path for the failing source file.
+
+    Args:
+        context: Captured context; ``context['error']['file']`` is backed up
+
+    Returns:
+        str: Path in the ``_healing_agent_backups`` folder next to the file
+    """
+    backup_folder = os.path.join(os.path.dirname(context['error']['file']), '_healing_agent_backups')
+    os.makedirs(backup_folder, exist_ok=True)
+
+    # Generate backup filename with timestamp (microseconds avoid collisions)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    file_name = os.path.basename(context['error']['file'])
+    file_name = file_name.replace('.py', '')
+    backup_name = f"{file_name}.{timestamp}.py"
+    return os.path.join(backup_folder, backup_name)
+
+def write_backup(backup_path: str, source: bytes) -> str:
+    """
+    Write a source snapshot taken before the fix was applied.
+    """
+    atomic_write_bytes(backup_path, source)
+    return backup_path
+
+def prepare_backup(context: dict, config: Optional[dict] = None) -> Tuple[str, Callable[[], str]]:
+    """
+    Snapshot the source file now and return where its backup will live plus
+    a callable that writes it, so the write itself can be deferred.
+
+    With BACKUP_FORMAT="store" the backup goes into the content-addressed
+    store; otherwise it is a timestamped copy.
+    """
+    source_file = context['error']['file']
+    with open(source_file, 'rb') as f:
+        snapshot = f.read()
+
+    if (config or {}).get('BACKUP_FORMAT', 'copy') == 'store':
+        store = BackupStore.for_source(
+            source_file, compress_objects=(config or {}).get('BACKUP_COMPRESSION', True)
+        )
+        location = str(store.object_path(store.digest(snapshot)))
+        return location, partial(store.put, source_file, snapshot, context.get('heal_id'))
+
+    location = backup_path_for(context)
+    return location, partial(write_backup, location, snapshot)
+
+def create_backup(context: dict, config: Optional[dict] = None) -> Optional[str]:
     """
     Creates a backup of the source file before applying fixes.
     
     Args:
-        file_path: Path to the file that needs to be backed up
-        config: Configuration dictionary containing backup settings
+        context: Captured context; ``context['error']['file']`` is backed up
         
     Returns:
         Optional[str]: Path to the backup file, or None if backup failed
     """
 
     try:
-        backup_folder = os.path.join(os.path.dirname(context['error']['file']), '_healing_agent_backups')
-        os.makedirs(backup_folder, exist_ok=True)
-        
-        # Generate backup filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_name = os.path.basename(context['error']['file'])
-        file_name = file_name.replace('.py', '')
-        backup_name = f"{file_name}.{timestamp}.py"
-        backup_path = os.path.join(backup_folder, backup_name)
+        if (config or {}).get('BACKUP_FORMAT', 'copy') == 'store':
+            _, write = prepare_backup(context, config)
+            return write()
+
+        backup_path = backup_path_for(context)
         
         # Create the backup
         shutil.copy2(context['error']['file'], backup_path)
@@ -32,5 +84,5 @@ def create_backup(context: dict) -> Optional[str]:
         return backup_path
         
     except Exception as e:
-        print(f"⚠ Warning: Failed to create backup: {str(e)}")
-        return None
\ No newline at end of file
+        logger.warning("Failed to create backup: %s", e)
+        return None
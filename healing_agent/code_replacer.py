@@ -1,6 +1,36 @@
 import ast
 from typing import Dict, List, Optional, Tuple
 
+from . import agent_logging
+from .ast_cache import parse_source
+from .atomic_io import atomic_write_text, locked_directory
+
+logger = agent_logging.get_logger(__name__)
+
+
+def write_source(file_path: str, new_source: str) -> bool:
+    """
+    Atomically replace a source file, skipping the write if nothing changed.
+
+    The new content goes to a temporary file in the same directory, is
+    fsynced and moved into place, so a concurrent importer sees either the
+    old or the new module, never a truncated one. Callers that read the file
+    first should hold ``locked_directory(file_path)`` around both steps.
+
+    Returns:
+        bool: True if the file was written, False if it already had this content.
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            current = file.read()
+    except FileNotFoundError:
+        current = None
+    encoded = new_source.encode('utf-8')
+    if current == encoded:
+        return False  # unchanged: keep the mtime and the cached bytecode
+    atomic_write_text(file_path, new_source, sync_directory=True)
+    return True
+
 def decorator_checker(file_path: str) -> bool:
     """
     Checks and corrects healing_agent decorator usage in Python files.
@@ -44,12 +74,12 @@ def decorator_checker(file_path: str) -> bool:
                     if decorator_count > 1:
                         changes_needed = True
                         function_data.append((start_line, end_line, False, node.name))
-                        print(f"♣ Function {node.name} has multiple healing_agent decorators")
+                        logger.warning("Function %s has multiple healing_agent decorators", node.name)
                     # No healing_agent decorator found
                     elif decorator_count == 0:
                         changes_needed = True
                         function_data.append((start_line, end_line, True, node.name))
-                        print(f"♣ Function {node.name} missing healing_agent decorator")
+                        logger.warning("Function %s missing healing_agent decorator", node.name)
                     # Exactly one healing_agent decorator - no change needed
                     else:
                         function_data.append((start_line, end_line, False, node.name))
@@ -57,10 +87,10 @@ def decorator_checker(file_path: str) -> bool:
                     # No decorators at all
                     changes_needed = True
                     function_data.append((start_line, end_line, True, node.name))
-                    print(f"♣ Function {node.name} missing healing_agent decorator")
+                    logger.warning("Function %s missing healing_agent decorator", node.name)
         
         if not changes_needed:
-            print("♣ All functions have correct healing_agent decorator usage")
+            logger.info("All functions have correct healing_agent decorator usage")
             return False
             
         # Second pass - make corrections
@@ -88,87 +118,214 @@ def decorator_checker(file_path: str) -> bool:
             i += 1
             
         # Write back the corrected content
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(new_lines))
+        write_source(file_path, '\n'.join(new_lines))
             
-        print("♣ Successfully updated healing_agent decorators")
+        logger.info("Successfully updated healing_agent decorators")
         return True
         
     except Exception as e:
-        print(f"♣ Error checking/correcting decorators: {str(e)}")
+        logger.warning("Error checking/correcting decorators: %s", e)
         return False
 
-def build_replacement_source(
-    context: Dict, fixed_code: str
-) -> Optional[Tuple[str, str]]:
-    """Build the smallest source-file replacement without writing it."""
-    file_path = context['error']['file']
-    function_name = context['function_info']['name']
+def apply_line_edits(
+    source_lines: Dict[int, str], edits: List[Tuple[int, int, List[str]]]
+) -> str:
+    """
+    Apply line-range edits to a captured function and return the new source.
 
-    if not all([file_path, function_name, fixed_code]):
-        print("♣ Missing required parameters for code replacement")
-        return None
+    Args:
+        source_lines (Dict[int, str]): ``function_info['source_lines']``, keyed
+            by absolute file line number (keys may be strings after JSON).
+        edits (List[Tuple[int, int, List[str]]]): ``(start, end, lines)``
+            ranges, inclusive. ``end == start - 1`` inserts before ``start``.
 
-    with open(file_path, 'r', encoding='utf-8') as file:
-        source = file.read()
-    tree = ast.parse(source)
+    Returns:
+        str: The complete edited function definition.
+
+    Raises:
+        ValueError: If a range is outside the function, edits overlap, or the
+            result does not parse as a single function definition.
+    """
+    numbered = sorted((int(number), line) for number, line in source_lines.items())
+    if not numbered:
+        raise ValueError("No captured source lines to edit")
+    first_line = numbered[0][0]
+    last_line = numbered[-1][0]
+    lines = [line for _, line in numbered]
 
+    previous_end = first_line - 1
+    for start, end, _ in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+        if start < first_line or end > last_line or end < start - 1:
+            raise ValueError(
+                f"Edit range {start}-{end} is outside lines {first_line}-{last_line}"
+            )
+        if start <= previous_end:
+            raise ValueError(f"Edit range {start}-{end} overlaps a previous edit")
+        previous_end = max(previous_end, end)
+
+    # Splice bottom-up so earlier line numbers stay valid; at the same start
+    # the replacement goes first so an insertion still lands above it.
+    for start, end, new_lines in sorted(
+        edits, key=lambda edit: (edit[0], edit[1]), reverse=True
+    ):
+        lines[start - first_line : end - first_line + 1] = new_lines
+
+    edited = '\n'.join(lines).rstrip() + '\n'
+    tree = ast.parse(edited)
+    if len(tree.body) != 1 or not isinstance(
+        tree.body[0], (ast.FunctionDef, ast.AsyncFunctionDef)
+    ):
+        raise ValueError("Edited code is not a single function definition")
+    return edited
+
+
+def _parse_fixed_function(function_name: str, fixed_code: str) -> bool:
+    """Check that ``fixed_code`` is exactly one definition of ``function_name``."""
     fixed_tree = ast.parse(fixed_code)
     if len(fixed_tree.body) != 1 or not isinstance(
         fixed_tree.body[0], (ast.FunctionDef, ast.AsyncFunctionDef)
     ):
-        print("♣ Fixed code must contain exactly one function definition")
-        return None
+        logger.warning("Fixed code must contain exactly one function definition")
+        return False
     fixed_function = fixed_tree.body[0]
     if fixed_function.name != function_name:
-        print(
-            f"♣ Fixed function name {fixed_function.name} does not match "
-            f"{function_name}"
+        logger.warning(
+            "Fixed function name %s does not match %s", fixed_function.name, function_name
         )
-        return None
+        return False
+    return True
+
+
+def splice_functions(
+    source: str, file_path: str, fixes: Dict[str, str]
+) -> Optional[str]:
+    """
+    Replace several top-level functions of ``source`` in one pass.
 
+    The module is parsed once, every definition is replaced bottom-up so
+    earlier line numbers stay valid, and the result is compiled once.
+
+    Args:
+        source (str): Current content of the source file.
+        file_path (str): Path used for error messages and compilation.
+        fixes (Dict[str, str]): Function name to its fixed definition.
+
+    Returns:
+        Optional[str]: The new source, or None if a function was not found.
+    """
+    tree = parse_source(source, file_path)
+    functions: Dict[str, ast.AST] = {}
     for node in tree.body:
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and (
-            node.name == function_name
-        ):
-            start_line = min(
-                [node.lineno] + [decorator.lineno for decorator in node.decorator_list]
-            )
-            end_line = node.end_lineno
-            break
-    else:
-        print(f"♣ Could not find function {function_name} in {file_path}")
-        return None
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions.setdefault(node.name, node)
 
     source_lines = source.splitlines(keepends=True)
+    splices = []
+    for function_name, fixed_code in fixes.items():
+        node = functions.get(function_name)
+        if node is None:
+            logger.warning("Could not find function %s in %s", function_name, file_path)
+            return None
+        start_line = min(
+            [node.lineno] + [decorator.lineno for decorator in node.decorator_list]
+        )
 
-    # Preserve the ORIGINAL decorator lines: they may carry arguments such as
-    # @healing_agent(MAX_ATTEMPTS=5) that the generated replacement does not
-    # know about. Drop any healing_agent decorator the generated code brought
-    # along so the original one is not duplicated.
-    original_decorator_lines = source_lines[start_line - 1 : node.lineno - 1]
-    original_has_healing = any(
-        line.strip().startswith('@healing_agent') for line in original_decorator_lines
-    )
-    fixed_lines = fixed_code.rstrip().splitlines()
-    while (
-        original_has_healing
-        and fixed_lines
-        and fixed_lines[0].strip().startswith('@healing_agent')
-    ):
-        fixed_lines.pop(0)
-    replacement = '\n'.join(fixed_lines) + '\n'
-
-    new_source = ''.join(
-        source_lines[: start_line - 1]
-        + original_decorator_lines
-        + [replacement]
-        + source_lines[end_line:]
-    )
+        # Preserve the ORIGINAL decorator lines: they may carry arguments such as
+        # @healing_agent(MAX_ATTEMPTS=5) that the generated replacement does not
+        # know about. Drop any healing_agent decorator the generated code brought
+        # along so the original one is not duplicated.
+        original_decorator_lines = source_lines[start_line - 1 : node.lineno - 1]
+        original_has_healing = any(
+            line.strip().startswith('@healing_agent') for line in original_decorator_lines
+        )
+        fixed_lines = fixed_code.rstrip().splitlines()
+        while (
+            original_has_healing
+            and fixed_lines
+            and fixed_lines[0].strip().startswith('@healing_agent')
+        ):
+            fixed_lines.pop(0)
+        replacement = '\n'.join(fixed_lines) + '\n'
+        splices.append((start_line, node.end_lineno, original_decorator_lines + [replacement]))
+
+    for start_line, end_line, lines in sorted(splices, reverse=True):
+        source_lines[start_line - 1 : end_line] = lines
+    new_source = ''.join(source_lines)
     compile(new_source, file_path, 'exec')
+    return new_source
+
+
+def build_replacement_source(
+    context: Dict, fixed_code: str
+) -> Optional[Tuple[str, str]]:
+    """Build the smallest source-file replacement without writing it."""
+    file_path = context['error']['file']
+    function_name = context['function_info']['name']
+
+    if not all([file_path, function_name, fixed_code]):
+        logger.warning("Missing required parameters for code replacement")
+        return None
+
+    with open(file_path, 'r', encoding='utf-8') as file:
+        source = file.read()
+    if not _parse_fixed_function(function_name, fixed_code):
+        return None
+    new_source = splice_functions(source, file_path, {function_name: fixed_code})
+    if new_source is None:
+        return None
     return source, new_source
 
 
+class RepairBatch:
+    """
+    Pending function replacements for one source file.
+
+    When several functions of a module break together (a schema change hits
+    every loader at once), applying them as a batch costs one read, one
+    parse, one validated splice and one atomic write instead of one of each
+    per function.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.fixes: Dict[str, str] = {}
+
+    def add(self, function_name: str, fixed_code: str) -> bool:
+        """Queue a replacement; False if ``fixed_code`` is not a single definition of it."""
+        try:
+            if not _parse_fixed_function(function_name, fixed_code):
+                return False
+        except SyntaxError as e:
+            logger.warning("Fixed code for %s does not parse: %s", function_name, e)
+            return False
+        self.fixes[function_name] = fixed_code
+        return True
+
+    def apply(self) -> bool:
+        """
+        Splice every queued replacement into the file in a single write.
+
+        Returns:
+            bool: True if the file now contains every replacement.
+
+        Raises:
+            OSError, SyntaxError: If the file cannot be read, written or compiled.
+        """
+        if not self.fixes:
+            return False
+        # Read and write under one lock so concurrent repairs of the same
+        # file each splice into the other's result.
+        with locked_directory(self.file_path):
+            with open(self.file_path, 'r', encoding='utf-8') as file:
+                source = file.read()
+            new_source = splice_functions(source, self.file_path, self.fixes)
+            if new_source is None:
+                return False
+            if not write_source(self.file_path, new_source):
+                logger.info("%s already contains these fixes; not rewriting it", self.file_path)
+        return True
+
+
 def function_replacer(context: Dict, fixed_code: str) -> bool:
     """
     Update the original file with the minimal replacement built from AST lines.
@@ -183,21 +340,15 @@ def function_replacer(context: Dict, fixed_code: str) -> bool:
         bool: True if the update was successful, False otherwise
     """
     try:
-
-        replacement = build_replacement_source(context, fixed_code)
-        if replacement is None:
-            return False
-        _, new_source = replacement
         file_path = context['error']['file']
+        function_name = context['function_info']['name']
+        if not all([file_path, function_name, fixed_code]):
+            logger.warning("Missing required parameters for code replacement")
+            return False
 
-        # Write the updated content back to the file
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.write(new_source)
-
-        return True
+        batch = RepairBatch(file_path)
+        return batch.add(function_name, fixed_code) and batch.apply()
 
     except Exception as e:
-        print(f"♣ Error updating file: {str(e)}")
-        print(f"♣ Error type: {type(e).__name__}")
-        print(f"♣ Error details: {repr(e)}")
+        logger.error("Error updating file: %s (%s)", e, type(e).__name__)
         return False
@@ -0,0 +1,38 @@
+"""Codec-tagged compression shared by context bundles and the backup store.
+
+zstd is used when the optional ``zstandard`` package is installed and zlib
+otherwise.  The codec id travels with the data, so readers handle records
+written under either choice.
+"""
+
+from __future__ import annotations
+
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+CODEC_ZLIB = 0
+CODEC_ZSTD = 1
+CODEC_NONE = 2
+
+
+def compress(data: bytes) -> tuple[int, bytes]:
+    """Compress ``data`` with the best available codec."""
+    if zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=3).compress(data)
+    return CODEC_ZLIB, zlib.compress(data, 6)
+
+
+def decompress(codec: int, payload: bytes) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("This data is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == CODEC_NONE:
+        return payload
+    raise ValueError(f"Unknown codec {codec}")
@@ -1,6 +1,13 @@
 from pathlib import Path
+import copy
+import logging
 import os
 import shutil
+import threading
+
+from . import agent_logging
+
+logger = agent_logging.get_logger(__name__)
 
 def copy_config(user_config_path):
     """
@@ -20,9 +27,35 @@ def copy_config(user_config_path):
         raise FileNotFoundError(f"♣ Config template not found at: {example_config}")
         
     shutil.copy(example_config, user_config_path)
-    print(f"♣ Created new config file at, please update the values: {user_config_path}")
+    logger.info("Created new config file at, please update the values: %s", user_config_path)
     return user_config_path
 
+def find_config_path(local_config_path=None):
+    """
+    Locate the configuration file without creating one.
+
+    Returns:
+        Path | None: The local config if it exists, else the file named by
+            the HEALING_AGENT_CONFIG environment variable, else the user
+            config if it exists, else None.
+    """
+    if local_config_path and Path(local_config_path).exists():
+        return Path(local_config_path)
+    env_config = os.environ.get('HEALING_AGENT_CONFIG')
+    if env_config:
+        if not Path(env_config).exists():
+            raise FileNotFoundError(f"HEALING_AGENT_CONFIG points to a missing file: {env_config}")
+        return Path(env_config)
+    user_config = Path.home() / '.healing_agent' / 'healing_agent_config.py'
+    if user_config.exists():
+        return user_config
+    return None
+
+# Loaded configurations keyed by path, with the file state and environment
+# they came from.
+_config_cache = {}
+_config_cache_lock = threading.Lock()
+
 def load_config(local_config_path=None):
     """
     Load configuration from healing_agent_config.py
@@ -30,19 +63,41 @@ def load_config(local_config_path=None):
     Args:
         local_config_path (str|Path, optional): Path to local config file. If not provided,
             will attempt to detect config location automatically.
+
+    The file is executed and validated once and re-read only when its size or
+    modification time changes, or when the environment changes (the file and
+    the provider fallbacks read it); every call returns its own copy.
     """
 
-    user_config = Path.home() / '.healing_agent' / 'healing_agent_config.py'
-    
-    if local_config_path and Path(local_config_path).exists():
-        config_path = Path(local_config_path)
-    elif user_config.exists():
-        config_path = Path(user_config)
-    else:
+    config_path = find_config_path(local_config_path)
+    if config_path is None:
         # Create default config
-        print("♣ No config file found. Creating default configuration...")
+        logger.info("No config file found. Creating default configuration...")
+        user_config = Path.home() / '.healing_agent' / 'healing_agent_config.py'
         config_path = Path(copy_config(user_config))
 
+    stat = config_path.stat()
+    state = (stat.st_mtime_ns, stat.st_size, dict(os.environ))
+    with _config_cache_lock:
+        cached = _config_cache.get(config_path)
+    if cached is not None and cached[0] == state:
+        return _copy_config(cached[1]), config_path
+
+    config_vars = _read_config(config_path)
+    with _config_cache_lock:
+        _config_cache[config_path] = (state, config_vars)
+    return _copy_config(config_vars), config_path
+
+def _copy_config(config_vars):
+    """A copy callers may modify; plain containers are copied deeply, other
+    values (such as modules the config file imported) are shared."""
+    return {
+        key: copy.deepcopy(value) if isinstance(value, (dict, list, set)) else value
+        for key, value in config_vars.items()
+    }
+
+def _read_config(config_path):
+    """Execute, complete from the environment and validate one config file."""
     # Load config module
     import importlib.util
     spec = importlib.util.spec_from_file_location("healing_agent_config", config_path)
@@ -84,8 +139,8 @@ def load_config(local_config_path=None):
 
     # Validate config
     validate_config(config_vars)
-            
-    return config_vars, config_path
+
+    return config_vars
 
 def validate_config(config):
     """Validate configuration settings."""
@@ -124,8 +179,8 @@ def validate_config(config):
                     missing_settings.append(setting)
                     
         if missing_settings:
-            print(f"♣ Config validation failed. Missing settings: {', '.join(missing_settings)}")
-            print("♣ Current config keys:", list(config.keys()))
+            logger.error("Config validation failed. Missing settings: %s", ', '.join(missing_settings))
+            logger.error("Current config keys: %s", list(config.keys()))
             raise ValueError(f"Missing required settings: {', '.join(missing_settings)}")
 
         # Validate types
@@ -136,17 +191,109 @@ def validate_config(config):
             if not isinstance(config.get(bool_setting), bool):
                 raise ValueError(f"{bool_setting} must be a boolean value")
 
-        for optional_bool in ['AUTO_SYSCHANGE', 'SAVE_AI_FIXES', 'SAVE_GIT_PATCHES', 'GIT_STAGE']:
+        for optional_bool in ['AUTO_SYSCHANGE', 'SAVE_AI_FIXES', 'SAVE_GIT_PATCHES', 'GIT_STAGE', 'VERIFY_IN_SANDBOX', 'FINGERPRINT_INDEX', 'CLASSIFY_TRANSIENT', 'LOCAL_FIXERS', 'ASYNC_ARTIFACTS', 'BACKUP_COMPRESSION', 'LOG_QUEUE']:
             if optional_bool in config and not isinstance(config[optional_bool], bool):
                 raise ValueError(f"{optional_bool} must be a boolean value")
 
         if config.get('GIT_MODE', 'off') not in {'off', 'patch', 'apply'}:
             raise ValueError("GIT_MODE must be one of: off, patch, apply")
-        if config.get('GIT_PATCH_DIR') is not None and not isinstance(config.get('GIT_PATCH_DIR'), (str, os.PathLike)):
-            raise ValueError("GIT_PATCH_DIR must be a path string or None")
+        if config.get('BACKUP_FORMAT', 'copy') not in {'copy', 'store'}:
+            raise ValueError("BACKUP_FORMAT must be one of: copy, store")
+        if config.get('CONTEXT_FORMAT', 'json') not in {'json', 'bundle'}:
+            raise ValueError("CONTEXT_FORMAT must be one of: json, bundle")
+        if config.get('FIX_FORMAT', 'function') not in {'function', 'edits', 'auto'}:
+            raise ValueError("FIX_FORMAT must be one of: function, edits, auto")
+        if config.get('HEALING_MODE', 'blocking') not in {'blocking', 'background', 'queue'}:
+            raise ValueError("HEALING_MODE must be one of: blocking, background, queue")
+        if config.get('RELOAD_MODE', 'module') not in {'module', 'hotpatch'}:
+            raise ValueError("RELOAD_MODE must be one of: module, hotpatch")
+        for positive_int in ['EDIT_MIN_LINES', 'SANDBOX_WORKERS', 'SANDBOX_CPU_SECONDS', 'SANDBOX_MEMORY_MB', 'CONTEXT_SEGMENT_BYTES', 'ARTIFACT_QUEUE_SIZE']:
+            if positive_int in config and (
+                isinstance(config[positive_int], bool)
+                or not isinstance(config[positive_int], int)
+                or config[positive_int] <= 0
+            ):
+                raise ValueError(f"{positive_int} must be a positive integer")
+        for positive_number in ['SANDBOX_WALL_SECONDS', 'CIRCUIT_BREAKER_WINDOW', 'CIRCUIT_BREAKER_COOLDOWN', 'TRANSIENT_BACKOFF', 'TRANSIENT_BACKOFF_MAX']:
+            if positive_number in config and (
+                isinstance(config[positive_number], bool)
+                or not isinstance(config[positive_number], (int, float))
+                or config[positive_number] <= 0
+            ):
+                raise ValueError(f"{positive_number} must be a positive number")
+        window = config.get('REPAIR_BATCH_WINDOW', 0.0)
+        if isinstance(window, bool) or not isinstance(window, (int, float)) or window < 0:
+            raise ValueError("REPAIR_BATCH_WINDOW must be a non-negative number")
+        context_max_bytes = config.get('CONTEXT_MAX_BYTES')
+        if context_max_bytes is not None and (
+            isinstance(context_max_bytes, bool)
+            or not isinstance(context_max_bytes, int)
+            or context_max_bytes <= 0
+        ):
+            raise ValueError("CONTEXT_MAX_BYTES must be a positive integer or None")
+        retries = config.get('TRANSIENT_RETRIES', 0)
+        if isinstance(retries, bool) or not isinstance(retries, int) or retries < 0:
+            raise ValueError("TRANSIENT_RETRIES must be a non-negative integer")
+        threshold = config.get('CIRCUIT_BREAKER_THRESHOLD')
+        if threshold is not None and (
+            isinstance(threshold, bool) or not isinstance(threshold, int) or threshold <= 0
+        ):
+            raise ValueError("CIRCUIT_BREAKER_THRESHOLD must be a positive integer or None")
+        for rate in ['OBSERVATION_SAMPLE_RATE', 'REPAIR_SAMPLE_RATE']:
+            if rate in config and (
+                isinstance(config[rate], bool)
+                or not isinstance(config[rate], (int, float))
+                or not 0 <= config[rate] <= 1
+            ):
+                raise ValueError(f"{rate} must be a number between 0 and 1")
+        retention = config.get('ARTIFACT_RETENTION')
+        if retention is not None:
+            if not isinstance(retention, dict):
+                raise ValueError("ARTIFACT_RETENTION must be a dict of per-kind limits or None")
+            for kind, limits in retention.items():
+                if kind not in {'backups', 'exceptions', 'fixes'}:
+                    raise ValueError(f"ARTIFACT_RETENTION kind must be one of: backups, exceptions, fixes (got {kind!r})")
+                if not isinstance(limits, dict):
+                    raise ValueError(f"ARTIFACT_RETENTION[{kind!r}] must be a dict")
+                for limit, value in limits.items():
+                    if limit == 'compact':
+                        if not isinstance(value, bool):
+                            raise ValueError(f"ARTIFACT_RETENTION[{kind!r}]['compact'] must be a boolean value")
+                    elif limit not in {'max_count', 'max_bytes', 'max_age_days', 'max_archives'}:
+                        raise ValueError(f"Unknown ARTIFACT_RETENTION limit: {limit}")
+                    elif value is not None and (
+                        isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0
+                    ):
+                        raise ValueError(f"ARTIFACT_RETENTION[{kind!r}][{limit!r}] must be a non-negative number or None")
+        log_level = config.get('LOG_LEVEL')
+        if log_level is not None and (
+            isinstance(log_level, bool)
+            or not isinstance(log_level, (str, int))
+            or (isinstance(log_level, str) and not isinstance(logging.getLevelName(log_level.upper()), int))
+        ):
+            raise ValueError("LOG_LEVEL must be a logging level name or number, or None")
+        sinks = config.get('METRICS_SINKS', [])
+        if not isinstance(sinks, (list, tuple)) or any(
+            sink not in {'memory', 'prometheus', 'jsonl', 'otlp'} for sink in sinks
+        ):
+            raise ValueError("METRICS_SINKS must be a list of: memory, prometheus, jsonl, otlp")
+        if config.get('CASSETTE_MODE', 'off') not in ('off', 'record', 'replay', None):
+            raise ValueError("CASSETTE_MODE must be one of: off, record, replay")
+        if config.get('CASSETTE_MATCH', 'exact') not in ('exact', 'sequence', None):
+            raise ValueError("CASSETTE_MATCH must be one of: exact, sequence")
+        cassette_latency = config.get('CASSETTE_LATENCY')
+        if cassette_latency is not None and cassette_latency != 'recorded' and (
+            isinstance(cassette_latency, bool)
+            or not isinstance(cassette_latency, (int, float))
+            or cassette_latency < 0
+        ):
+            raise ValueError("CASSETTE_LATENCY must be a non-negative number, 'recorded' or None")
+        for optional_path in ['GIT_PATCH_DIR', 'HEAL_QUEUE_DIR', 'FINGERPRINT_INDEX_PATH', 'CONTEXT_BUNDLE_DIR', 'METRICS_DIR', 'CASSETTE_PATH']:
+            if config.get(optional_path) is not None and not isinstance(config.get(optional_path), (str, os.PathLike)):
+                raise ValueError(f"{optional_path} must be a path string or None")
     
         return config
         
     except Exception as e:
-        print(f"♣ Error loading config: {str(e)}")
+        logger.error("Error loading config: %s", e)
         raise
@@ -27,7 +27,8 @@ OPENAI = {
     # Any Chat Completions-compatible model ID can be used. This balanced
     # default should still be evaluated against your own repair benchmark.
     "model": os.getenv("OPENAI_MODEL", "gpt-5.6-terra"),
-    "organization_id": os.getenv("OPENAI_ORG_ID", None)  # Optional
+    "organization_id": os.getenv("OPENAI_ORG_ID", None),  # Optional
+    "base_url": os.getenv("OPENAI_BASE_URL", None)  # Optional compatible endpoint
 }
 
 # Anthropic Configuration
@@ -36,7 +37,8 @@ ANTHROPIC = {
     "api_key": os.getenv("ANTHROPIC_API_KEY", "your-anthropic-key-here"),
     "model": os.getenv("ANTHROPIC_MODEL", "claude-sonnet-5"),  # e.g. claude-sonnet-5, claude-haiku-4-5
     "max_tokens": int(os.getenv("ANTHROPIC_MAX_TOKENS", "1024")),
-    "temperature": float(os.getenv("ANTHROPIC_TEMPERATURE", "1.0"))
+    "temperature": float(os.getenv("ANTHROPIC_TEMPERATURE", "1.0")),
+    "base_url": os.getenv("ANTHROPIC_BASE_URL", None)  # Optional compatible endpoint
 }
 
 # Ollama Configuration
@@ -59,9 +61,119 @@ LITELLM = {
 # ---------------------------------
 MAX_ATTEMPTS = 3  # Maximum number of fix attempts
 DEBUG = True  # Enable detailed logging
+# Heal output goes to the "healing_agent" logger hierarchy; until the
+# application configures logging it is printed to stdout as "♣ ..." lines.
+LOG_LEVEL = None  # e.g. "WARNING"; None means DEBUG when DEBUG is on, else INFO
+LOG_QUEUE = True  # Write log records on a listener thread, not the failing one
 AUTO_FIX = True  # Preserve classic behavior: apply and execute generated fixes
 AUTO_SYSCHANGE = False  # Safer default: never install packages automatically
 
+# How the model returns a fix:
+#   function - regenerate the whole function (classic behavior)
+#   edits    - return line-range edits against the captured source
+#   auto     - use edits for functions of at least EDIT_MIN_LINES lines
+FIX_FORMAT = "auto"
+EDIT_MIN_LINES = 300
+# When healing runs:
+#   blocking   - the failing call waits for the repair and returns its result
+#   background - capture, re-raise immediately, repair on a background thread;
+#                later calls pick up the fix (requires a hot-patchable function)
+#   queue      - capture, re-raise immediately and append the redacted context
+#                to HEAL_QUEUE_DIR; run `healing-agent worker` to write patches
+HEALING_MODE = "blocking"
+# Seconds a background heal waits for more failures to repair with it. Fixes
+# for functions in the same file are then written in one splice and
+# hot-patched together.
+REPAIR_BATCH_WINDOW = 0.25
+HEAL_QUEUE_DIR = None  # Defaults to ~/.healing_agent/queue
+# How a written fix is loaded:
+#   module   - re-execute the whole module (re-runs module-level side effects)
+#   hotpatch - compile only the repaired function and swap its code in place
+RELOAD_MODE = "hotpatch"
+# Prewarming (loading the config, provider SDK and client, sandbox workers
+# and decorated sources ahead of the first heal) is not a config setting:
+# call `healing_agent.prewarm()` at startup, or set HEALING_AGENT_PREWARM=1
+# in the environment to start it when the first function is decorated.
+# Worth it for long-running services; short CLI runs that rarely fail start
+# faster without it.
+
+# Error-storm protection
+# ---------------------
+# Failures are keyed by function and error fingerprint. After more than
+# CIRCUIT_BREAKER_THRESHOLD failures within CIRCUIT_BREAKER_WINDOW seconds the
+# circuit opens and failures re-raise instantly; after CIRCUIT_BREAKER_COOLDOWN
+# seconds one failure probes whether healing works again. Set the threshold
+# to None to disable the breaker.
+CIRCUIT_BREAKER_THRESHOLD = 5
+CIRCUIT_BREAKER_WINDOW = 60  # seconds
+CIRCUIT_BREAKER_COOLDOWN = 300  # seconds
+# Deterministic sampling: 0.1 handles the first failure, then every tenth.
+OBSERVATION_SAMPLE_RATE = 1.0  # Fraction of failures captured at all
+REPAIR_SAMPLE_RATE = 1.0  # Fraction of captured failures also repaired
+# Every failure is reduced to a fingerprint (type, normalized message, frame,
+# source hash); occurrence counts per fingerprint are periodically merged
+# into a JSON index.
+FINGERPRINT_INDEX = True
+FINGERPRINT_INDEX_PATH = None  # Defaults to ~/.healing_agent/fingerprints.json
+
+# Local fixers
+# ------------
+# Try deterministic repairs (renamed dict keys, misspelled attributes or
+# module names, JSON with a BOM or trailing commas) before asking the AI
+# provider. A candidate is only kept if the function then succeeds with the
+# original arguments.
+LOCAL_FIXERS = True
+
+# Transient failures
+# ------------------
+# Timeouts, dropped connections and HTTP 429/502/503/504 are not code bugs.
+# When CLASSIFY_TRANSIENT is on they never reach the AI provider: in blocking
+# mode the original function is retried with exponential backoff (honoring
+# Retry-After), in background/queue modes the error is simply re-raised.
+CLASSIFY_TRANSIENT = True
+TRANSIENT_RETRIES = 3
+TRANSIENT_BACKOFF = 0.5  # seconds before the first retry, doubled each time
+TRANSIENT_BACKOFF_MAX = 10  # seconds; also caps Retry-After
+
+# Metrics
+# -------
+# Per-heal stage timings, captured bytes, prompt/completion tokens, parse
+# cache hits and outcome are sent to each listed sink:
+#   memory     - in-process aggregates (healing_agent.metrics.get_registry())
+#   prometheus - METRICS_DIR/healing_agent.prom (text exposition format)
+#   jsonl      - METRICS_DIR/heals.jsonl, one record per heal
+#   otlp       - METRICS_DIR/spans.jsonl, OTLP/JSON spans per heal and stage
+# An empty list disables metrics.
+METRICS_SINKS = ["memory"]
+METRICS_DIR = None  # Defaults to ~/.healing_agent/metrics
+
+# Provider cassette
+# -----------------
+# Record provider responses, keyed by (prompt hash, role, provider, model),
+# or replay them offline for reproducible benchmarks and tests:
+#   off    - always call the provider
+#   record - call the provider and append each response to CASSETTE_PATH
+#   replay - serve recorded responses; an unrecorded request fails the heal
+# CASSETTE_MATCH "exact" replays by prompt hash; "sequence" ignores the
+# prompt and serves responses per role in recorded order (for runs from
+# other directories or A/B tests of prompt changes).
+# HEALING_AGENT_CASSETTE_MODE / _CASSETTE / _CASSETTE_MATCH override these.
+CASSETTE_MODE = "off"
+CASSETTE_PATH = None  # Defaults to ~/.healing_agent/cassette.jsonl.gz (.gz = compressed)
+CASSETTE_MATCH = "exact"
+CASSETTE_LATENCY = None  # Replay delay: None, seconds, or "recorded"
+
+# Sandbox verification (POSIX only)
+# ------------------------------
+# Run each candidate fix against the original arguments in a pre-forked,
+# resource-limited worker before it is written. Note that the candidate really
+# executes there, including any external side effects it has.
+VERIFY_IN_SANDBOX = False
+SANDBOX_WORKERS = 2  # Warm worker processes kept ready
+SANDBOX_CPU_SECONDS = 10  # CPU time per verification
+SANDBOX_WALL_SECONDS = 30  # Wall-clock time per verification
+SANDBOX_MEMORY_MB = 512  # Extra address space a verification may allocate
+
 # Healing Agent System Prompts
 # ---------------------------
 SYSTEM_PROMPTS = {
@@ -73,9 +185,43 @@ SYSTEM_PROMPTS = {
 # Backup and Storage Configuration
 # -----------------------------
 BACKUP_ENABLED = True  # Enable code backups before fixes
+# Backup layout:
+#   copy  - a timestamped copy of the whole file per heal
+#   store - content-addressed objects plus manifest.jsonl; identical file
+#           states are stored once; `healing-agent rollback <file>` restores
+BACKUP_FORMAT = "store"
+BACKUP_COMPRESSION = True  # Compress store objects (zstd if installed, else zlib)
 SAVE_EXCEPTIONS = True  # Save exception contexts for analysis
+# How saved contexts are stored:
+#   json   - one indented JSON file per failure in _healing_agent_exceptions/
+#   bundle - compressed records appended to rotating segment files with an
+#            index; read them with `healing-agent contexts <dir> [heal_id]`
+CONTEXT_FORMAT = "bundle"
+CONTEXT_BUNDLE_DIR = None  # Defaults to _healing_agent_exceptions/bundle
+CONTEXT_SEGMENT_BYTES = 16 * 1024 * 1024  # Rotate segments at this size
+# Upper bound on one captured context (JSON bytes). Values are previewed
+# without converting them whole, the traceback keeps its last frames, and
+# variable previews stop once the budget is spent; the function's source is
+# always kept. None captures everything (classic behavior).
+CONTEXT_MAX_BYTES = 256 * 1024
 SAVE_AI_FIXES = True  # New parameter to control saving AI code suggestions
 SAVE_GIT_PATCHES = False  # Optionally emit a reviewable `git apply` patch
+# Write contexts, AI fixes and backups on a background thread. Backups are
+# snapshotted before the fix is applied and are never dropped; other
+# artifacts are dropped (and counted) when ARTIFACT_QUEUE_SIZE writes are
+# already pending. Git patches are always written inline.
+ASYNC_ARTIFACTS = True
+ARTIFACT_QUEUE_SIZE = 256
+# Per-kind limits for _healing_agent_backups/_exceptions/_fixes, enforced as
+# artifacts are written (oldest evicted first). Keys: max_count, max_bytes,
+# max_age_days, compact (move evicted files into _archive/*.zip instead of
+# deleting them) and max_archives. Set to None to keep everything.
+# `healing-agent prune <root>` applies the limits on demand.
+ARTIFACT_RETENTION = {
+    "backups": {"max_count": 200, "max_age_days": 90, "compact": True, "max_archives": 12},
+    "exceptions": {"max_count": 1000, "max_bytes": 100 * 1024 * 1024, "max_age_days": 30},
+    "fixes": {"max_count": 500, "max_age_days": 90},
+}
 # Git integration is language-neutral and opt-in:
 #   off   - no Git interaction
 #   patch - save and verify a patch, then use the normal Python file writer
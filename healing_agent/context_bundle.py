@@ -0,0 +1,228 @@
+"""Compact, append-only bundles of captured failure contexts.
+
+Writing one indented JSON file per failure is slow and bulky during an error
+storm.  A bundle directory instead holds rotating segment files of
+length-prefixed, compressed records plus a line-per-record index::
+
+    <bundle>/segment-000001.hab   b"HAB1", then records
+    <bundle>/index.jsonl          {"heal_id", "segment", "offset", "length", ...}
+
+Each record is a 4-byte big-endian payload length, a 1-byte codec and the
+compressed compact-JSON context.  Records and index lines are each written
+with a single ``O_APPEND`` write under an advisory lock (where ``fcntl`` is
+available), so concurrent writers never interleave and recorded offsets
+stay exact.  An empty segment is still being initialized: whichever writer
+appends to it first writes the magic bytes in the same locked write.
+Contexts are compressed with zstd when the ``zstandard`` package is installed
+and with zlib otherwise; readers handle both.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import struct
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from .compression import compress, decompress
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MAGIC = b"HAB1"
+INDEX_NAME = "index.jsonl"
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+
+_HEADER = struct.Struct(">IB")
+_SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})\.hab$")
+
+_lock = threading.Lock()
+
+
+def _append(path: Path, data: bytes, header: bytes = b"") -> int:
+    """Append ``data`` in one write and return the offset it was written at.
+
+    ``header`` is written first when the file is empty.
+    """
+    descriptor = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(descriptor, fcntl.LOCK_EX)
+        offset = os.fstat(descriptor).st_size
+        if offset == 0 and header:
+            data = header + data
+            offset = len(header)
+        os.write(descriptor, data)
+        return offset
+    finally:
+        os.close(descriptor)  # also releases the lock
+
+
+def _segments(directory: Path) -> list[Path]:
+    if not directory.is_dir():
+        return []
+    return sorted(
+        path for path in directory.iterdir() if _SEGMENT_PATTERN.match(path.name)
+    )
+
+
+def segment_paths(directory: Path | str) -> list[Path]:
+    """The bundle's segment files, oldest first."""
+    return _segments(Path(directory))
+
+
+def is_bundle(directory: Path | str) -> bool:
+    directory = Path(directory)
+    return (directory / INDEX_NAME).is_file() or bool(_segments(directory))
+
+
+def _current_segment(directory: Path, max_bytes: int) -> Path:
+    segments = _segments(directory)
+    if segments:
+        latest = segments[-1]
+        if latest.stat().st_size < max_bytes:
+            return latest
+        number = int(_SEGMENT_PATTERN.match(latest.name).group(1)) + 1
+    else:
+        number = 1
+    # Created (with its magic bytes) by the first append; concurrent writers
+    # that rotate at the same time pick the same number.
+    return directory / f"segment-{number:06d}.hab"
+
+
+def append_context(
+    directory: Path | str,
+    context: Dict[str, Any],
+    max_segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+) -> str:
+    """Append ``context`` to the bundle in ``directory`` and return its heal id."""
+    bundle = Path(directory)
+    bundle.mkdir(parents=True, exist_ok=True)
+    heal_id = context.get("heal_id") or uuid.uuid4().hex
+    encoded = json.dumps(
+        context, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+    codec, payload = compress(encoded)
+    record = _HEADER.pack(len(payload), codec) + payload
+
+    error = context.get("error") or {}
+    with _lock:
+        segment = _current_segment(bundle, max_segment_bytes)
+        offset = _append(segment, record, header=MAGIC)
+        entry = {
+            "heal_id": heal_id,
+            "segment": segment.name,
+            "offset": offset,
+            "length": len(record),
+            "timestamp": context.get("timestamp"),
+            "function": (context.get("function_info") or {}).get("name"),
+            "error_type": error.get("type"),
+            "fingerprint": (error.get("fingerprint") or {}).get("id"),
+        }
+        _append(bundle / INDEX_NAME, (json.dumps(entry) + "\n").encode("utf-8"))
+    return heal_id
+
+
+def _read_record(handle, offset: int) -> Optional[Dict[str, Any]]:
+    handle.seek(offset)
+    header = handle.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    length, codec = _HEADER.unpack(header)
+    payload = handle.read(length)
+    if len(payload) < length:
+        return None  # torn tail from a crashed writer
+    return json.loads(decompress(codec, payload))
+
+
+def iter_index(directory: Path | str) -> Iterator[Dict[str, Any]]:
+    """Index entries in write order; unreadable lines are skipped."""
+    try:
+        with open(Path(directory) / INDEX_NAME, "r", encoding="utf-8") as index:
+            for line in index:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+def read_context(directory: Path | str, heal_id: str) -> Optional[Dict[str, Any]]:
+    """Look up one context by heal id (a unique prefix is enough)."""
+    matches = [
+        entry for entry in iter_index(directory) if entry["heal_id"].startswith(heal_id)
+    ]
+    if len(matches) != 1:
+        return None
+    entry = matches[0]
+    with open(Path(directory) / entry["segment"], "rb") as segment:
+        return _read_record(segment, entry["offset"])
+
+
+def iter_contexts(directory: Path | str) -> Iterator[Dict[str, Any]]:
+    """Every readable context, scanning segments without the index."""
+    for path in _segments(Path(directory)):
+        with open(path, "rb") as segment:
+            if segment.read(len(MAGIC)) != MAGIC:
+                continue  # empty: still being initialized
+            offset = len(MAGIC)
+            while True:
+                record = _read_record(segment, offset)
+                if record is None:
+                    break
+                yield record
+                offset = segment.tell()
+
+
+def records_per_segment(directory: Path | str) -> Dict[str, int]:
+    """How many index entries point into each segment."""
+    counts: Dict[str, int] = {}
+    for entry in iter_index(directory):
+        segment = entry.get("segment")
+        if segment:
+            counts[segment] = counts.get(segment, 0) + 1
+    return counts
+
+
+def drop_segments(directory: Path | str, names: list[str]) -> None:
+    """Delete rotated segments and their index entries.
+
+    The index is rewritten in place under its lock, so appends from other
+    writers wait and then land after the kept entries.  The newest segment
+    is still being written to and is never dropped.
+    """
+    bundle = Path(directory)
+    segments = _segments(bundle)
+    dropped = set(names) - {segments[-1].name} if segments else set()
+    if not dropped:
+        return
+    with _lock:
+        index_path = bundle / INDEX_NAME
+        descriptor = os.open(index_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(descriptor, fcntl.LOCK_EX)
+            with os.fdopen(os.dup(descriptor), "rb") as index:
+                lines = index.readlines()
+            kept = []
+            for line in lines:
+                try:
+                    if json.loads(line).get("segment") in dropped:
+                        continue
+                except ValueError:
+                    continue
+                kept.append(line)
+            os.ftruncate(descriptor, 0)
+            os.lseek(descriptor, 0, os.SEEK_SET)
+            os.write(descriptor, b"".join(kept))
+            for name in dropped:
+                (bundle / name).unlink(missing_ok=True)
+        finally:
+            os.close(descriptor)
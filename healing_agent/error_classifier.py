@@ -0,0 +1,141 @@
+"""Route transient failures away from the provider.
+
+Timeouts, dropped connections and overload responses (429/502/503/504) are
+not code bugs: rewriting the function cannot fix them and a model round trip
+only adds seconds and the risk of a bad patch.  ``classify_transient``
+recognizes them with local rules, and ``retry_transient`` recovers by calling
+the original function again with bounded exponential backoff, honoring a
+server's ``Retry-After`` header.
+
+Exception classes are matched by module and name along the MRO, so neither
+``requests`` nor ``httpx`` has to be imported to classify their errors.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+_TRANSIENT_STATUS = {429, 502, 503, 504}
+
+_TRANSIENT_CLASSES = {
+    "builtins.TimeoutError": "timeout",
+    "builtins.ConnectionError": "connection",
+    "requests.exceptions.Timeout": "timeout",
+    "requests.exceptions.ConnectionError": "connection",
+    "requests.exceptions.ChunkedEncodingError": "connection",
+    "httpx.TimeoutException": "timeout",
+    "httpx.NetworkError": "connection",
+    "httpx.RemoteProtocolError": "connection",
+    "urllib3.exceptions.TimeoutError": "timeout",
+    "urllib3.exceptions.ProtocolError": "connection",
+}
+
+# Subclasses of transient classes that a retry will not fix.
+_PERMANENT_CLASSES = {
+    "requests.exceptions.SSLError",
+    "requests.exceptions.InvalidProxyURL",
+    "builtins.BrokenPipeError",
+}
+
+_HTTP_STATUS_CLASSES = {
+    "requests.exceptions.HTTPError",
+    "httpx.HTTPStatusError",
+    "urllib.error.HTTPError",
+}
+
+
+@dataclass(frozen=True)
+class TransientError:
+    """Why a failure is considered transient."""
+
+    reason: str
+    status_code: Optional[int] = None
+    retry_after: Optional[float] = None
+
+
+def _class_names(error: BaseException):
+    for cls in type(error).__mro__:
+        yield f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _parse_retry_after(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    import email.utils
+
+    try:
+        moment = email.utils.parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+def _http_status(error: BaseException) -> tuple[Optional[int], Optional[float]]:
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    headers = getattr(response, "headers", None)
+    if status is None:
+        # urllib.error.HTTPError carries the status and headers itself.
+        status = getattr(error, "code", None)
+        headers = getattr(error, "headers", None)
+    retry_after = None
+    if headers is not None:
+        try:
+            retry_after = _parse_retry_after(headers.get("Retry-After"))
+        except Exception:
+            retry_after = None
+    return (status if isinstance(status, int) else None), retry_after
+
+
+def classify_transient(error: BaseException) -> Optional[TransientError]:
+    """Return why ``error`` is transient, or None if it may be a code bug."""
+    names = list(_class_names(error))
+    if _PERMANENT_CLASSES.intersection(names):
+        return None
+    for name in names:
+        if name in _HTTP_STATUS_CLASSES:
+            status, retry_after = _http_status(error)
+            if status in _TRANSIENT_STATUS:
+                return TransientError(f"http {status}", status, retry_after)
+            return None
+        if name in _TRANSIENT_CLASSES:
+            return TransientError(_TRANSIENT_CLASSES[name])
+    return None
+
+
+def retry_transient(
+    call: Callable[[], Any],
+    transient: TransientError,
+    retries: int = 3,
+    backoff: float = 0.5,
+    backoff_max: float = 10.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> tuple[bool, Any]:
+    """Retry ``call`` while it keeps failing transiently.
+
+    Waits ``backoff * 2**n`` seconds before retry ``n`` (or the server's
+    ``Retry-After``), never more than ``backoff_max``.  Returns
+    ``(True, result)`` on success and ``(False, last_error)`` once the retries
+    are used up or a retry fails with a non-transient error.
+    """
+    last_error: Optional[BaseException] = None
+    for attempt in range(retries):
+        delay = backoff * (2 ** attempt)
+        if transient.retry_after is not None:
+            delay = transient.retry_after
+        sleep(min(delay, backoff_max))
+        try:
+            return True, call()
+        except Exception as error:
+            last_error = error
+            next_transient = classify_transient(error)
+            if next_transient is None:
+                break
+            transient = next_transient
+    return False, last_error
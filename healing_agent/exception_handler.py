@@ -2,11 +2,16 @@ import json
 import datetime
 import traceback
 import inspect
+import io
 import sys
 import ast
+import reprlib
+import uuid
+from collections.abc import Mapping
 from typing import Optional, Any, Dict, Callable
-import requests
 
+from .ast_cache import parse_file
+from .fingerprint import fingerprint_exception
 from .redactor import get_sensitive_matcher, is_sensitive_name, DEFAULT_PLACEHOLDER
 
 # Healing-agent's own wrapper-frame variables. In production, capture_context
@@ -36,23 +41,136 @@ def get_function_source(func: Callable) -> tuple[list[str], int]:
     # First try to get source directly from file
     if hasattr(func, '__code__') and hasattr(func.__code__, 'co_filename'):
         file_path = func.__code__.co_filename
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source = f.read()
-            
-        tree = ast.parse(source)
+        source, tree = parse_file(file_path)
         for node in ast.walk(tree):
             if isinstance(node, ast.FunctionDef) and node.name == func.__name__:
                 start_line = node.lineno
                 end_line = node.end_lineno
-                
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    all_lines = f.readlines()
-                    source_lines = all_lines[start_line-1:end_line]
-                    return source_lines, start_line
+
+                all_lines = io.StringIO(source).readlines()
+                source_lines = all_lines[start_line-1:end_line]
+                return source_lines, start_line
                     
     # Fallback to inspect
     return inspect.getsourcelines(func)
 
+def bounded_str(value: Any, limit: int) -> str:
+    """
+    A string preview of ``value`` of at most about ``limit`` characters.
+
+    Strings, bytes and containers are cut before they are converted, so a
+    huge value never becomes a huge intermediate string; other objects go
+    through ``str`` and are cut afterwards.
+    """
+    if isinstance(value, str):
+        text = value
+    elif isinstance(value, (bytes, bytearray)):
+        text = repr(value[:limit + 1])
+    elif isinstance(value, (list, tuple, set, frozenset, dict)):
+        text = _CONTAINER_REPR.repr(value)
+    else:
+        text = safe_str(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... <{len(text) - limit} more chars>"
+
+
+_CONTAINER_REPR = reprlib.Repr()
+_CONTAINER_REPR.maxlevel = 2
+_CONTAINER_REPR.maxlist = _CONTAINER_REPR.maxtuple = _CONTAINER_REPR.maxdict = 20
+_CONTAINER_REPR.maxset = _CONTAINER_REPR.maxfrozenset = 20
+_CONTAINER_REPR.maxstring = _CONTAINER_REPR.maxother = 200
+
+# Per-field caps used when CONTEXT_MAX_BYTES is set.
+_BOUNDED_ARGUMENT_CHARS = 1000
+_BOUNDED_ATTRIBUTE_CHARS = 1000
+_BOUNDED_TRACEBACK_FRAMES = 50
+_VARIABLE_ENTRY_OVERHEAD = 48  # JSON punctuation and the "type"/"value_preview" keys
+
+
+def _plain(value: Any, limit: int) -> Any:
+    """Mappings as ``{str: bounded str}``, anything else as a bounded string."""
+    if isinstance(value, Mapping):
+        return {str(k): bounded_str(v, limit) for k, v in list(value.items())[:50]}
+    return bounded_str(value, limit)
+
+
+def _capture_variables(
+    frame: Any,
+    config: Optional[dict],
+    budget: Optional[int],
+    truncated: list,
+) -> Dict[str, Dict[str, Any]]:
+    """Previews of ``frame``'s locals, then globals, within ``budget`` bytes."""
+    # Matcher for name-based secret redaction of variable previews.
+    matcher = get_sensitive_matcher(config)
+    remaining = budget
+
+    def preview(key, value):
+        """Build a {type, value_preview} entry, redacting sensitive names."""
+        type_name = type(value).__name__
+        if is_sensitive_name(key, matcher):
+            return {'type': type_name, 'value_preview': DEFAULT_PLACEHOLDER}
+        if budget is not None:
+            return {'type': type_name, 'value_preview': bounded_str(value, 200)}
+        try:
+            var_str = str(value)[:200]
+        except Exception:
+            var_str = '<Error converting to string>'
+        return {'type': type_name, 'value_preview': var_str}
+
+    def collect(items, scope):
+        nonlocal remaining
+        previews = {}
+        omitted = 0
+        for key, value in items:
+            if remaining is not None and remaining <= 0:
+                omitted += 1
+                continue
+            entry = previews[key] = preview(key, value)
+            if remaining is not None:
+                remaining -= (
+                    len(key) + len(entry['type']) + len(entry['value_preview'])
+                    + _VARIABLE_ENTRY_OVERHEAD
+                )
+        if omitted:
+            truncated.append(f"{scope}: {omitted} omitted")
+        return previews
+
+    # Skip healing-agent internals that carry credentials or duplicate the
+    # user's arguments, and built-ins/private names among the globals.
+    local_vars = collect(
+        ((key, value) for key, value in frame.f_locals.items() if key not in _INTERNAL_SKIP_VARS),
+        'locals',
+    )
+    global_vars = collect(
+        (
+            (key, value) for key, value in frame.f_globals.items()
+            if not key.startswith('__') and key not in _INTERNAL_SKIP_VARS
+        ),
+        'globals',
+    )
+    return {'locals': local_vars, 'globals': global_vars}
+
+
+def _release_locals_snapshot(frame: Any) -> None:
+    """
+    Drop the ``f_locals`` snapshot reading locals left on a function frame.
+
+    Before Python 3.13 the snapshot lives as long as the frame. When the
+    caller is the frame that caught the error, it holds the exception, whose
+    traceback holds the frame again: a cycle that keeps every frame of the
+    failure (and their locals) alive until the garbage collector runs.
+    ``locals()`` and tracers rebuild the snapshot whenever they need it.
+    """
+    if sys.version_info < (3, 13) and frame.f_code.co_flags & inspect.CO_OPTIMIZED:
+        frame.f_locals.clear()
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+
 def capture_context(
     func: Optional[Callable] = None,
     args: Optional[tuple] = None,
@@ -63,6 +181,12 @@ def capture_context(
     """
     Captures execution context with or without an exception.
     
+    With ``CONTEXT_MAX_BYTES`` set in ``config`` the context is built to fit
+    that many bytes of JSON: values are previewed without converting them
+    whole, the traceback is kept to its last frames and lines, and variable
+    previews are added until the budget is spent.  What was cut is listed in
+    ``context['capture_limits']``.  The function's own source is never cut.
+
     Args:
         func: Optional function object to capture context from
         args: Optional positional arguments passed to the function
@@ -73,18 +197,42 @@ def capture_context(
     Returns:
         dict: The captured context
     """
+    max_bytes = (config or {}).get('CONTEXT_MAX_BYTES')
+    truncated: list = []
+    frame = inspect.currentframe().f_back
+    try:
+        context = _build_context(func, args, kwargs, config, error, max_bytes, truncated)
+        if frame:
+            budget = None
+            if max_bytes is not None:
+                budget = max_bytes - _json_size(context) - 64
+            context['variables'] = _capture_variables(frame, config, budget, truncated)
+            _release_locals_snapshot(frame)
+        else:
+            del context['variables']
+    finally:
+        # Frames pin every local of the failing call: hold none past capture.
+        del frame
+    if max_bytes is not None:
+        context['capture_limits'] = {'max_bytes': max_bytes, 'truncated': truncated}
+    return context
 
-    # Reset/initialize important variables
-    caller_frame = None
-    exc_type = None 
-    exc_value = None
-    exc_traceback = None
-    trace = None
-    error_frame = None
-    context = dict()  # Explicitly reset context to empty dictionary
+
+def _build_context(
+    func: Optional[Callable],
+    args: Optional[tuple],
+    kwargs: Optional[dict],
+    config: Optional[dict],
+    error: Optional[Exception],
+    max_bytes: Optional[int],
+    truncated: list,
+) -> Dict[str, Any]:
+    """Everything but the variables, which ``capture_context`` adds last."""
+    bounded = max_bytes is not None
 
     # Capture enhanced context
     context = {
+        'heal_id': uuid.uuid4().hex,
         'timestamp': datetime.datetime.now().isoformat(),
         'python_version': sys.version,
         'platform': sys.platform,
@@ -104,7 +252,7 @@ def capture_context(
             # Collect argument information
             arguments_info = {
                 k: {
-                    'value': str(v),
+                    'value': bounded_str(v, _BOUNDED_ARGUMENT_CHARS) if bounded else str(v),
                     'type': str(type(v).__name__)
                 } 
                 for k, v in inspect.getcallargs(func, *(args or []), **(kwargs or {})).items()
@@ -132,150 +280,156 @@ def capture_context(
                 'error_traceback': traceback.format_exc()
             }
 
-    # Capture frame information
-    frame = inspect.currentframe().f_back
-    if frame:
-        # Matcher for name-based secret redaction of variable previews.
-        _matcher = get_sensitive_matcher(config)
-
-        def _preview(key, value):
-            """Build a {type, value_preview} entry, redacting sensitive names."""
-            type_name = type(value).__name__
-            if is_sensitive_name(key, _matcher):
-                return {'type': type_name, 'value_preview': DEFAULT_PLACEHOLDER}
+    # Variables are captured last (within the remaining budget), but keep
+    # their classic position in the context.
+    context['variables'] = {}
+
+    # If there's an error, add error-specific information
+    if error:
+        context['error'] = _error_context(func, config, error, bounded, max_bytes, truncated)
+    return context
+
+
+def _error_context(
+    func: Optional[Callable],
+    config: Optional[dict],
+    error: Exception,
+    bounded: bool,
+    max_bytes: Optional[int],
+    truncated: list,
+) -> Dict[str, Any]:
+    exc_type, exc_value, exc_traceback = sys.exc_info()
+    trace = traceback.extract_tb(exc_traceback)
+    # Formatted once; the text is shared wherever the traceback is stored.
+    formatted_traceback = traceback.format_exc()
+    # The extracted summaries are plain data: drop the live traceback now.
+    del exc_traceback
+
+    # Find the error frame
+    error_frame = None
+    for frame in reversed(trace):
+        if func and frame.filename == inspect.getfile(func):
+            error_frame = frame
+            break
+    
+    if not error_frame and trace:
+        error_frame = trace[-1]
+
+    if bounded:
+        if len(trace) > _BOUNDED_TRACEBACK_FRAMES:
+            truncated.append(f"traceback_frames: {len(trace) - _BOUNDED_TRACEBACK_FRAMES} omitted")
+            trace = trace[-_BOUNDED_TRACEBACK_FRAMES:]
+        traceback_limit = max(1024, max_bytes // 4)
+        if len(formatted_traceback) > traceback_limit:
+            truncated.append(f"traceback: first {len(formatted_traceback) - traceback_limit} chars omitted")
+            formatted_traceback = "... <earlier frames omitted>\n" + formatted_traceback[-traceback_limit:]
+
+    # Collect error attributes safely
+    attributes = {}
+    for attr in dir(error):
+        if not attr.startswith('_'):
             try:
-                var_str = str(value)[:200]
-            except Exception:
-                var_str = '<Error converting to string>'
-            return {'type': type_name, 'value_preview': var_str}
-
-        # Capture local variables (skip healing-agent internals that carry
-        # credentials or duplicate the user's arguments).
-        local_vars = {
-            key: _preview(key, value)
-            for key, value in frame.f_locals.items()
-            if key not in _INTERNAL_SKIP_VARS
-        }
+                value = getattr(error, attr)
+                if not callable(value):
+                    if bounded and isinstance(value, str):
+                        attributes[attr] = bounded_str(value, _BOUNDED_ATTRIBUTE_CHARS)
+                    elif isinstance(value, (str, int, float, bool, type(None))):
+                        attributes[attr] = value
+                    elif bounded:
+                        attributes[attr] = bounded_str(value, _BOUNDED_ATTRIBUTE_CHARS)
+                    else:
+                        attributes[attr] = safe_str(value)
+            except Exception as e:
+                attributes[attr] = f"<Error accessing attribute: {str(e)}>"
 
-        # Capture global variables (skip built-ins/private and internals).
-        global_vars = {
-            key: _preview(key, value)
-            for key, value in frame.f_globals.items()
-            if not key.startswith('__') and key not in _INTERNAL_SKIP_VARS
-        }
+    error_context = {
+        'type': exc_type.__name__,
+        'message': bounded_str(exc_value, _BOUNDED_ATTRIBUTE_CHARS) if bounded else str(exc_value),
+        'traceback': formatted_traceback,
+        'line_number': error_frame.lineno if error_frame else None,
+        'file': error_frame.filename if error_frame else None,
+        'function_name': error_frame.name if error_frame else None,
+        'error_line': error_frame.line if error_frame else None,
+        'exception_attrs': attributes,
+        'fingerprint': fingerprint_exception(error, func).as_dict(),
+        'traceback_frames': [{
+            'filename': frame.filename,
+            'line_number': frame.lineno,
+            'function': frame.name,
+            'code': frame.line
+        } for frame in trace]
+    }
 
-        context['variables'] = {
-            'locals': local_vars,
-            'globals': global_vars
-        }
+    # Add exception-specific details. ``requests`` is not imported here: if
+    # the error is one of its types, the application has loaded it.
+    requests = sys.modules.get('requests')
+    requests_errors = getattr(requests, 'exceptions', None)
 
-    # If there's an error, add error-specific information
-    if error:
-        exc_type, exc_value, exc_traceback = sys.exc_info()
-        trace = traceback.extract_tb(exc_traceback)
-
-        # Find the error frame
-        error_frame = None
-        for frame in reversed(trace):
-            if func and frame.filename == inspect.getfile(func):
-                error_frame = frame
-                break
-        
-        if not error_frame and trace:
-            error_frame = trace[-1]
-
-        # Enhanced error context with safe attribute access
-        error_details = {
-            'type': type(error).__name__,
-            'message': str(error),
-            'traceback': traceback.format_exc(),
-            'attributes': {}
+    def attributes_of(obj):
+        # Bounded captures copy values out instead of keeping the live objects.
+        if obj is None:
+            return None
+        if bounded:
+            return {k: _plain(v, _BOUNDED_ATTRIBUTE_CHARS) for k, v in obj.__dict__.items()}
+        return obj.__dict__
+
+    if isinstance(error, json.JSONDecodeError):
+        json_preview = error.doc[:1000] if hasattr(error, 'doc') and error.doc else None
+        error_context['json_details'] = {'response_text': json_preview}
+    
+    elif requests_errors is not None and isinstance(error, requests_errors.ConnectionError):
+        error_context['connection_details'] = {
+            'request': attributes_of(error.request),
+            'response': attributes_of(error.response)
         }
-        
-        # Collect error attributes safely
-        for attr in dir(error):
-            if not attr.startswith('_'):
-                try:
-                    value = getattr(error, attr)
-                    if not callable(value):
-                        if isinstance(value, (str, int, float, bool, type(None))):
-                            error_details['attributes'][attr] = value
-                        else:
-                            error_details['attributes'][attr] = safe_str(value)
-                except Exception as e:
-                    error_details['attributes'][attr] = f"<Error accessing attribute: {str(e)}>"
-
-        context['error'] = {
-            'type': exc_type.__name__,
-            'message': str(exc_value),
-            'traceback': traceback.format_exc(),
-            'line_number': error_frame.lineno if error_frame else None,
-            'file': error_frame.filename if error_frame else None,
-            'function_name': error_frame.name if error_frame else None,
-            'error_line': error_frame.line if error_frame else None,
-            'exception_attrs': error_details['attributes'],
-            'traceback_frames': [{
-                'filename': frame.filename,
-                'line_number': frame.lineno,
-                'function': frame.name,
-                'code': frame.line
-            } for frame in trace]
+    
+    elif requests_errors is not None and isinstance(error, requests_errors.Timeout):
+        error_context['timeout_details'] = {
+            'request': attributes_of(error.request),
+            'timeout': error.args[0] if error.args else None
         }
-
-        # Add exception-specific details
-        if isinstance(error, json.JSONDecodeError):
-            json_preview = error.doc[:1000] if hasattr(error, 'doc') and error.doc else None
-            context['error']['json_details'] = {'response_text': json_preview}
-        
-        elif isinstance(error, requests.exceptions.ConnectionError):
-            context['error']['connection_details'] = {
-                'request': error.request.__dict__ if error.request else None,
-                'response': error.response.__dict__ if error.response else None
-            }
-        
-        elif isinstance(error, requests.exceptions.Timeout):
-            context['error']['timeout_details'] = {
-                'request': error.request.__dict__ if error.request else None,
-                'timeout': error.args[0] if error.args else None
-            }
-        
-        elif isinstance(error, requests.exceptions.HTTPError):
-            try:
-                context['error']['http_details'] = {
-                    'request': {
-                        'method': str(error.request.method) if error.request else None,
-                        'url': str(error.request.url) if error.request else None,
-                        'headers': {k: str(v) for k,v in error.request.headers.items()} if error.request and error.request.headers else None,
-                        'body': str(error.request.body)[:1000] if error.request and error.request.body else None
-                    } if error.request else None,
-                    'response': {
-                        'status_code': error.response.status_code if error.response else None,
-                        'reason': str(error.response.reason) if error.response else None,
-                        'headers': {k: str(v) for k,v in error.response.headers.items()} if error.response and error.response.headers else None,
-                        'text': str(error.response.text)[:1000] if error.response and hasattr(error.response, 'text') else None
-                    } if error.response else None
-                }
-            except Exception as json_err:
-                context['error']['http_details'] = {
-                    'error': f'Failed to serialize HTTP details: {str(json_err)}',
+    
+    elif requests_errors is not None and isinstance(error, requests_errors.HTTPError):
+        try:
+            error_context['http_details'] = {
+                'request': {
+                    'method': str(error.request.method) if error.request else None,
+                    'url': str(error.request.url) if error.request else None,
+                    'headers': {k: str(v) for k,v in error.request.headers.items()} if error.request and error.request.headers else None,
+                    'body': (bounded_str(error.request.body, 1000) if bounded else str(error.request.body)[:1000]) if error.request and error.request.body else None
+                } if error.request else None,
+                'response': {
                     'status_code': error.response.status_code if error.response else None,
-                    'url': str(error.request.url) if error.request else None
-                }
-        
-        elif isinstance(error, (ValueError, KeyError, TypeError)):
-            context['error'][f'{type(error).__name__.lower()}_details'] = {'args': error.args}
-        
-        elif isinstance(error, FileNotFoundError):
-            context['error']['file_details'] = {
-                'filename': error.filename,
-                'errno': error.errno,
-                'strerror': error.strerror
+                    'reason': str(error.response.reason) if error.response else None,
+                    'headers': {k: str(v) for k,v in error.response.headers.items()} if error.response and error.response.headers else None,
+                    'text': str(error.response.text)[:1000] if error.response and hasattr(error.response, 'text') else None
+                } if error.response else None
             }
-        
-        else:
-            context['error']['details'] = {
-                'args': getattr(error, 'args', None),
-                'message': str(error)
+        except Exception as json_err:
+            error_context['http_details'] = {
+                'error': f'Failed to serialize HTTP details: {str(json_err)}',
+                'status_code': error.response.status_code if error.response else None,
+                'url': str(error.request.url) if error.request else None
             }
+    
+    elif isinstance(error, (ValueError, KeyError, TypeError)):
+        error_context[f'{type(error).__name__.lower()}_details'] = {
+            'args': tuple(_plain(arg, _BOUNDED_ATTRIBUTE_CHARS) for arg in error.args)
+            if bounded else error.args
+        }
+    
+    elif isinstance(error, FileNotFoundError):
+        error_context['file_details'] = {
+            'filename': error.filename,
+            'errno': error.errno,
+            'strerror': error.strerror
+        }
+    
+    else:
+        error_context['details'] = {
+            'args': tuple(_plain(arg, _BOUNDED_ATTRIBUTE_CHARS) for arg in getattr(error, 'args', ()))
+            if bounded else getattr(error, 'args', None),
+            'message': bounded_str(error, _BOUNDED_ATTRIBUTE_CHARS) if bounded else str(error)
+        }
 
-    return context
+    return error_context
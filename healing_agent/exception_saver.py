@@ -1,26 +1,47 @@
 import os
 import json
 import datetime
-import traceback
+import uuid
 from typing import Optional
 
-def save_context(context: dict) -> Optional[str]:
+from . import agent_logging
+from .context_bundle import DEFAULT_SEGMENT_BYTES, append_context
+
+logger = agent_logging.get_logger(__name__)
+
+def save_context(context: dict, config: Optional[dict] = None) -> Optional[str]:
     """
-    Save exception details to a JSON file.
+    Save exception details as a JSON file or, with CONTEXT_FORMAT="bundle",
+    as a compressed record appended to a context bundle.
     
     Args:
         context: Dictionary containing exception context and details
         config: Configuration dictionary with save settings
+
+    Returns:
+        Optional[str]: The JSON file path, or "<bundle dir>#<heal id>"
     """
+    file_path = None
     try:
         # Create exceptions directory if it doesn't exist
         exceptions_dir_path = os.path.join(os.path.dirname(context['error']['file']), '_healing_agent_exceptions')
+
+        if (config or {}).get('CONTEXT_FORMAT', 'json') == 'bundle':
+            bundle_dir = (config or {}).get('CONTEXT_BUNDLE_DIR') or os.path.join(exceptions_dir_path, 'bundle')
+            heal_id = append_context(
+                bundle_dir,
+                context,
+                (config or {}).get('CONTEXT_SEGMENT_BYTES', DEFAULT_SEGMENT_BYTES),
+            )
+            return f"{bundle_dir}#{heal_id}"
+
         os.makedirs(exceptions_dir_path, exist_ok=True)
 
-        # Create a timestamp-based filename
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Microseconds plus the heal id keep concurrent failures apart
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         func_name = context.get('function_info', {}).get('name', 'unknown')
-        file_path = os.path.join(exceptions_dir_path, f"{timestamp}_{func_name}.json")
+        unique = (context.get('heal_id') or uuid.uuid4().hex)[:8]
+        file_path = os.path.join(exceptions_dir_path, f"{timestamp}_{func_name}_{unique}.json")
             
         # Write exception details to file
         try:
@@ -28,10 +49,13 @@ def save_context(context: dict) -> Optional[str]:
                 json.dump(context, f, indent=2, ensure_ascii=False)
 
         except Exception as write_error:
-            print(f"♣ Failed to write exception details to {file_path}: {str(write_error)}")
-            print(f"♣ Write error traceback: {traceback.format_exc()}")
+            logger.warning(
+                "Failed to write exception details to %s: %s",
+                file_path,
+                write_error,
+                exc_info=True,
+            )
     except Exception as save_error:
-        print(f"♣ Failed to save exception details: {str(save_error)}")
-        print(f"♣ Save error traceback: {traceback.format_exc()}")
+        logger.warning("Failed to save exception details: %s", save_error, exc_info=True)
 
     return file_path
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""Stable error fingerprints and an occurrence index.
+
+A fingerprint reduces one exception to the bug behind it, so deduplication,
+sampling and reporting can count "one bug" instead of "one occurrence".  It
+combines:
+
+* the exception type;
+* the message with paths, ids and numbers replaced by placeholders;
+* the failing frame: file, qualname and line offset within the function,
+  so unrelated edits above the function do not change the fingerprint;
+* a hash of the failing function's source, so a repaired function that fails
+  the same way again counts as a new bug.
+
+The failing frame is chosen like ``capture_context`` chooses it: the
+innermost frame in the decorated function's file, else the innermost frame.
+Computing a fingerprint walks the traceback once and hashes each function's
+source at most once per process.
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import inspect
+import json
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from types import CodeType
+from typing import Any, Callable, Dict, Optional
+
+from . import agent_logging
+from .atomic_io import atomic_write_text
+
+logger = agent_logging.get_logger(__name__)
+
+DEFAULT_INDEX_PATH = Path.home() / ".healing_agent" / "fingerprints.json"
+
+_MESSAGE_RULES = [
+    # Quoted or bare filesystem paths (POSIX and Windows).
+    (re.compile(r"(?:[A-Za-z]:)?(?:[\\/][\w.\-]+){2,}[\\/]?"), "<path>"),
+    # UUIDs, memory addresses and long hex tokens.
+    (re.compile(r"\b[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}\b"), "<id>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<id>"),
+    (re.compile(r"\b(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{16,}\b"), "<id>"),
+    # Remaining numbers, including those glued to identifiers like "row12".
+    (re.compile(r"[-+]?\d+(?:\.\d+)?"), "<n>"),
+]
+_MAX_MESSAGE_LENGTH = 200
+
+
+def normalize_message(message: Any) -> str:
+    """Strip the per-occurrence parts of an exception message."""
+    from .exception_handler import safe_str  # it imports this module
+
+    message = safe_str(message)
+    for pattern, placeholder in _MESSAGE_RULES:
+        message = pattern.sub(placeholder, message)
+    return " ".join(message.split())[:_MAX_MESSAGE_LENGTH]
+
+
+@lru_cache(maxsize=2048)
+def _source_hash(code: CodeType) -> str:
+    try:
+        source = inspect.getsource(code).encode("utf-8")
+    except (OSError, TypeError):
+        # No source on disk (exec'd or frozen code): the bytecode and names
+        # still identify the implementation within one interpreter version.
+        source = code.co_code + repr(code.co_names).encode("utf-8")
+    return hashlib.sha256(source).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """The normalized signature of one failure."""
+
+    type: str
+    message: str
+    file: Optional[str]
+    qualname: Optional[str]
+    line_offset: Optional[int]
+    source_hash: Optional[str]
+
+    @property
+    def id(self) -> str:
+        """A short digest identifying the bug across occurrences and processes."""
+        material = "\0".join(str(part) for part in asdict(self).values())
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, **asdict(self)}
+
+
+def fingerprint_exception(
+    error: BaseException, func: Optional[Callable[..., Any]] = None
+) -> Fingerprint:
+    """Fingerprint ``error``, preferring the innermost frame in ``func``'s file."""
+    target_file = getattr(getattr(func, "__code__", None), "co_filename", None)
+    innermost = chosen = None
+    traceback = error.__traceback__
+    while traceback is not None:
+        innermost = traceback
+        if target_file and traceback.tb_frame.f_code.co_filename == target_file:
+            chosen = traceback
+        traceback = traceback.tb_next
+    chosen = chosen or innermost
+
+    error_type = type(error)
+    type_name = f"{error_type.__module__}.{error_type.__qualname__}"
+    message = normalize_message(error)
+    if chosen is None:
+        return Fingerprint(type_name, message, None, None, None, None)
+
+    code = chosen.tb_frame.f_code
+    return Fingerprint(
+        type=type_name,
+        message=message,
+        file=code.co_filename,
+        qualname=getattr(code, "co_qualname", code.co_name),
+        line_offset=(chosen.tb_lineno or code.co_firstlineno) - code.co_firstlineno,
+        source_hash=_source_hash(code),
+    )
+
+
+class FingerprintIndex:
+    """Occurrence counters per fingerprint, kept in memory and flushed to disk.
+
+    ``record`` only touches memory.  ``flush`` merges the counts gathered
+    since the previous flush into the JSON index at ``path`` and replaces it
+    atomically, so several processes can share one index file; writers that
+    flush at the same instant may lose each other's increments.
+    """
+
+    def __init__(self, flush_interval: float = 5.0):
+        self.flush_interval = flush_interval
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._unflushed: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._path: Optional[Path] = None
+        atexit.register(self.flush)
+
+    def record(self, fingerprint: Fingerprint) -> int:
+        """Count one occurrence and return the in-process total for it."""
+        now = time.time()
+        key = fingerprint.id
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    "fingerprint": fingerprint.as_dict(),
+                    "count": 0,
+                    "first_seen": now,
+                    "last_seen": now,
+                }
+            entry["count"] += 1
+            entry["last_seen"] = now
+            pending = self._unflushed.setdefault(
+                key, {"fingerprint": entry["fingerprint"], "count": 0, "first_seen": now}
+            )
+            pending["count"] += 1
+            pending["last_seen"] = now
+            return entry["count"]
+
+    def count(self, fingerprint_id: str) -> int:
+        with self._lock:
+            entry = self._entries.get(fingerprint_id)
+            return entry["count"] if entry else 0
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """In-process counters keyed by fingerprint id."""
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._entries.items()}
+
+    def maybe_flush(self, path: Optional[Path | str] = None) -> bool:
+        """Flush if ``flush_interval`` seconds passed since the last flush."""
+        self._path = Path(path) if path else DEFAULT_INDEX_PATH
+        if time.monotonic() - self._last_flush < self.flush_interval:
+            return False
+        return self.flush()
+
+    def flush(self, path: Optional[Path | str] = None) -> bool:
+        """Merge unflushed counts into the on-disk index."""
+        target = Path(path) if path else self._path
+        with self._lock:
+            if target is None or not self._unflushed:
+                return False
+            pending, self._unflushed = self._unflushed, {}
+            self._last_flush = time.monotonic()
+        try:
+            stored = load_index(target)
+            for key, delta in pending.items():
+                entry = stored.setdefault(
+                    key,
+                    {
+                        "fingerprint": delta["fingerprint"],
+                        "count": 0,
+                        "first_seen": delta["first_seen"],
+                    },
+                )
+                entry["count"] += delta["count"]
+                entry["first_seen"] = min(entry["first_seen"], delta["first_seen"])
+                entry["last_seen"] = max(entry.get("last_seen", 0), delta["last_seen"])
+            atomic_write_text(target, json.dumps(stored, indent=2, ensure_ascii=False))
+        except Exception as error:
+            logger.warning("Failed to update fingerprint index %s: %s", target, error)
+            return False
+        return True
+
+
+def load_index(path: Optional[Path | str] = None) -> Dict[str, Dict[str, Any]]:
+    """Read an on-disk fingerprint index; empty if missing or unreadable."""
+    try:
+        with open(Path(path) if path else DEFAULT_INDEX_PATH, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return stored if isinstance(stored, dict) else {}
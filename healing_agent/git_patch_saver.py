@@ -1,11 +1,13 @@
 """Optional, repository-aware Git patch support.
 
 The repair engine does not require Git.  When enabled, this module produces a
-normal unified diff plus machine-readable metadata, verifies it with
-``git apply --check`` and can apply it only when the original file still has
-the expected content.  The text-patch API is intentionally language-neutral:
-Python function replacement is one adapter, while PowerShell, JavaScript,
-shell, and other text files can provide their own complete candidate source.
+normal unified diff plus machine-readable metadata, verifies it and can apply
+it only when the original file still has the expected content.  Patches this
+module wrote are checked and applied in process (see ``unified_diff``), so no
+Git binary is needed for them; other patches go through ``git apply``.
+The text-patch API is intentionally language-neutral: Python function
+replacement is one adapter, while PowerShell, JavaScript, shell, and other
+text files can provide their own complete candidate source.
 """
 
 from __future__ import annotations
@@ -16,11 +18,19 @@ import hashlib
 import json
 import os
 import subprocess
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
+from . import agent_logging
+from .atomic_io import atomic_write_text, locked_directory
 from .code_replacer import build_replacement_source
+from .unified_diff import NO_NEWLINE_MARKER, PatchApplyError, apply_unified_diff
+
+logger = agent_logging.get_logger(__name__)
+
+PATCH_FORMAT = "healing-agent-git-patch/v1"
 
 
 class GitPatchError(RuntimeError):
@@ -36,21 +46,35 @@ class GitRepository:
 
     @classmethod
     def discover(cls, path: Path | str) -> Optional["GitRepository"]:
+        """Find the repository containing ``path`` without running Git.
+
+        A directory counts as a work tree root when its ``.git`` is a
+        directory with a ``HEAD`` file or a ``gitdir:`` link (worktrees and
+        submodules).  Results are cached per directory for the life of the
+        process; ``clear_cache`` forgets them.
+        """
         candidate = Path(path).resolve()
         if candidate.is_file():
             candidate = candidate.parent
-        try:
-            result = subprocess.run(
-                ["git", "-C", str(candidate), "rev-parse", "--show-toplevel"],
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-        except OSError:
-            return None
-        if result.returncode != 0 or not result.stdout.strip():
-            return None
-        return cls(Path(result.stdout.strip()).resolve())
+        visited = []
+        found: Optional[GitRepository] = None
+        with _discovery_lock:
+            for directory in (candidate, *candidate.parents):
+                if directory in _discovery_cache:
+                    found = _discovery_cache[directory]
+                    break
+                visited.append(directory)
+                if _git_dir(directory) is not None:
+                    found = cls(directory)
+                    break
+            for directory in visited:
+                _discovery_cache[directory] = found
+        return found
+
+    @staticmethod
+    def clear_cache() -> None:
+        with _discovery_lock:
+            _discovery_cache.clear()
 
     def run(self, *arguments: str, check: bool = False) -> subprocess.CompletedProcess[str]:
         return subprocess.run(
@@ -61,8 +85,61 @@ class GitRepository:
         )
 
     def head(self) -> Optional[str]:
-        result = self.run("rev-parse", "HEAD")
-        return result.stdout.strip() if result.returncode == 0 else None
+        """The commit HEAD points at, read from the Git directory; None if unborn."""
+        git_dir = _git_dir(self.root)
+        if git_dir is None:
+            return None
+        try:
+            head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        if not head.startswith("ref:"):
+            return head or None
+        return _resolve_ref(git_dir, head[len("ref:"):].strip())
+
+
+_discovery_cache: Dict[Path, Optional[GitRepository]] = {}
+_discovery_lock = threading.Lock()
+
+
+def _git_dir(directory: Path) -> Optional[Path]:
+    """The Git directory of a work tree rooted at ``directory``, if it is one."""
+    dot_git = directory / ".git"
+    if dot_git.is_dir():
+        return dot_git if (dot_git / "HEAD").is_file() else None
+    if dot_git.is_file():
+        try:
+            link = dot_git.read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        if link.startswith("gitdir:"):
+            git_dir = (directory / link[len("gitdir:"):].strip()).resolve()
+            return git_dir if (git_dir / "HEAD").is_file() else None
+    return None
+
+
+def _resolve_ref(git_dir: Path, ref: str) -> Optional[str]:
+    """Resolve ``ref`` from loose or packed refs, following a worktree's common dir."""
+    directories = [git_dir]
+    try:
+        common = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+        directories.append((git_dir / common).resolve())
+    except OSError:
+        pass
+    for directory in directories:
+        try:
+            return (directory / ref).read_text(encoding="utf-8").strip() or None
+        except OSError:
+            pass
+        try:
+            with open(directory / "packed-refs", "r", encoding="utf-8") as packed:
+                for line in packed:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == ref:
+                        return parts[0]
+        except OSError:
+            pass
+    return None
 
 
 @dataclass(frozen=True)
@@ -83,8 +160,12 @@ def _sha256(text: str) -> str:
 
 
 def _repository_relative_path(source_path: Path, repository: Optional[GitRepository] = None) -> Tuple[Optional[Path], str]:
-    """Return a repository root and safe POSIX path for a source file."""
-    repo = repository or GitRepository.discover(source_path)
+    """Return a repository root and safe POSIX path for a source file.
+
+    ``repository`` is the already discovered repository, or None when there
+    is none; discovery is not repeated here.
+    """
+    repo = repository
     if repo is not None:
         try:
             relative = source_path.resolve().relative_to(repo.root)
@@ -118,19 +199,22 @@ def build_text_patch(
     path = Path(source_path).resolve()
     if original_source == candidate_source:
         raise GitPatchError("Candidate source is identical to the original")
-    repo_root, relative_path = _repository_relative_path(path, repository)
+    # A marker-only ``.git`` directory is enough to choose stable patch paths,
+    # but it is not enough to claim that Git can apply the patch.
+    repo = repository or GitRepository.discover(path)
+    _, relative_path = _repository_relative_path(path, repo)
     relative_path = _safe_relative_path(relative_path)
     patch = f"diff --git a/{relative_path} b/{relative_path}\n" + "".join(
-        difflib.unified_diff(
+        # difflib leaves a missing final newline unmarked, which would glue
+        # the last line to the next diff line.
+        line if line.endswith("\n") else f"{line}\n{NO_NEWLINE_MARKER}\n"
+        for line in difflib.unified_diff(
             original_source.splitlines(keepends=True),
             candidate_source.splitlines(keepends=True),
             fromfile=f"a/{relative_path}",
             tofile=f"b/{relative_path}",
         )
     )
-    # A marker-only ``.git`` directory is enough to choose stable patch paths,
-    # but it is not enough to claim that Git can apply the patch.
-    repo = repository or GitRepository.discover(path)
     return patch, repo, relative_path
 
 
@@ -155,7 +239,7 @@ def save_text_patch(
     metadata_path = patch_path.with_suffix(".json")
     patch_path.write_text(patch, encoding="utf-8")
     metadata: Dict[str, Any] = {
-        "format": "healing-agent-git-patch/v1",
+        "format": PATCH_FORMAT,
         "created_at": _datetime.datetime.now(_datetime.timezone.utc).isoformat(),
         "source_path": str(path),
         "repository_root": str(repository.root) if repository else None,
@@ -178,22 +262,78 @@ def save_text_patch(
     )
 
 
+def _own_patch_metadata(patch: Path) -> Optional[Dict[str, Any]]:
+    """The sidecar of a patch this module wrote, or None for foreign patches."""
+    try:
+        metadata = json.loads(patch.with_suffix(".json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(metadata, dict) or metadata.get("format") != PATCH_FORMAT:
+        return None
+    return metadata
+
+
+def _patch_target(metadata: Dict[str, Any], repository: Optional[GitRepository]) -> Path:
+    relative_path = _safe_relative_path(metadata["relative_path"])
+    root = repository.root if repository is not None else None
+    if root is None and metadata.get("repository_root"):
+        root = Path(metadata["repository_root"])
+    if root is None:
+        return Path(metadata["source_path"]).resolve()
+    target = (root / relative_path).resolve()
+    if root.resolve() not in target.parents:
+        raise GitPatchError("Patch target escapes the repository root")
+    return target
+
+
+def _patched_source(patch: Path, metadata: Dict[str, Any], target: Path) -> str:
+    """Apply ``patch`` to ``target``'s content in memory, checking both hashes."""
+    if not target.exists():
+        raise GitPatchError(f"Patch target does not exist: {target}")
+    original = target.read_text(encoding="utf-8")
+    if _sha256(original) != metadata["original_sha256"]:
+        raise GitPatchError("Patch base no longer matches the source file; refusing to overwrite changes")
+    try:
+        candidate = apply_unified_diff(original, patch.read_text(encoding="utf-8"))
+    except PatchApplyError as error:
+        raise GitPatchError(f"Patch does not apply: {error}") from error
+    if _sha256(candidate) != metadata["candidate_sha256"]:
+        raise GitPatchError("Patched source does not match the recorded candidate")
+    return candidate
+
+
 def verify_git_patch(
     patch_path: Path | str,
     *,
     repository: Optional[GitRepository] = None,
     working_directory: Optional[Path | str] = None,
 ) -> bool:
-    """Run ``git apply --check`` without changing the working tree."""
+    """Check that a patch applies, without changing the working tree.
+
+    Patches this module wrote are applied to an in-memory copy of the target
+    and compared with the recorded candidate hash; anything else is checked
+    with ``git apply --check``.
+    """
     patch = Path(patch_path).resolve()
+    metadata = _own_patch_metadata(patch)
+    if metadata is not None:
+        try:
+            _patched_source(patch, metadata, _patch_target(metadata, repository))
+        except (GitPatchError, OSError, UnicodeDecodeError):
+            return False
+        return True
+
     repo = repository or GitRepository.discover(patch.parent)
-    if repo is None:
-        # ``git apply --check`` can validate a patch in a directory containing
-        # a marker-only .git, which is useful before a repository is initialised.
-        cwd = Path(working_directory).resolve() if working_directory else patch.parent
-        result = subprocess.run(["git", "apply", "--check", str(patch)], cwd=cwd, capture_output=True, text=True, check=False)
-    else:
-        result = repo.run("apply", "--check", str(patch))
+    try:
+        if repo is None:
+            # ``git apply --check`` can validate a patch in a directory containing
+            # a marker-only .git, which is useful before a repository is initialised.
+            cwd = Path(working_directory).resolve() if working_directory else patch.parent
+            result = subprocess.run(["git", "apply", "--check", str(patch)], cwd=cwd, capture_output=True, text=True, check=False)
+        else:
+            result = repo.run("apply", "--check", str(patch))
+    except OSError:
+        return False  # no git binary
     return result.returncode == 0
 
 
@@ -203,29 +343,44 @@ def apply_git_patch(
     repository: Optional[GitRepository] = None,
     stage: bool = False,
 ) -> bool:
-    """Safely apply a generated patch after checking its original hash."""
+    """Safely apply a generated patch after checking its original hash.
+
+    The patched file is written atomically.  Only ``stage`` needs Git: the
+    file is then added to the index with ``git add``.
+    """
     patch = Path(patch_path).resolve()
-    metadata_path = patch.with_suffix(".json")
-    if not metadata_path.exists():
-        raise GitPatchError("Patch metadata is missing; refusing to apply an untracked patch")
-    metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+    metadata = _own_patch_metadata(patch)
+    if metadata is None:
+        if not patch.with_suffix(".json").exists():
+            raise GitPatchError("Patch metadata is missing; refusing to apply an untracked patch")
+        return _apply_with_git(patch, repository, stage)
     repo = repository or (
         GitRepository(Path(metadata["repository_root"]))
         if metadata.get("repository_root")
-        else GitRepository.discover(patch.parent)
+        else None
     )
+    if stage and repo is None:
+        raise GitPatchError("No Git repository was found for this patch")
+    target = _patch_target(metadata, repo)
+    with locked_directory(target):
+        candidate = _patched_source(patch, metadata, target)
+        atomic_write_text(target, candidate, sync_directory=True)
+    if stage:
+        result = repo.run("add", "--", target.relative_to(repo.root.resolve()).as_posix())
+        if result.returncode != 0:
+            raise GitPatchError(result.stderr.strip() or "git add failed")
+    return True
+
+
+def _apply_with_git(
+    patch: Path, repository: Optional[GitRepository], stage: bool
+) -> bool:
+    """Apply a patch this module did not write with ``git apply``."""
+    repo = repository or GitRepository.discover(patch.parent)
     if repo is None:
         raise GitPatchError("No Git repository was found for this patch")
-    relative_path = _safe_relative_path(metadata["relative_path"])
-    target = (repo.root / relative_path).resolve()
-    if repo.root not in target.parents and target != repo.root:
-        raise GitPatchError("Patch target escapes the repository root")
-    if not target.exists():
-        raise GitPatchError(f"Patch target does not exist: {target}")
-    if _sha256(target.read_text(encoding="utf-8")) != metadata["original_sha256"]:
-        raise GitPatchError("Patch base no longer matches the source file; refusing to overwrite changes")
-    if not verify_git_patch(patch, repository=repo):
-        raise GitPatchError("git apply --check rejected the patch")
+    # ``git apply`` checks every hunk before touching the tree, so a separate
+    # ``--check`` run would only repeat that work in another process.
     arguments = ["apply"]
     if stage:
         arguments.append("--index")
@@ -257,5 +412,5 @@ def save_git_patch(context: dict) -> Optional[str]:
             return None
         return str(artifact.patch_path)
     except Exception as error:
-        print(f"♣ Failed to save Git patch: {error}")
+        logger.warning("Failed to save Git patch: %s", error)
         return None
@@ -0,0 +1,220 @@
+"""Durable on-disk heal job queue.
+
+Applications in ``HEALING_MODE="queue"`` only capture, redact and enqueue a
+failure; a separate ``healing-agent worker`` process drains the queue and
+talks to the provider.  The queue is a spool directory::
+
+    <queue>/tmp/         partially written jobs (never read)
+    <queue>/incoming/    complete jobs waiting for a worker
+    <queue>/processing/  jobs claimed by a worker
+    <queue>/done/        finished jobs, with their result
+    <queue>/failed/      jobs that exhausted their attempts
+
+Every transition is a single ``os.replace``/``os.rename`` within one
+filesystem, so a job is always in exactly one state and concurrent workers
+can claim jobs without any other coordination.
+
+A worker holds an advisory lock (``fcntl.flock``) on each job from claim to
+finish.  The operating system drops the lock when the worker exits, so an
+unlocked job in ``processing`` was abandoned by a crashed worker, however
+long a healthy heal takes.  Failed and abandoned jobs count an attempt and
+become claimable again only after an exponential backoff.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from .atomic_io import atomic_write_text
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_QUEUE_DIR = Path.home() / ".healing_agent" / "queue"
+DEFAULT_RETRY_BACKOFF = 30.0
+MAX_RETRY_BACKOFF = 3600.0
+_STATES = ("tmp", "incoming", "processing", "done", "failed")
+# Without flock a job's owner cannot be detected: recovery falls back to age.
+HAS_CLAIM_LOCKS = fcntl is not None
+
+
+def _lock(path: Path) -> Optional[int]:
+    """Open ``path`` and lock it; None if it is gone or locked elsewhere."""
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        if fcntl is not None:
+            fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # Renamed or replaced while we waited: the lock is on a stale file.
+        if os.fstat(descriptor).st_ino != os.stat(path).st_ino:
+            raise FileNotFoundError(path)
+    except OSError:
+        os.close(descriptor)
+        return None
+    return descriptor
+
+
+def _read(descriptor: int) -> Dict[str, Any]:
+    with os.fdopen(os.dup(descriptor), "r", encoding="utf-8") as job_file:
+        job_file.seek(0)
+        return json.load(job_file)
+
+
+@dataclass
+class HealJob:
+    """A claimed job and its payload."""
+
+    job_id: str
+    path: Path
+    payload: Dict[str, Any]
+    descriptor: Optional[int] = field(default=None, repr=False)
+
+    def release(self) -> None:
+        """Drop the claim lock."""
+        if self.descriptor is not None:
+            os.close(self.descriptor)
+            self.descriptor = None
+
+    @property
+    def context(self) -> Dict[str, Any]:
+        return self.payload["context"]
+
+
+class HealQueue:
+    """A spool-directory queue of redacted failure contexts."""
+
+    def __init__(self, directory: Optional[Path | str] = None):
+        self.directory = Path(directory) if directory else DEFAULT_QUEUE_DIR
+        for state in _STATES:
+            (self.directory / state).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, state: str, job_id: str) -> Path:
+        return self.directory / state / f"{job_id}.json"
+
+    def enqueue(self, context: Dict[str, Any]) -> str:
+        """Durably add a context and return its job id."""
+        # Time-prefixed ids keep FIFO order under a plain directory sort.
+        job_id = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        payload = {"job_id": job_id, "attempts": 0, "context": context}
+        staged = atomic_write_text(
+            self._path("tmp", job_id),
+            json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str),
+        )
+        os.replace(staged, self._path("incoming", job_id))
+        return job_id
+
+    def pending(self) -> int:
+        return sum(1 for _ in (self.directory / "incoming").glob("*.json"))
+
+    def claim(self) -> Optional[HealJob]:
+        """Move the oldest due incoming job to ``processing`` and lock it.
+
+        Returns None when no job is due.  The lock is held until the job is
+        completed or failed.
+        """
+        now = time.time()
+        for candidate in sorted((self.directory / "incoming").glob("*.json")):
+            descriptor = _lock(candidate)
+            if descriptor is None:
+                continue  # another worker is claiming it
+            payload = _read(descriptor)
+            if payload.get("not_before", 0) > now:
+                os.close(descriptor)
+                continue  # backing off after a failed attempt
+            if fcntl is None:
+                os.close(descriptor)  # Windows cannot rename open files
+                descriptor = None
+            claimed = self._path("processing", candidate.stem)
+            try:
+                os.rename(candidate, claimed)
+            except FileNotFoundError:
+                if descriptor is not None:
+                    os.close(descriptor)
+                continue  # another worker won the race
+            os.utime(claimed)  # age-based recovery measures from now
+            return HealJob(candidate.stem, claimed, payload, descriptor)
+        return None
+
+    def claim_all(self, limit: int) -> Iterator[HealJob]:
+        """Claim up to ``limit`` jobs."""
+        for _ in range(limit):
+            job = self.claim()
+            if job is None:
+                return
+            yield job
+
+    def _finish(self, job: HealJob, state: str) -> Path:
+        destination = atomic_write_text(
+            self._path(state, job.job_id),
+            json.dumps(job.payload, ensure_ascii=False, indent=2, default=str),
+        )
+        job.path.unlink(missing_ok=True)
+        job.release()
+        job.path = destination
+        return destination
+
+    def complete(self, job: HealJob, result: Dict[str, Any]) -> Path:
+        """Record a result and move the job to ``done``."""
+        job.payload["result"] = result
+        return self._finish(job, "done")
+
+    def fail(
+        self,
+        job: HealJob,
+        reason: str,
+        max_attempts: int = 3,
+        backoff: float = DEFAULT_RETRY_BACKOFF,
+    ) -> Path:
+        """Retry the job later, or move it to ``failed`` after ``max_attempts``.
+
+        The n-th retry waits ``backoff * 2 ** (n - 1)`` seconds, at most an hour.
+        """
+        attempts = job.payload["attempts"] = job.payload.get("attempts", 0) + 1
+        job.payload["last_error"] = reason
+        if attempts >= max_attempts:
+            job.payload.pop("not_before", None)
+            return self._finish(job, "failed")
+        delay = min(backoff * 2 ** (attempts - 1), MAX_RETRY_BACKOFF)
+        job.payload["not_before"] = time.time() + delay
+        return self._finish(job, "incoming")
+
+    def recover_stale(
+        self,
+        max_attempts: int = 3,
+        backoff: float = DEFAULT_RETRY_BACKOFF,
+        older_than: float = 600.0,
+    ) -> int:
+        """Fail jobs abandoned in ``processing`` by a crashed worker.
+
+        A job is abandoned when no worker holds its lock; the lost run counts
+        as an attempt.  Without ``fcntl`` jobs claimed more than
+        ``older_than`` seconds ago are assumed abandoned, so call this only
+        while no other worker is running.
+        """
+        recovered = 0
+        cutoff = time.time() - older_than
+        for path in (self.directory / "processing").glob("*.json"):
+            descriptor = _lock(path)
+            if descriptor is None:
+                continue  # its worker is still running (or just finished)
+            job = HealJob(path.stem, path, _read(descriptor), descriptor)
+            if fcntl is None:
+                job.release()  # nothing to hold, and Windows cannot unlink open files
+                try:
+                    if path.stat().st_mtime >= cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+            self.fail(job, "worker exited while processing the job", max_attempts, backoff)
+            recovered += 1
+        return recovered
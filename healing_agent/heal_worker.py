@@ -0,0 +1,144 @@
+"""Healer daemon that drains the durable heal queue.
+
+The worker centralizes provider traffic: it claims queued failure contexts,
+asks the provider for a hint and a fix, and writes the fix as a reviewable
+patch through ``git_patch_saver``.  It never edits sources itself.  Jobs that
+describe the same failure (same file, function, error type and message) and
+are claimed together are healed once and share the result, and an optional
+rate limit caps provider requests per minute across all worker threads.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import agent_logging
+from .ai_code_fixer import fix
+from .ai_hint_generator import generate_hint
+from .git_patch_saver import save_git_patch
+from .heal_queue import DEFAULT_RETRY_BACKOFF, HAS_CLAIM_LOCKS, HealJob, HealQueue
+
+logger = agent_logging.get_logger(__name__)
+
+
+class RateLimiter:
+    """Token bucket allowing ``per_minute`` acquisitions per minute."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _batch_key(context: Dict[str, Any]) -> Tuple:
+    error = context.get("error", {})
+    fingerprint = error.get("fingerprint")
+    if isinstance(fingerprint, dict) and fingerprint.get("id"):
+        # Same bug, different values: one provider call serves the group.
+        return (context.get("function_info", {}).get("name"), fingerprint["id"])
+    return (
+        error.get("file"),
+        context.get("function_info", {}).get("name"),
+        error.get("type"),
+        error.get("message"),
+    )
+
+
+def process_job(job: HealJob, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Produce a hint, a fix and a patch for one queued context."""
+    context = job.context
+    context["ai_hint"] = generate_hint(context, config)
+    fixed_code = fix(context, config)
+    if not fixed_code:
+        return {"status": "no_fix", "ai_hint": context["ai_hint"]}
+    context["fixed_code"] = fixed_code
+    context["git_patch_dir"] = config.get("GIT_PATCH_DIR")
+    patch_path = save_git_patch(context)
+    return {
+        "status": "patched" if patch_path else "unpatchable",
+        "patch_path": patch_path,
+        "ai_hint": context["ai_hint"],
+    }
+
+
+def _heal_group(
+    queue: HealQueue,
+    group: List[HealJob],
+    config: Dict[str, Any],
+    limiter: Optional[RateLimiter],
+    max_attempts: int,
+    retry_backoff: float,
+) -> None:
+    leader = group[0]
+    try:
+        if limiter is not None:
+            limiter.acquire()
+        result = process_job(leader, config)
+    except Exception as error:
+        logger.error("Heal job %s failed: %s", leader.job_id, error)
+        for job in group:
+            queue.fail(job, str(error), max_attempts, retry_backoff)
+        return
+    logger.info("Heal job %s: %s", leader.job_id, result['status'])
+    queue.complete(leader, result)
+    for duplicate in group[1:]:
+        queue.complete(duplicate, dict(result, duplicate_of=leader.job_id))
+
+
+def run_worker(
+    queue: HealQueue,
+    config: Dict[str, Any],
+    *,
+    concurrency: int = 1,
+    rate_limit: Optional[float] = None,
+    once: bool = False,
+    poll_interval: float = 2.0,
+    max_attempts: int = 3,
+    retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+) -> int:
+    """Drain ``queue``; with ``once`` stop when it is empty.
+
+    Jobs abandoned by crashed workers are recovered at startup and, where
+    claims are locked, on every poll.  A failed job is retried after
+    ``retry_backoff`` seconds, doubling per attempt, up to ``max_attempts``.
+
+    Returns:
+        int: Number of jobs claimed.
+    """
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+    claimed = 0
+    if not HAS_CLAIM_LOCKS:
+        queue.recover_stale(max_attempts, retry_backoff)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            if HAS_CLAIM_LOCKS:
+                queue.recover_stale(max_attempts, retry_backoff)
+            jobs = list(queue.claim_all(concurrency * 4))
+            if not jobs:
+                if once:
+                    return claimed
+                time.sleep(poll_interval)
+                continue
+            claimed += len(jobs)
+            groups: Dict[Tuple, List[HealJob]] = {}
+            for job in jobs:
+                groups.setdefault(_batch_key(job.context), []).append(job)
+            futures = [
+                executor.submit(
+                    _heal_group, queue, group, config, limiter, max_attempts, retry_backoff
+                )
+                for group in groups.values()
+            ]
+            for future in futures:
+                future.result()
@@ -1,25 +1,49 @@
+import json
 from contextvars import ContextVar
 from functools import wraps
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, List, Optional
 
-from .agent_tools.tool_install_missing_module import install_missing_module
-from .ai_code_fixer import fix
+from . import agent_logging, metrics
+from .ai_code_fixer import ensure_healing_agent_decorator, fix
 from .ai_fix_saver import save_ai_fix
 from .ai_hint_generator import generate_hint
-from .code_backup import create_backup
-from .code_replacer import function_replacer
+from .background_healer import BackgroundHealer
+from .circuit_breaker import StormGuard
+from .artifact_retention import enforce_retention
+from .artifact_writer import get_artifact_writer
+from .code_backup import create_backup, prepare_backup
+from .code_replacer import RepairBatch, function_replacer
 from .config_loader import load_config
+from .error_classifier import TransientError, classify_transient, retry_transient
 from .exception_handler import capture_context
 from .exception_saver import save_context
-from .git_patch_saver import apply_git_patch, save_git_patch
+from .fingerprint import FingerprintIndex, fingerprint_exception
+from .hot_patcher import compile_definition, hot_patch, hot_patch_many
+from .prewarm import register_source
 from .redactor import redact
 
+logger = agent_logging.get_logger(__name__)
+
+# Banner text is built once, not on every heal.
+_BANNER = "✧" * 25
 
 _repair_attempts: ContextVar[Dict[str, int]] = ContextVar(
     "healing_agent_repair_attempts", default={}
 )
 
 
+_UNSET = object()
+
+# Set in sandbox verification workers: a failure there must surface as-is.
+_healing_suspended = False
+
+_storm_guard = StormGuard()
+_fingerprint_index = FingerprintIndex()
+# Functions hot-patched in the background without sandbox verification,
+# mapped to their repair key; the first successful call confirms the fix.
+_awaiting_confirmation: Dict[Callable[..., Any], str] = {}
+
+
 def _repair_key(func: Callable[..., Any]) -> str:
     """Return a stable key across reloads of the decorated function."""
     return f"{func.__module__}:{func.__qualname__}"
@@ -29,14 +53,28 @@ def healing_agent(
     func: Callable[..., Any] = None, **local_config
 ) -> Callable[..., Any]:
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        register_source(getattr(getattr(func, "__code__", None), "co_filename", None))
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             try:
-                return func(*args, **kwargs)
+                result = func(*args, **kwargs)
             except Exception as original_error:
+                if _healing_suspended:
+                    raise
                 try:
+                    # An open circuit re-raises before any config or capture work.
+                    fingerprint = fingerprint_exception(original_error, func)
+                    _fingerprint_index.record(fingerprint)
+                    storm_key = f"{_repair_key(func)}|{fingerprint.id}"
+                    if _storm_guard.is_open(storm_key):
+                        raise original_error
+
                     config, _ = load_config()
                     config.update(local_config)
+                    agent_logging.configure(config)
+                    if config.get("FINGERPRINT_INDEX", False):
+                        _fingerprint_index.maybe_flush(config.get("FINGERPRINT_INDEX_PATH"))
 
                     repair_key = _repair_key(func)
                     attempts = _repair_attempts.get()
@@ -49,39 +87,79 @@ def healing_agent(
                     ):
                         raise ValueError("MAX_ATTEMPTS must be a positive integer")
 
-                    if attempts_used >= max_attempts:
-                        print(
-                            f"♣ Healing stopped after {max_attempts} repair "
-                            f"attempt(s) for {func.__qualname__}."
-                        )
+                    if not _storm_guard.admit(storm_key, config):
                         raise original_error
 
-                    next_attempts = dict(attempts)
-                    next_attempts[repair_key] = attempts_used + 1
-                    token = _repair_attempts.set(next_attempts)
+                    healed = False
                     try:
-                        healed, result = _attempt_healing(
-                            func,
-                            args,
-                            kwargs,
-                            original_error,
-                            config,
-                            attempts_used + 1,
-                            max_attempts,
+                        if not _storm_guard.sample_repair(storm_key, config):
+                            _observe(func, args, kwargs, original_error, config)
+                            raise original_error
+
+                        healing_mode = config.get("HEALING_MODE", "blocking")
+                        transient = (
+                            classify_transient(original_error)
+                            if config.get("CLASSIFY_TRANSIENT", False)
+                            else None
                         )
-                        if healed:
-                            return result
+                        if transient is not None:
+                            # Not a code bug: never worth a provider call.
+                            if healing_mode == "blocking":
+                                healed, result = _recover_transient(
+                                    func, args, kwargs, transient, config
+                                )
+                                if healed:
+                                    return result
+                            raise original_error
+
+                        if healing_mode == "background":
+                            _schedule_background_heal(
+                                func, args, kwargs, original_error, config
+                            )
+                            raise original_error
+                        if healing_mode == "queue":
+                            _enqueue_heal(func, args, kwargs, original_error, config)
+                            raise original_error
+
+                        if attempts_used >= max_attempts:
+                            logger.warning(
+                                "Healing stopped after %d repair attempt(s) for %s.",
+                                max_attempts,
+                                func.__qualname__,
+                            )
+                            raise original_error
+
+                        next_attempts = dict(attempts)
+                        next_attempts[repair_key] = attempts_used + 1
+                        token = _repair_attempts.set(next_attempts)
+                        try:
+                            healed, result = _attempt_healing(
+                                func,
+                                args,
+                                kwargs,
+                                original_error,
+                                config,
+                                attempts_used + 1,
+                                max_attempts,
+                            )
+                            if healed:
+                                return result
+                        finally:
+                            _repair_attempts.reset(token)
                     finally:
-                        _repair_attempts.reset(token)
+                        _storm_guard.record_result(storm_key, healed, config)
                 except Exception as healing_error:
                     if healing_error is original_error:
                         raise
-                    print(f"♣ Healing failed: {healing_error}")
+                    logger.error("Healing failed: %s", healing_error)
                     raise original_error from healing_error
 
                 # AUTO_FIX=False, an invalid proposal, or an unavailable reload
                 # must never turn an application failure into an implicit None.
                 raise
+            if _awaiting_confirmation:
+                _confirm_background_fix(func)
+            return result
 
         return wrapper
 
@@ -100,123 +178,422 @@ def _attempt_healing(
     max_attempts: int,
 ) -> tuple[bool, Any]:
     """Try one repair and report whether a repaired result was produced."""
-    import importlib.util
-    import inspect
-    import sys
+    recorder = metrics.start_heal(func.__qualname__, config)
+    log_token = agent_logging.bind(function=func.__qualname__)
+    outcome = "error"
+    try:
+        healed, result = _heal(
+            func, args, kwargs, error, config, attempt_number, max_attempts
+        )
+        outcome = "healed" if healed else "unhealed"
+        return healed, result
+    finally:
+        recorder.finish(outcome)
+        agent_logging.unbind(log_token)
 
-    print("\n")
-    print(
-        f"♣ ⚕️⚕️⚕️  {'✧' * 25} HEALING AGENT STARTED "
-        f"{'✧' * 25} ⚕️⚕️⚕️ ♣"
+
+def _heal(
+    func: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+    error: Exception,
+    config: dict,
+    attempt_number: int,
+    max_attempts: int,
+) -> tuple[bool, Any]:
+    logger.info("⚕️⚕️⚕️  %s HEALING AGENT STARTED %s ⚕️⚕️⚕️ ♣", _BANNER, _BANNER)
+    logger.info("Repair attempt %d/%d", attempt_number, max_attempts)
+    logger.info("⚕️  Error caught: %s - %s", type(error).__name__, error)
+
+    # A missing module is repaired by installing it; no provider call needed.
+    if isinstance(error, (ImportError, ModuleNotFoundError)) and config.get(
+        "AUTO_SYSCHANGE", False
+    ):
+        from .agent_tools.tool_install_missing_module import install_missing_module
+
+        with metrics.current().stage("install"):
+            installed = install_missing_module(str(error), config.get("DEBUG", False))
+        if installed:
+            logger.info("Successfully installed missing module: %s", error)
+            return True, func(*args, **kwargs)
+
+    context = _capture(func, args, kwargs, error, config)
+    agent_logging.bind(heal_id=context["heal_id"])  # reset by _attempt_healing
+
+    if config.get("LOCAL_FIXERS", False) and config.get("AUTO_FIX", True):
+        with metrics.current().stage("local_fixes"):
+            healed, result = _try_local_fixes(func, args, kwargs, error, context, config)
+        if healed:
+            return True, result
+
+    fixed_code = _propose(context, config)
+
+    if not config.get("AUTO_FIX", True) or not fixed_code:
+        return False, None
+
+    if not _verify(func, args, kwargs, fixed_code, config):
+        return False, None
+
+    if not _apply(context, fixed_code, config):
+        return False, None
+
+    return _load_and_run(func, args, kwargs, config)
+
+
+def _recover_transient(
+    func: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+    transient: TransientError,
+    config: dict,
+) -> tuple[bool, Any]:
+    """Retry the undecorated function after a transient failure."""
+    retries = config.get("TRANSIENT_RETRIES", 3)
+    logger.info(
+        "Transient failure (%s) in %s; retrying up to %s time(s) without an AI repair.",
+        transient.reason,
+        func.__qualname__,
+        retries,
     )
-    print(f"♣ Repair attempt {attempt_number}/{max_attempts}")
-    print(f"♣ ⚕️  Error caught: {type(error).__name__} - {error}")
-
-    context = capture_context(
-        func=func,
-        args=args,
-        kwargs=kwargs,
-        config=config,
-        error=error,
+    recovered, outcome = retry_transient(
+        lambda: func(*args, **kwargs),
+        transient,
+        retries=retries,
+        backoff=config.get("TRANSIENT_BACKOFF", 0.5),
+        backoff_max=config.get("TRANSIENT_BACKOFF_MAX", 10.0),
     )
+    if recovered:
+        logger.info("%s recovered after retry.", func.__qualname__)
+        return True, outcome
+    if outcome is not None:
+        logger.warning("Retries did not recover %s: %s", func.__qualname__, outcome)
+    return False, None
+
+
+def _capture(
+    func: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+    error: Exception,
+    config: dict,
+) -> dict:
+    """Capture and redact the failure context; must run on the failing thread."""
+    recorder = metrics.current()
+    with recorder.stage("capture"):
+        context = capture_context(
+            func=func,
+            args=args,
+            kwargs=kwargs,
+            config=config,
+            error=error,
+        )
 
     # One chokepoint protects both provider submission and saved artifacts.
-    context = redact(context, config)
-    if config.get("DEBUG"):
-        print("♣ Context redacted for secrets before AI/disk usage")
+    with recorder.stage("redact"):
+        context = redact(context, config)
+    logger.debug("Context redacted for secrets before AI/disk usage")
+    if recorder.enabled:
+        recorder.heal_id = context.get("heal_id")
+        recorder.add("captured_bytes", len(json.dumps(context, default=str)))
+    return context
+
+
+def _observe(
+    func: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+    error: Exception,
+    config: dict,
+) -> None:
+    """Capture and save a failure that was sampled out of repair."""
+    if config.get("SAVE_EXCEPTIONS"):
+        context = _capture(func, args, kwargs, error, config)
+        _persist("context", save_context, context, config, config=config)
+
 
-    hint = generate_hint(context, config)
+def _git_mode(config: dict) -> str:
+    git_mode = config.get("GIT_MODE", "off")
+    if config.get("SAVE_GIT_PATCHES", False) and git_mode == "off":
+        # Preserve the 0.2.8 flag while making the richer mode explicit.
+        git_mode = "patch"
+    return git_mode
+
+
+def _propose(context: dict, config: dict) -> Optional[str]:
+    """Ask the provider for a hint and a fix, and save the review artifacts."""
+    recorder = metrics.current()
+    with recorder.stage("hint"):
+        hint = generate_hint(context, config)
     context["ai_hint"] = hint
 
-    print(
-        f"♣ In file: {context['error']['file']}, "
-        f"line {context['error']['line_number']}"
+    logger.info(
+        "In file: %s, line %s", context["error"]["file"], context["error"]["line_number"]
     )
-    print(
-        f"♣ Function name: {context['function_info']['name']}, "
-        f"starting line: "
-        f"{context['function_info']['starting_line_number']}"
+    logger.info(
+        "Function name: %s, starting line: %s",
+        context["function_info"]["name"],
+        context["function_info"]["starting_line_number"],
     )
-    print(f"♣ Error message: {context['error']['error_line']}")
-    print(f"♣ The Agent's hint: {hint}")
+    logger.info("Error message: %s", context["error"]["error_line"])
+    logger.info("The Agent's hint: %s", hint)
 
-    if config.get("DEBUG"):
-        print("\n♣ ⚕️  Detailed Error Information:")
-        print(f"♣ Error occurred in function: {context['error']['function_name']}")
-        print(f"♣ Error line: {context['error']['error_line']}")
-        if "source_lines" in context["function_info"]:
-            print("♣ Source code captured successfully")
+    logger.debug("⚕️  Detailed Error Information:")
+    logger.debug("Error occurred in function: %s", context["error"]["function_name"])
+    logger.debug("Error line: %s", context["error"]["error_line"])
+    if "source_lines" in context["function_info"]:
+        logger.debug("Source code captured successfully")
 
-    fixed_code = fix(context, config)
+    with recorder.stage("fix"):
+        fixed_code = fix(context, config)
     context["fixed_code"] = fixed_code
 
-    if config.get("DEBUG") and fixed_code:
-        print("♣ Successfully generated fixed code")
+    if fixed_code:
+        logger.debug("Successfully generated fixed code")
 
-    if config.get("SAVE_AI_FIXES", True) and fixed_code:
-        saved_fix = save_ai_fix(context)
-        if config.get("DEBUG"):
-            print(f"♣ AI fix saved to: {saved_fix}")
+    with recorder.stage("save"):
+        _save_fix_artifacts(context, fixed_code, config)
+    return fixed_code
 
-    git_mode = config.get("GIT_MODE", "off")
-    if config.get("SAVE_GIT_PATCHES", False) and git_mode == "off":
-        # Preserve the 0.2.8 flag while making the richer mode explicit.
-        git_mode = "patch"
 
-    if git_mode != "off" and fixed_code:
+def _persist(
+    kind: str,
+    write: Callable[..., Any],
+    *args: Any,
+    config: dict,
+    required: bool = False,
+) -> Any:
+    """Write an artifact inline, or queue it when ASYNC_ARTIFACTS is on.
+
+    Retention limits are applied after each write. Returns the writer's
+    result inline and None when queued.
+    """
+
+    def write_and_retain() -> Any:
+        saved = write(*args)
+        if isinstance(saved, str):
+            enforce_retention(saved, config)
+        return saved
+
+    if not config.get("ASYNC_ARTIFACTS", False):
+        return write_and_retain()
+    get_artifact_writer(config.get("ARTIFACT_QUEUE_SIZE", 256)).submit(
+        kind, write_and_retain, required=required
+    )
+    return None
+
+
+def _save_fix_artifacts(context: dict, fixed_code: Optional[str], config: dict) -> None:
+    """Save the reviewable fix, Git patch and exception context."""
+    from .git_patch_saver import save_git_patch
+
+    if config.get("SAVE_AI_FIXES", True) and fixed_code:
+        saved_fix = _persist("ai_fix", save_ai_fix, dict(context), config=config)
+        logger.debug("AI fix saved to: %s", saved_fix or "queued")
+
+    # The patch stays inline: it is checked against the unmodified working
+    # tree and GIT_MODE="apply" needs its path right away.
+    if _git_mode(config) != "off" and fixed_code:
         context["git_patch_dir"] = config.get("GIT_PATCH_DIR")
         saved_patch = save_git_patch(context)
         context["git_patch_path"] = saved_patch
-        if config.get("DEBUG"):
-            print(f"♣ Reviewable Git patch saved to: {saved_patch}")
+        enforce_retention(saved_patch, config)
+        logger.debug("Reviewable Git patch saved to: %s", saved_patch)
 
     if config.get("SAVE_EXCEPTIONS"):
-        saved_context = save_context(context)
-        if config.get("DEBUG"):
-            print(f"♣ Exception details saved to: {saved_context}")
+        saved_context = _persist(
+            "context", save_context, dict(context), config, config=config
+        )
+        logger.debug("Exception details saved to: %s", saved_context or "queued")
 
-    if isinstance(error, (ImportError, ModuleNotFoundError)) and config.get(
-        "AUTO_SYSCHANGE", False
-    ):
-        if install_missing_module(str(error), config.get("DEBUG", False)):
-            print(f"♣ Successfully installed missing module: {error}")
-            return True, func(*args, **kwargs)
 
-    if not config.get("AUTO_FIX", True) or not fixed_code:
-        return False, None
+def _try_local_fixes(
+    func: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+    error: Exception,
+    context: dict,
+    config: dict,
+) -> tuple[bool, Any]:
+    """Try deterministic repairs, each verified against the failing input."""
+    from .local_fixers import describe_fixer, iter_local_fixes
+
+    for name, candidate in iter_local_fixes(func, error):
+        fixed_code = ensure_healing_agent_decorator(candidate)
+        if config.get("VERIFY_IN_SANDBOX", False):
+            if not _verify(func, args, kwargs, fixed_code, config):
+                continue
+            result = _UNSET
+        else:
+            try:
+                repaired = compile_definition(
+                    fixed_code, func.__name__, func.__code__.co_filename, func.__globals__
+                )
+                result = repaired(*args, **kwargs)
+            except Exception as candidate_error:
+                logger.debug("Local fix %s did not pass: %s", name, candidate_error)
+                continue
+
+        logger.info("Local fix %s passed with the original arguments.", name)
+        context["ai_hint"] = f"Local fixer {name}: {describe_fixer(name)}"
+        context["fixed_code"] = fixed_code
+        _save_fix_artifacts(context, fixed_code, config)
+        if not _apply(context, fixed_code, config):
+            return False, None
+        if result is _UNSET:
+            return _load_and_run(func, args, kwargs, config)
+        # The candidate already ran in-process; install it without re-running.
+        try:
+            hot_patch(func)
+        except Exception as patch_error:
+            logger.warning(
+                "Fix for %s was written but could not be hot-patched; "
+                "it takes effect on the next import: %s",
+                func.__qualname__,
+                patch_error,
+            )
+        _log_finished()
+        return True, result
+    return False, None
+
+
+def _verify(
+    func: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+    fixed_code: str,
+    config: dict,
+) -> bool:
+    """Gate a candidate on sandbox verification when it is enabled."""
+    return _sandbox_verdict(func, args, kwargs, fixed_code, config) is not False
+
 
+def _sandbox_verdict(
+    func: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+    fixed_code: str,
+    config: dict,
+) -> Optional[bool]:
+    """True if the sandbox passed the candidate, False if it rejected it and
+    None if it was not verified (verification off or unavailable)."""
+    if not config.get("VERIFY_IN_SANDBOX", False):
+        return None
+    from .verification_sandbox import verify_in_sandbox
+
+    with metrics.current().stage("verify"):
+        verification = verify_in_sandbox(func, fixed_code, args, kwargs, config)
+    if verification.status == "unsupported":
+        logger.warning(
+            "Sandbox verification unavailable, verifying in-process: %s",
+            verification.message,
+        )
+        return None
+    if not verification.passed:
+        logger.warning(
+            "Sandbox rejected the fix (%s): %s %s",
+            verification.status,
+            verification.error_type or "",
+            verification.message,
+        )
+        return False
+    logger.debug("Fix passed sandbox verification with original arguments")
+    return True
+
+
+def _backup(context: dict, config: dict) -> Optional[str]:
+    """Back up the source file a fix is about to change."""
+    with metrics.current().stage("backup"):
+        return _write_backup(context, config)
+
+
+def _write_backup(context: dict, config: dict) -> Optional[str]:
+    if config.get("ASYNC_ARTIFACTS", False):
+        # Snapshot now, before the fix lands; only the write is deferred.
+        try:
+            saved_backup, write_backup = prepare_backup(context, config)
+            _persist("backup", write_backup, config=config, required=True)
+        except OSError as backup_error:
+            logger.warning("Failed to create backup: %s", backup_error)
+            saved_backup = None
+    else:
+        saved_backup = create_backup(context, config)
+        enforce_retention(saved_backup, config)
+    logger.debug("Created backup in backup folder: %s", saved_backup)
+    return saved_backup
+
+
+def _apply(context: dict, fixed_code: str, config: dict) -> bool:
+    """Back up the source and write the fix, directly or through Git."""
     if config.get("BACKUP_ENABLED", True):
-        saved_backup = create_backup(context)
-        context["backup_path"] = saved_backup
-        if config.get("DEBUG"):
-            print(f"♣ Created backup in backup folder: {saved_backup}")
+        context["backup_path"] = _backup(context, config)
 
-    if config.get("DEBUG"):
-        print(f"♣ Attempting to update file: {context['error']['file']}")
-        print(f"♣ Replacing function: {context['error']['function_name']}")
+    logger.debug("Attempting to update file: %s", context["error"]["file"])
+    logger.debug("Replacing function: %s", context["error"]["function_name"])
+
+    with metrics.current().stage("replace"):
+        return _write_fix(context, fixed_code, config)
+
+
+def _write_fix(context: dict, fixed_code: str, config: dict) -> bool:
+    if _git_mode(config) == "apply":
+        from .git_patch_saver import apply_git_patch
 
-    if git_mode == "apply":
         if not context.get("git_patch_path"):
-            print("♣ Git patch was not generated or did not pass git apply --check.")
-            return False, None
+            logger.warning("Git patch was not generated or did not pass git apply --check.")
+            return False
         try:
             apply_git_patch(
                 context["git_patch_path"],
                 stage=bool(config.get("GIT_STAGE", False)),
             )
         except Exception as git_error:
-            print(f"♣ Git refused the candidate patch: {git_error}")
-            return False, None
+            logger.warning("Git refused the candidate patch: %s", git_error)
+            return False
     elif not function_replacer(context, fixed_code):
-        print("♣ Generated fix could not be applied.")
-        return False, None
+        logger.warning("Generated fix could not be applied.")
+        return False
+    return True
+
+
+def _load_and_run(
+    func: Callable[..., Any], args: tuple, kwargs: dict, config: dict
+) -> tuple[bool, Any]:
+    """Load the written fix and re-run it with the original arguments."""
+    with metrics.current().stage("reload"):
+        return _reload_and_run(func, args, kwargs, config)
+
+
+def _reload_and_run(
+    func: Callable[..., Any], args: tuple, kwargs: dict, config: dict
+) -> tuple[bool, Any]:
+    import importlib.util
+    import inspect
+    import sys
 
     module_name = func.__module__
     if module_name not in sys.modules:
-        print(f"♣ Module {module_name} is not loaded; cannot verify the repair.")
+        logger.warning("Module %s is not loaded; cannot verify the repair.", module_name)
         return False, None
 
     module = sys.modules[module_name]
+
+    if config.get("RELOAD_MODE", "module") == "hotpatch":
+        try:
+            restore = hot_patch(func)
+        except Exception as patch_error:
+            logger.info("Hot patch unavailable, reloading module instead: %s", patch_error)
+        else:
+            # The module attribute is the healing wrapper around ``func``, so
+            # a still-failing repair is bounded by MAX_ATTEMPTS as usual.
+            try:
+                result = getattr(module, func.__name__, func)(*args, **kwargs)
+            except Exception:
+                restore()
+                raise
+            logger.info("Fixed code hot-patched and executed with original arguments.")
+            _log_finished()
+            return True, result
+
     module_file = inspect.getfile(module)
     spec = importlib.util.spec_from_file_location(module_name, module_file)
     if spec is None or spec.loader is None:
@@ -235,9 +612,164 @@ def _attempt_healing(
         # sys.modules. The source backup remains available for explicit rollback.
         sys.modules[module_name] = module
         raise
-    print("♣ Fixed code executed with original arguments.")
-    print(
-        f"♣ ⚕️⚕️⚕️  {'✧' * 25} HEALING AGENT FINISHED "
-        f"{'✧' * 25} ⚕️⚕️⚕️  ♣\n"
-    )
+    logger.info("Fixed code executed with original arguments.")
+    _log_finished()
     return True, result
+
+
+def _log_finished() -> None:
+    logger.info("⚕️⚕️⚕️  %s HEALING AGENT FINISHED %s ⚕️⚕️⚕️  ♣", _BANNER, _BANNER)
+
+
+def _apply_batch(file_path: str, repairs: List[tuple], config: dict) -> bool:
+    """Back up ``file_path`` once and write every ``(context, fixed_code)`` in one splice."""
+    backup_path = None
+    if config.get("BACKUP_ENABLED", True):
+        backup_path = _backup(repairs[0][0], config)
+    batch = RepairBatch(file_path)
+    for context, fixed_code in repairs:
+        context["backup_path"] = backup_path
+        if not batch.add(context["function_info"]["name"], fixed_code):
+            return False
+    try:
+        with metrics.current().stage("replace"):
+            return batch.apply()
+    except Exception as write_error:
+        logger.error("Error updating file %s: %s", file_path, write_error)
+        return False
+
+
+def _heal_in_background(jobs: List[tuple]) -> List[bool]:
+    """Run the provider and write stages for failures captured earlier.
+
+    The failing calls have already re-raised, so repairs are not re-run with
+    their arguments (unless sandbox verification is enabled); they are
+    hot-patched into the live functions so later calls pick them up.  Fixes
+    for functions in the same file are written in one splice and patched
+    together.  The batch is recorded as one heal in the metrics.
+
+    Only fixes that passed sandbox verification count as healed.  Other
+    installed fixes still count as a failed attempt until a later call of
+    the patched function succeeds (see ``_confirm_background_fix``).
+    """
+    names = ", ".join(job[0].__qualname__ for job in jobs)
+    recorder = metrics.start_heal(names, jobs[0][4])
+    log_token = agent_logging.bind(function=names)
+    outcomes: List[Optional[bool]] = []
+    try:
+        outcomes = _heal_batch(jobs)
+    finally:
+        agent_logging.unbind(log_token)
+        if outcomes and all(outcome is True for outcome in outcomes):
+            recorder.finish("healed")
+        elif outcomes and all(outcome is not False for outcome in outcomes):
+            recorder.finish("installed")
+        else:
+            recorder.finish("unhealed" if outcomes else "error")
+    for job, outcome in zip(jobs, outcomes):
+        if outcome is None:
+            _awaiting_confirmation[job[0]] = _repair_key(job[0])
+    return [outcome is True for outcome in outcomes]
+
+
+def _heal_batch(jobs: List[tuple]) -> List[Optional[bool]]:
+    """Per job: True if installed and verified, None if installed but not
+    verified, False if not installed."""
+    outcomes: List[Optional[bool]] = [False] * len(jobs)
+    verdicts: Dict[int, Optional[bool]] = {}
+    by_file: Dict[str, List[int]] = {}
+    fixes: Dict[int, str] = {}
+    for index, (func, args, kwargs, context, config) in enumerate(jobs):
+        fixed_code = _propose(context, config)
+        if not config.get("AUTO_FIX", True) or not fixed_code:
+            continue
+        verdicts[index] = _sandbox_verdict(func, args, kwargs, fixed_code, config)
+        if verdicts[index] is False:
+            continue
+        fixes[index] = fixed_code
+        if _git_mode(config) == "apply":
+            # Each patch is checked against the unmodified file; apply alone.
+            if _apply(context, fixed_code, config) and _install_background_fix([func]):
+                outcomes[index] = verdicts[index]
+            continue
+        by_file.setdefault(context["error"]["file"], []).append(index)
+
+    for file_path, indexes in by_file.items():
+        repairs = [(jobs[index][3], fixes[index]) for index in indexes]
+        if not _apply_batch(file_path, repairs, jobs[indexes[0]][4]):
+            continue
+        if _install_background_fix([jobs[index][0] for index in indexes]):
+            for index in indexes:
+                outcomes[index] = verdicts[index]
+    return outcomes
+
+
+def _install_background_fix(funcs: List[Callable[..., Any]]) -> bool:
+    """Hot-patch written fixes into their live functions.
+
+    Returns False when the fix is only on disk: the running functions still
+    fail, so the heal counts against them rather than as healed.
+    """
+    names = ", ".join(func.__qualname__ for func in funcs)
+    try:
+        hot_patch_many(funcs)
+    except Exception as patch_error:
+        logger.warning(
+            "Fix for %s was written but could not be hot-patched; "
+            "it takes effect on the next import: %s",
+            names,
+            patch_error,
+        )
+        return False
+    logger.info("Background heal committed for %s.", names)
+    return True
+
+
+_background_healer = BackgroundHealer(_heal_in_background)
+
+
+def _confirm_background_fix(func: Callable[..., Any]) -> None:
+    """A hot-patched function ran successfully: its fix worked."""
+    repair_key = _awaiting_confirmation.pop(func, None)
+    if repair_key is not None:
+        _background_healer.confirm(repair_key)
+
+
+def _schedule_background_heal(
+    func: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+    error: Exception,
+    config: dict,
+) -> None:
+    """Capture now, on the failing thread, and queue the repair."""
+    repair_key = _repair_key(func)
+    if not _background_healer.accepts(repair_key, config["MAX_ATTEMPTS"]):
+        return
+    context = _capture(func, args, kwargs, error, config)
+    if _background_healer.submit(
+        repair_key,
+        (func, args, kwargs, context, config),
+        batch_window=float(config.get("REPAIR_BATCH_WINDOW", 0.0)),
+    ):
+        logger.info("Healing of %s continues in the background.", func.__qualname__)
+
+
+def _enqueue_heal(
+    func: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+    error: Exception,
+    config: dict,
+) -> None:
+    """Capture and durably queue the failure for a ``healing-agent worker``."""
+    from .heal_queue import HealQueue
+
+    context = _capture(func, args, kwargs, error, config)
+    job_id = HealQueue(config.get("HEAL_QUEUE_DIR")).enqueue(context)
+    logger.info("Heal job %s queued for %s.", job_id, func.__qualname__)
+
+
+def wait_for_background_heals(timeout: Optional[float] = None) -> bool:
+    """Block until queued background heals finish; False on timeout."""
+    return _background_healer.wait(timeout)
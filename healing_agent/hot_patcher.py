@@ -0,0 +1,142 @@
+"""In-place hot patching of a repaired function.
+
+Re-executing a whole module after a repair re-runs every module-level side
+effect and leaves existing references pointing at stale objects.  Hot patching
+compiles only the repaired function definition from the updated source file,
+inside the original module globals, and swaps its code object into the live
+function.  The decorator wrapper, the module attribute and every other
+reference keep their identity and run the new code on their next call.
+"""
+
+from __future__ import annotations
+
+import ast
+import copy
+from types import FunctionType
+from typing import Any, Callable, Iterable, Optional
+
+from .ast_cache import parse_source
+
+
+class HotPatchError(RuntimeError):
+    """Raised when a function cannot be patched in place safely."""
+
+
+def _is_healing_decorator(decorator: ast.expr) -> bool:
+    target = decorator.func if isinstance(decorator, ast.Call) else decorator
+    if isinstance(target, ast.Attribute):
+        return target.attr == "healing_agent"
+    return isinstance(target, ast.Name) and target.id == "healing_agent"
+
+
+def _function_node(tree: ast.Module, name: str) -> ast.AST:
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == name:
+            # The tree is shared through the parse cache; never mutate it.
+            return copy.copy(node)
+    raise HotPatchError(f"Could not find top-level function {name}")
+
+
+def compile_definition(
+    source: str, name: str, file_path: str, namespace: dict
+) -> FunctionType:
+    """Compile the top-level function ``name`` from ``source`` in ``namespace``.
+
+    Decorators are stripped: the result is the bare function the healing
+    wrapper calls.  Decorators applied *below* ``@healing_agent`` would be
+    part of that function and cannot be reproduced safely, so such
+    definitions are rejected.
+    """
+    node = _function_node(parse_source(source, file_path), name)
+    healing_indexes = [
+        index
+        for index, decorator in enumerate(node.decorator_list)
+        if _is_healing_decorator(decorator)
+    ]
+    if healing_indexes and healing_indexes[-1] != len(node.decorator_list) - 1:
+        raise HotPatchError(f"{name} has decorators below @healing_agent; reload instead")
+    node.decorator_list = []
+
+    # Compiling against the real file path keeps tracebacks on real lines.
+    code = compile(ast.Module(body=[node], type_ignores=[]), file_path, "exec")
+    local_namespace: dict = {}
+    exec(code, namespace, local_namespace)
+    return local_namespace[name]
+
+
+def compile_function(
+    func: Callable[..., Any], source: Optional[str] = None
+) -> FunctionType:
+    """Compile the current on-disk definition of ``func`` in its own globals."""
+    if not isinstance(func, FunctionType):
+        raise HotPatchError(f"{func!r} is not a plain Python function")
+    file_path = func.__code__.co_filename
+    if source is None:
+        with open(file_path, "r", encoding="utf-8") as file:
+            source = file.read()
+    return compile_definition(source, func.__name__, file_path, func.__globals__)
+
+
+def hot_patch(
+    func: Callable[..., Any], source: Optional[str] = None
+) -> Callable[[], None]:
+    """Swap ``func``'s code for its repaired definition.
+
+    Returns:
+        Callable[[], None]: Restores the previous code, defaults and metadata.
+    """
+    replacement = compile_function(func, source)
+    previous = (
+        func.__code__,
+        func.__defaults__,
+        func.__kwdefaults__,
+        func.__annotations__,
+        func.__doc__,
+    )
+    try:
+        func.__code__ = replacement.__code__
+    except ValueError as error:
+        # Closure shapes differ; only a reload can rebuild the function.
+        raise HotPatchError(str(error)) from error
+    func.__defaults__ = replacement.__defaults__
+    func.__kwdefaults__ = replacement.__kwdefaults__
+    func.__annotations__ = replacement.__annotations__
+    func.__doc__ = replacement.__doc__
+
+    def restore() -> None:
+        (
+            func.__code__,
+            func.__defaults__,
+            func.__kwdefaults__,
+            func.__annotations__,
+            func.__doc__,
+        ) = previous
+
+    return restore
+
+
+def hot_patch_many(funcs: Iterable[Callable[..., Any]]) -> Callable[[], None]:
+    """Hot-patch several functions, reading each source file once.
+
+    All functions are patched or none: if one cannot be, the ones already
+    patched are restored and the ``HotPatchError`` propagates.
+    """
+    sources: dict = {}
+    restores = []
+    try:
+        for func in funcs:
+            file_path = getattr(getattr(func, "__code__", None), "co_filename", None)
+            if file_path is not None and file_path not in sources:
+                with open(file_path, "r", encoding="utf-8") as file:
+                    sources[file_path] = file.read()
+            restores.append(hot_patch(func, sources.get(file_path)))
+    except BaseException:
+        for restore in reversed(restores):
+            restore()
+        raise
+
+    def restore_all() -> None:
+        for restore in reversed(restores):
+            restore()
+
+    return restore_all
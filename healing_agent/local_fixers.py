@@ -0,0 +1,361 @@
+"""Deterministic repairs tried before any provider call.
+
+Many failures are mechanical: a dict field was renamed, an attribute or
+module name has a typo, a JSON payload carries a BOM or a trailing comma.
+Local fixers recognize such failures from the exception and the failing
+frame and produce candidate functions through small source edits, splicing
+only the affected expression so formatting and comments survive.  The
+caller verifies every candidate against the failing input; the provider is
+reached only when no candidate passes.
+
+A fixer is a generator registered for an exception type::
+
+    @register_local_fixer(KeyError)
+    def my_fixer(site: FailureSite) -> Iterator[str]:
+        yield candidate_source
+
+Only top-level functions are rewritten, like the file replacer.
+"""
+
+from __future__ import annotations
+
+import ast
+import difflib
+import importlib
+import json
+import pkgutil
+import re
+import sys
+from dataclasses import dataclass
+from types import FrameType
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from . import agent_logging
+from .exception_handler import get_function_source
+
+logger = agent_logging.get_logger(__name__)
+
+LocalFixer = Callable[["FailureSite"], Iterator[str]]
+
+_FIXERS: List[Tuple[type, str, LocalFixer]] = []
+
+# String literals are matched first so commas inside them are left alone.
+_TRAILING_COMMA = re.compile(r'("(?:\\.|[^"\\])*")|,(\s*[}\]])')
+
+
+def register_local_fixer(error_type: type) -> Callable[[LocalFixer], LocalFixer]:
+    """Register a fixer for failures that are instances of ``error_type``."""
+
+    def decorator(fixer: LocalFixer) -> LocalFixer:
+        _FIXERS.append((error_type, fixer.__name__, fixer))
+        return fixer
+
+    return decorator
+
+
+@dataclass
+class FailureSite:
+    """The failing function's source and the frame that raised inside it."""
+
+    func: Callable[..., Any]
+    error: BaseException
+    lines: List[str]
+    start_line: int
+    tree: ast.AST
+    frame: Optional[FrameType]
+    line_number: Optional[int]
+
+    def nodes_on_failing_line(self, node_type: type) -> Iterator[Any]:
+        """AST nodes of ``node_type`` on the line that raised."""
+        if self.line_number is None:
+            return
+        relative = self.line_number - self.start_line + 1
+        for node in ast.walk(self.tree):
+            if isinstance(node, node_type) and node.lineno <= relative <= node.end_lineno:
+                yield node
+
+    def segment(self, node: ast.AST) -> str:
+        return ast.get_source_segment("".join(self.lines), node)
+
+    def replace(self, edits: List[Tuple[ast.AST, str]]) -> str:
+        """Splice ``(node, text)`` replacements into the function source."""
+        lines = list(self.lines)
+        # Apply right-to-left, bottom-up, so earlier offsets stay valid.
+        for node, text in sorted(
+            edits, key=lambda edit: (edit[0].lineno, edit[0].col_offset), reverse=True
+        ):
+            first, last = node.lineno - 1, node.end_lineno - 1
+            prefix = lines[first].encode("utf-8")[: node.col_offset].decode("utf-8")
+            suffix = lines[last].encode("utf-8")[node.end_col_offset :].decode("utf-8")
+            lines[first : last + 1] = [prefix + text + suffix]
+        return "".join(lines)
+
+
+def _failure_site(func: Callable[..., Any], error: BaseException) -> Optional[FailureSite]:
+    code = getattr(func, "__code__", None)
+    if code is None or func.__qualname__ != func.__name__:
+        return None
+    try:
+        lines, start_line = get_function_source(func)
+        tree = ast.parse("".join(lines))
+    except (OSError, TypeError, SyntaxError):
+        return None
+
+    frame = line_number = None
+    traceback = error.__traceback__
+    while traceback is not None:
+        if traceback.tb_frame.f_code is code:
+            frame, line_number = traceback.tb_frame, traceback.tb_lineno
+        traceback = traceback.tb_next
+    return FailureSite(func, error, list(lines), start_line, tree, frame, line_number)
+
+
+def iter_local_fixes(
+    func: Callable[..., Any], error: BaseException
+) -> Iterator[Tuple[str, str]]:
+    """Yield ``(fixer_name, candidate_source)`` for ``error`` raised by ``func``."""
+    site = _failure_site(func, error)
+    if site is None:
+        return
+    for error_type, name, fixer in _FIXERS:
+        if not isinstance(error, error_type):
+            continue
+        try:
+            for candidate in fixer(site):
+                yield name, candidate
+        except Exception as fixer_error:
+            logger.warning("Local fixer %s failed: %s", name, fixer_error)
+
+
+def _normalized_name(name: str) -> str:
+    return re.sub(r"[\W_]+", "", name).lower()
+
+
+def closest_name(missing: str, available: List[str]) -> Optional[str]:
+    """The one name in ``available`` that ``missing`` most likely meant."""
+    normalized = _normalized_name(missing)
+    same_spelling = [name for name in available if _normalized_name(name) == normalized]
+    if len(same_spelling) == 1:
+        return same_spelling[0]
+    if same_spelling:
+        return None  # ambiguous
+    matches = difflib.get_close_matches(missing, available, n=2, cutoff=0.75)
+    if len(matches) == 2 and (
+        difflib.SequenceMatcher(None, missing, matches[0]).ratio()
+        == difflib.SequenceMatcher(None, missing, matches[1]).ratio()
+    ):
+        return None
+    return matches[0] if matches else None
+
+
+def _pure_expression(node: ast.AST) -> bool:
+    """Names and constant subscripts: safe to evaluate and to repeat."""
+    if isinstance(node, ast.Name):
+        return True
+    if isinstance(node, ast.Subscript):
+        return isinstance(node.slice, ast.Constant) and _pure_expression(node.value)
+    return False
+
+
+@register_local_fixer(KeyError)
+def renamed_key(site: FailureSite) -> Iterator[str]:
+    """``data["old"]`` where the mapping now holds a similarly named key."""
+    if site.frame is None or not site.error.args:
+        return
+    missing = site.error.args[0]
+    for node in site.nodes_on_failing_line(ast.Subscript):
+        if not (
+            isinstance(node.ctx, ast.Load)
+            and isinstance(node.slice, ast.Constant)
+            and node.slice.value == missing
+            and _pure_expression(node.value)
+        ):
+            continue
+        container_source = site.segment(node.value)
+        try:
+            container = eval(
+                compile(ast.Expression(node.value), "<local-fixer>", "eval"),
+                site.frame.f_globals,
+                dict(site.frame.f_locals),
+            )
+            keys = [key for key in container.keys() if isinstance(key, str)]
+        except Exception:
+            continue
+        replacement = closest_name(str(missing), keys) if isinstance(missing, str) else None
+        if replacement is None:
+            continue
+        # Keep inputs that still use the old name working.
+        yield site.replace([
+            (
+                node.slice,
+                f"{missing!r} if {missing!r} in {container_source} else {replacement!r}",
+            )
+        ])
+
+
+@register_local_fixer(AttributeError)
+def misspelled_attribute(site: FailureSite) -> Iterator[str]:
+    """``obj.nmae`` where ``obj`` has ``name``."""
+    missing = getattr(site.error, "name", None)
+    owner = getattr(site.error, "obj", None)
+    if not missing or owner is None:
+        return
+    available = [name for name in dir(owner) if not name.startswith("__")]
+    replacement = closest_name(missing, available)
+    if replacement is None:
+        return
+    edits = []
+    for node in site.nodes_on_failing_line(ast.Attribute):
+        if node.attr != missing or node.end_lineno != node.lineno:
+            continue
+        # The attribute name always ends the node; splice just the name.
+        name_node = ast.Name(missing)
+        name_node.lineno = name_node.end_lineno = node.end_lineno
+        name_node.end_col_offset = node.end_col_offset
+        name_node.col_offset = node.end_col_offset - len(missing.encode("utf-8"))
+        edits.append((name_node, replacement))
+    if edits:
+        yield site.replace(edits)
+
+
+def _importable_names(package: str) -> List[str]:
+    """Top-level module names, or the submodules of ``package``."""
+    if package:
+        try:
+            parent = importlib.import_module(package)
+        except ImportError:
+            return []
+        paths = getattr(parent, "__path__", None)
+        return [info.name for info in pkgutil.iter_modules(paths)] if paths is not None else []
+    names = set(sys.stdlib_module_names) | {info.name for info in pkgutil.iter_modules()}
+    names.update(name for name in sys.modules if "." not in name)
+    return sorted(name for name in names if not name.startswith("_"))
+
+
+def _renamed_module(module: str, missing: str, fixed: str) -> Optional[str]:
+    if module == missing or module.startswith(missing + "."):
+        return fixed + module[len(missing):]
+    return None
+
+
+@register_local_fixer(ModuleNotFoundError)
+def misspelled_module(site: FailureSite) -> Iterator[str]:
+    """``import jsn`` inside the function where ``json`` is importable."""
+    missing = getattr(site.error, "name", None)
+    if not missing:
+        return
+    package, _, leaf = missing.rpartition(".")
+    replacement = closest_name(leaf, _importable_names(package))
+    if replacement is None:
+        return
+    fixed = f"{package}.{replacement}" if package else replacement
+    edits: List[Tuple[ast.AST, str]] = []
+    for node in site.nodes_on_failing_line(ast.Import):
+        for alias in node.names:
+            name = _renamed_module(alias.name, missing, fixed)
+            if name is None:
+                continue
+            if alias.asname:
+                edits.append((alias, f"{name} as {alias.asname}"))
+            elif "." not in alias.name:
+                edits.append((alias, f"{name} as {alias.name}"))  # keep the bound name
+            elif package:
+                edits.append((alias, name))  # binds the same top-level name
+            # else: renaming the top-level package would rebind its name
+    for node in site.nodes_on_failing_line(ast.ImportFrom):
+        name = _renamed_module(node.module or "", missing, fixed) if not node.level else None
+        if name is None:
+            continue
+        statement = re.sub(
+            r"^(from\s+)" + re.escape(node.module),
+            lambda match: match.group(1) + name,
+            site.segment(node),
+            count=1,
+        )
+        edits.append((node, statement))
+    if edits:
+        yield site.replace(edits)
+
+
+def normalize_json_text(text: Any) -> Any:
+    """Strip a UTF-8 BOM and trailing commas before ``}``/``]``."""
+    if isinstance(text, (bytes, bytearray)):
+        text = bytes(text).decode("utf-8-sig")
+    if not isinstance(text, str):
+        return text
+    return _TRAILING_COMMA.sub(
+        lambda match: match.group(1) or match.group(2), text.lstrip("\ufeff")
+    )
+
+
+_JSON_HELPER = '''def _normalize_json_text(text):
+    # Added by healing_agent: tolerate a UTF-8 BOM and trailing commas.
+    import re
+    if isinstance(text, (bytes, bytearray)):
+        text = bytes(text).decode("utf-8-sig")
+    return re.sub(
+        r'("(?:\\\\.|[^"\\\\])*")|,(\\s*[}\\]])',
+        lambda match: match.group(1) or match.group(2),
+        text.lstrip("\\ufeff"),
+    )
+'''
+
+
+@register_local_fixer(json.JSONDecodeError)
+def lenient_json(site: FailureSite) -> Iterator[str]:
+    """``json.loads``/``json.load`` on a payload with a BOM or trailing comma."""
+    document = getattr(site.error, "doc", None)
+    try:
+        json.loads(normalize_json_text(document))
+    except (TypeError, ValueError):
+        return  # normalizing would not help; leave it to the provider
+    edits = []
+    for node in site.nodes_on_failing_line(ast.Call):
+        target = node.func
+        if not (
+            isinstance(target, ast.Attribute)
+            and isinstance(target.value, ast.Name)
+            and target.value.id == "json"
+            and target.attr in ("loads", "load")
+            and node.args
+        ):
+            continue
+        argument = site.segment(node.args[0])
+        if target.attr == "load":
+            argument = f"{argument}.read()"
+        rest = "".join(f", {site.segment(extra)}" for extra in node.args[1:])
+        rest += "".join(
+            f", {keyword.arg}={site.segment(keyword.value)}"
+            if keyword.arg
+            else f", **{site.segment(keyword.value)}"
+            for keyword in node.keywords
+        )
+        edits.append((node, f"json.loads(_normalize_json_text({argument}){rest})"))
+    if not edits:
+        return
+
+    # The helper goes first in the body, after a docstring if there is one.
+    patched_source = site.replace(edits)
+    body = ast.parse(patched_source).body[0].body
+    has_docstring = (
+        isinstance(body[0], ast.Expr)
+        and isinstance(body[0].value, ast.Constant)
+        and isinstance(body[0].value.value, str)
+    )
+    anchor = body[1] if has_docstring and len(body) > 1 else body[0]
+    lines = patched_source.splitlines(keepends=True)
+    anchor_line = lines[anchor.lineno - 1]
+    if anchor.lineno == 1 or anchor_line[: anchor.col_offset].strip():
+        return  # a one-line body has nowhere to put the helper
+    indent = anchor_line[: len(anchor_line) - len(anchor_line.lstrip())]
+    helper = [indent + line if line.strip() else line for line in _JSON_HELPER.splitlines(True)]
+    lines[anchor.lineno - 1 : anchor.lineno - 1] = helper + ["\n"]
+    yield "".join(lines)
+
+
+def describe_fixer(name: str) -> str:
+    """One-line description of a registered fixer."""
+    for _, fixer_name, fixer in _FIXERS:
+        if fixer_name == name:
+            return (fixer.__doc__ or name).strip().splitlines()[0]
+    return name
@@ -0,0 +1,384 @@
+"""Per-heal timings and counters with pluggable sinks.
+
+Every heal gets a recorder that times its stages (capture, redact, hint,
+fix, save, verify, backup, replace, reload, ...) with a monotonic clock and
+counts what it spent: context bytes captured, prompt and completion tokens,
+cache hits.  When the heal ends, the record and its outcome go to the sinks
+named in ``METRICS_SINKS``:
+
+    memory      process-wide aggregates (``get_registry()``)
+    prometheus  ``healing_agent.prom`` in Prometheus text exposition format
+    jsonl       ``heals.jsonl``, one record per line
+    otlp        ``spans.jsonl``, OTLP/JSON spans (a heal span with one child
+                span per stage) for any OpenTelemetry collector's file receiver
+
+Files are written under ``METRICS_DIR``.  With no sinks configured every heal
+uses ``NULL_RECORDER``, which only names the stage for log records, so
+disabled metrics cost next to nothing.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import agent_logging
+from .atomic_io import atomic_write_text
+
+logger = agent_logging.get_logger(__name__)
+
+DEFAULT_METRICS_DIR = Path.home() / ".healing_agent" / "metrics"
+
+
+class _NullStage:
+    """Names the stage in log records without timing it."""
+
+    __slots__ = ("name", "token")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.token = agent_logging.bind(stage=self.name)
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        agent_logging.unbind(self.token)
+        return False
+
+
+class NullRecorder:
+    """The recorder used when metrics are disabled; every call is a no-op."""
+
+    enabled = False
+    heal_id: Optional[str] = None
+
+    def stage(self, name: str) -> _NullStage:
+        return _NullStage(name)
+
+    def add(self, counter: str, value: float = 1) -> None:
+        pass
+
+    def finish(self, outcome: str) -> None:
+        pass
+
+
+NULL_RECORDER = NullRecorder()
+_current: ContextVar[Any] = ContextVar("healing_agent_metrics", default=NULL_RECORDER)
+
+
+class _Stage(_NullStage):
+    __slots__ = ("recorder", "started")
+
+    def __init__(self, recorder: "HealRecorder", name: str):
+        super().__init__(name)
+        self.recorder = recorder
+
+    def __enter__(self) -> None:
+        super().__enter__()
+        self.started = time.monotonic_ns()
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        ended = time.monotonic_ns()
+        self.recorder.stages.append((self.name, self.started, ended))
+        return super().__exit__(*exc_info)
+
+
+def _parse_cache_hits() -> int:
+    from .ast_cache import parse_source
+
+    return parse_source.cache_info().hits
+
+
+class HealRecorder:
+    """Timings and counters for one heal."""
+
+    enabled = True
+
+    def __init__(self, function: str, sinks: List["MetricsSink"]):
+        self.function = function
+        self.heal_id: Optional[str] = None
+        self.sinks = sinks
+        self.stages: List[Tuple[str, int, int]] = []
+        self.counters: Dict[str, float] = {}
+        self.outcome: Optional[str] = None
+        self.started_ns = time.monotonic_ns()
+        self.started_unix_ns = time.time_ns()
+        self.ended_ns: Optional[int] = None
+        self._cache_hits = _parse_cache_hits()
+        self._token = _current.set(self)
+
+    def stage(self, name: str) -> _Stage:
+        """Time the enclosed block as stage ``name``."""
+        return _Stage(self, name)
+
+    def add(self, counter: str, value: float = 1) -> None:
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def stage_seconds(self) -> Dict[str, float]:
+        """Total seconds per stage name (a stage may run more than once)."""
+        totals: Dict[str, float] = {}
+        for name, started, ended in self.stages:
+            totals[name] = totals.get(name, 0.0) + (ended - started) / 1e9
+        return totals
+
+    @property
+    def duration(self) -> float:
+        return ((self.ended_ns or time.monotonic_ns()) - self.started_ns) / 1e9
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "heal_id": self.heal_id,
+            "function": self.function,
+            "outcome": self.outcome,
+            "started_at": self.started_unix_ns / 1e9,
+            "duration_seconds": self.duration,
+            "stages": self.stage_seconds(),
+            "counters": dict(self.counters),
+        }
+
+    def finish(self, outcome: str) -> None:
+        """Record the outcome and hand the heal to every sink, once."""
+        if self.ended_ns is not None:
+            return
+        self.ended_ns = time.monotonic_ns()
+        self.outcome = outcome
+        # The parse cache is process-wide: concurrent heals share its hits.
+        self.add("cache_hits", _parse_cache_hits() - self._cache_hits)
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            _current.set(NULL_RECORDER)  # finished on another context
+        for sink in self.sinks:
+            try:
+                sink.emit(self)
+            except Exception as error:
+                logger.warning("Metrics sink %s failed: %s", type(sink).__name__, error)
+
+
+def current() -> Any:
+    """The recorder of the heal running in this context (or ``NULL_RECORDER``)."""
+    return _current.get()
+
+
+def record_tokens(prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+    """Count provider token usage against the current heal."""
+    recorder = _current.get()
+    if recorder.enabled:
+        recorder.add("prompt_tokens", prompt_tokens or 0)
+        recorder.add("completion_tokens", completion_tokens or 0)
+
+
+class MetricsSink:
+    """Receives each finished heal."""
+
+    def emit(self, heal: HealRecorder) -> None:
+        raise NotImplementedError
+
+
+class MetricsRegistry(MetricsSink):
+    """Process-wide aggregates of every heal: the ``memory`` sink."""
+
+    def __init__(self, keep_last: int = 100):
+        self.keep_last = keep_last
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.heals: Dict[str, int] = {}
+        self.stage_count: Dict[str, int] = {}
+        self.stage_seconds: Dict[str, float] = {}
+        self.counters: Dict[str, float] = {}
+        self.recent: List[Dict[str, Any]] = []
+
+    def emit(self, heal: HealRecorder) -> None:
+        with self._lock:
+            self.heals[heal.outcome] = self.heals.get(heal.outcome, 0) + 1
+            for name, started, ended in heal.stages:
+                self.stage_count[name] = self.stage_count.get(name, 0) + 1
+                self.stage_seconds[name] = (
+                    self.stage_seconds.get(name, 0.0) + (ended - started) / 1e9
+                )
+            for counter, value in heal.counters.items():
+                self.counters[counter] = self.counters.get(counter, 0) + value
+            self.recent = (self.recent + [heal.as_dict()])[-self.keep_last :]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "heals": dict(self.heals),
+                "stage_count": dict(self.stage_count),
+                "stage_seconds": dict(self.stage_seconds),
+                "counters": dict(self.counters),
+                "recent": list(self.recent),
+            }
+
+    def prometheus_text(self) -> str:
+        """The aggregates in Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP healing_agent_heals_total Heals by outcome.",
+            "# TYPE healing_agent_heals_total counter",
+        ]
+        for outcome, count in sorted(snapshot["heals"].items()):
+            lines.append(f'healing_agent_heals_total{{outcome="{outcome}"}} {count}')
+        lines += [
+            "# HELP healing_agent_stage_seconds Time spent per heal stage.",
+            "# TYPE healing_agent_stage_seconds summary",
+        ]
+        for stage in sorted(snapshot["stage_count"]):
+            lines.append(
+                f'healing_agent_stage_seconds_sum{{stage="{stage}"}} '
+                f'{snapshot["stage_seconds"][stage]:.6f}'
+            )
+            lines.append(
+                f'healing_agent_stage_seconds_count{{stage="{stage}"}} '
+                f'{snapshot["stage_count"][stage]}'
+            )
+        for counter, value in sorted(snapshot["counters"].items()):
+            name = f"healing_agent_{counter}_total"
+            lines += [f"# TYPE {name} counter", f"{name} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusFileSink(MetricsSink):
+    """Rewrites a text-exposition file (for node_exporter's textfile collector)."""
+
+    def __init__(self, path: Path | str, registry: MetricsRegistry):
+        self.path = Path(path)
+        self.registry = registry
+
+    def emit(self, heal: HealRecorder) -> None:
+        atomic_write_text(self.path, self.registry.prometheus_text())
+
+
+class _AppendSink(MetricsSink):
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _append(self, document: Dict[str, Any]) -> None:
+        line = json.dumps(document, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as output:
+                output.write(line)
+
+
+class JsonLinesSink(_AppendSink):
+    """Appends one JSON record per heal."""
+
+    def emit(self, heal: HealRecorder) -> None:
+        self._append(heal.as_dict())
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class OtlpFileSink(_AppendSink):
+    """Exports each heal as OTLP/JSON spans, one export request per line."""
+
+    def emit(self, heal: HealRecorder) -> None:
+        trace_id = os.urandom(16).hex()
+        root_id = os.urandom(8).hex()
+
+        def unix_ns(monotonic_ns: int) -> str:
+            return str(heal.started_unix_ns + monotonic_ns - heal.started_ns)
+
+        spans = [
+            {
+                "traceId": trace_id,
+                "spanId": root_id,
+                "name": "heal",
+                "kind": 1,
+                "startTimeUnixNano": unix_ns(heal.started_ns),
+                "endTimeUnixNano": unix_ns(heal.ended_ns or heal.started_ns),
+                "attributes": [
+                    _attribute("code.function", heal.function),
+                    _attribute("healing_agent.heal_id", heal.heal_id or ""),
+                    _attribute("healing_agent.outcome", heal.outcome or ""),
+                ]
+                + [
+                    _attribute(f"healing_agent.{counter}", value)
+                    for counter, value in sorted(heal.counters.items())
+                ],
+                "status": {"code": 1 if heal.outcome == "healed" else 2},
+            }
+        ]
+        for name, started, ended in heal.stages:
+            spans.append(
+                {
+                    "traceId": trace_id,
+                    "spanId": os.urandom(8).hex(),
+                    "parentSpanId": root_id,
+                    "name": name,
+                    "kind": 1,
+                    "startTimeUnixNano": unix_ns(started),
+                    "endTimeUnixNano": unix_ns(ended),
+                }
+            )
+        self._append(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": [_attribute("service.name", "healing-agent")]
+                        },
+                        "scopeSpans": [
+                            {"scope": {"name": "healing_agent"}, "spans": spans}
+                        ],
+                    }
+                ]
+            }
+        )
+
+
+_registry = MetricsRegistry()
+_sinks: Dict[Tuple, List[MetricsSink]] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_registry() -> MetricsRegistry:
+    """The process-wide in-memory registry used by the ``memory`` sink."""
+    return _registry
+
+
+def _configured_sinks(config: Dict[str, Any]) -> List[MetricsSink]:
+    names = tuple(config.get("METRICS_SINKS") or ())
+    directory = Path(config.get("METRICS_DIR") or DEFAULT_METRICS_DIR).expanduser()
+    key = (names, directory)
+    with _sinks_lock:
+        sinks = _sinks.get(key)
+        if sinks is None:
+            sinks = []
+            for name in names:
+                if name == "memory":
+                    sinks.append(_registry)
+                elif name == "prometheus":
+                    if "memory" not in names:
+                        sinks.append(_registry)  # the file renders its aggregates
+                    sinks.append(PrometheusFileSink(directory / "healing_agent.prom", _registry))
+                elif name == "jsonl":
+                    sinks.append(JsonLinesSink(directory / "heals.jsonl"))
+                elif name == "otlp":
+                    sinks.append(OtlpFileSink(directory / "spans.jsonl"))
+            _sinks[key] = sinks
+    return sinks
+
+
+def start_heal(function: str, config: Dict[str, Any]) -> Any:
+    """Start recording a heal; ``NULL_RECORDER`` when no sink is configured."""
+    if not config.get("METRICS_SINKS"):
+        return NULL_RECORDER
+    return HealRecorder(function, _configured_sinks(config))
@@ -0,0 +1,147 @@
+"""Load the heal machinery ahead of the first failure.
+
+``import healing_agent`` defers provider SDKs, config loading and the repair
+tooling to the first failure, which then pays for all of it on a request
+that is already failing.  ``prewarm()`` does that work on a background
+thread instead: it loads and validates the config, imports the modules the
+configured features use, builds the pooled provider client and opens its
+connection, starts sandbox workers and parses the source files of decorated
+functions.  Setting ``HEALING_AGENT_PREWARM=1`` in the environment starts
+it automatically when the first function is decorated; nothing else does,
+so decorating a function never loads the config on its own.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from . import agent_logging
+
+logger = agent_logging.get_logger(__name__)
+
+_decorated_files: set = set()
+_auto_started = False
+_auto_lock = threading.Lock()
+
+AUTO_PREWARM_ENV = "HEALING_AGENT_PREWARM"
+
+
+def _auto_prewarm_enabled() -> bool:
+    return os.environ.get(AUTO_PREWARM_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def register_source(file_path: Optional[str]) -> None:
+    """Remember a decorated function's file; starts auto-prewarm once if opted in."""
+    global _auto_started
+    if file_path:
+        _decorated_files.add(file_path)
+    if _auto_started or not _auto_prewarm_enabled():
+        return
+    with _auto_lock:
+        if _auto_started:
+            return
+        _auto_started = True
+    threading.Thread(
+        target=_auto_prewarm, name="healing-agent-prewarm", daemon=True
+    ).start()
+
+
+def _auto_prewarm() -> None:
+    from .config_loader import find_config_path, load_config
+
+    try:
+        # Never create a default config just to read the flag.
+        if find_config_path() is None:
+            return
+        config, _ = load_config()
+    except Exception:
+        return  # reported again, in context, on the first failure
+    _warm(config)
+
+
+def _step(name: str, action: Callable[[], Any]) -> None:
+    try:
+        action()
+    except Exception as error:
+        logger.warning("Prewarm step '%s' failed: %s", name, error)
+
+
+def _warm(config: Dict[str, Any]) -> None:
+    import importlib
+
+    modules = ["healing_agent.exception_handler", "healing_agent.ai_broker"]
+    if config.get("LOCAL_FIXERS", False):
+        modules.append("healing_agent.local_fixers")
+    if config.get("VERIFY_IN_SANDBOX", False):
+        modules.append("healing_agent.verification_sandbox")
+    if config.get("GIT_MODE", "off") != "off" or config.get("SAVE_GIT_PATCHES", False):
+        modules.append("healing_agent.git_patch_saver")
+    if config.get("HEALING_MODE", "blocking") == "queue":
+        modules.append("healing_agent.heal_queue")
+    for module in modules:
+        _step(f"import {module}", lambda module=module: importlib.import_module(module))
+
+    if config.get("VERIFY_IN_SANDBOX", False):
+        from .verification_sandbox import get_verification_pool
+
+        def start_sandbox() -> None:
+            pool = get_verification_pool(config.get("SANDBOX_WORKERS", 2))
+            if pool is not None:
+                pool.start()
+
+        _step("sandbox workers", start_sandbox)
+
+    from . import cassette
+
+    mode, cassette_path, _ = cassette.settings(config)
+    if mode == "replay":
+        _step("cassette", lambda: cassette.get_cassette(cassette_path))
+    else:
+        from .ai_broker import warm_connection
+
+        provider = str(config.get("AI_PROVIDER", "azure")).lower()
+        provider_config = config.get(provider.upper()) or {}
+        _step(f"{provider} connection", lambda: warm_connection(provider, provider_config))
+
+    from .ast_cache import parse_file
+
+    for file_path in sorted(_decorated_files):
+        _step(f"parse {file_path}", lambda file_path=file_path: parse_file(file_path))
+
+
+def prewarm(
+    config: Optional[Dict[str, Any]] = None, background: bool = True
+) -> Optional[threading.Thread]:
+    """
+    Load and warm the heal machinery so the first heal runs at steady-state cost.
+
+    Args:
+        config (dict, optional): Configuration to warm for; loaded (and
+            validated) from the config file when omitted.
+        background (bool): Run on a daemon thread and return it; otherwise
+            warm on the calling thread and return None.
+
+    Returns:
+        Optional[threading.Thread]: The started thread in background mode.
+    """
+
+    def run() -> None:
+        warm_config = config
+        if warm_config is None:
+            from .config_loader import load_config
+
+            try:
+                warm_config, _ = load_config()
+            except Exception as error:
+                logger.warning("Prewarm could not load the config: %s", error)
+                return
+        _warm(warm_config)
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="healing-agent-prewarm", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,218 @@
+"""A scripted, local stand-in for the AI providers.
+
+``StandInProvider`` is a small HTTP server that speaks the OpenAI (and Azure
+OpenAI) chat-completions, Anthropic messages and Ollama generate wire
+formats, so the real provider code paths, SDKs and connection pools are
+exercised without network access or keys.  Responses are scripted per
+function name: a hint prompt gets the function's ``hint``, a fix prompt its
+``fix``.  Token usage is reported as a deterministic estimate (four
+characters per token) so metrics see realistic fields.
+
+It backs ``healing-agent bench`` and can be used in tests::
+
+    with StandInProvider({"ratio": {"hint": "...", "fix": "def ratio..."}}) as provider:
+        config["AI_PROVIDER"] = "ollama"
+        config["OLLAMA"] = provider.provider_config("ollama")
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+MODEL = "stand-in"
+PROVIDERS = ("azure", "openai", "anthropic", "ollama")
+
+_FUNCTION_NAME = re.compile(r"^\s*(?:async\s+)?def\s+(\w+)\s*\(", re.MULTILINE)
+_HINT_MARKER = "generate a helpful hint"
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class StandInProvider:
+    """Serve scripted hint and fix responses over the providers' wire formats.
+
+    Args:
+        responses: ``{function_name: {"hint": str, "fix": str}}``.
+        latency: Seconds to wait before answering each completion request.
+        host: Interface to bind; the port is chosen by the OS.
+    """
+
+    def __init__(
+        self,
+        responses: Dict[str, Dict[str, str]],
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+    ):
+        self.responses = responses
+        self.latency = latency
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, 0), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInProvider":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever,
+                name="healing-agent-stand-in",
+                daemon=True,
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInProvider":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def provider_config(self, provider: str) -> Dict[str, Any]:
+        """The ``AZURE``/``OPENAI``/``ANTHROPIC``/``OLLAMA`` config section for this server."""
+        if provider == "ollama":
+            return {"host": self.url, "model": MODEL, "timeout": 30}
+        if provider == "openai":
+            return {"api_key": "stand-in", "model": MODEL, "base_url": f"{self.url}/v1"}
+        if provider == "anthropic":
+            return {"api_key": "stand-in", "model": MODEL, "base_url": self.url}
+        if provider == "azure":
+            return {
+                "api_key": "stand-in",
+                "endpoint": self.url,
+                "api_version": "2024-02-01",
+                "deployment_name": MODEL,
+            }
+        raise ValueError(f"Unsupported stand-in provider: {provider}")
+
+    def respond(self, prompt: str) -> Tuple[str, str]:
+        """Return ``(role, text)`` for a hint or fix prompt."""
+        role = "hint" if _HINT_MARKER in prompt else "fix"
+        match = _FUNCTION_NAME.search(prompt)
+        script = self.responses.get(match.group(1), {}) if match else {}
+        text = script.get(role, "No scripted response." if role == "hint" else "")
+        with self._lock:
+            self.requests[role] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return role, text
+
+
+def _handler_for(provider: StandInProvider) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoints
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _send(self, status: int, body: Dict[str, Any]) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self) -> None:
+            path = urlparse(self.path).path
+            if path == "/api/tags":
+                self._send(200, {"models": [{"name": MODEL}]})
+            elif path.endswith("/models"):
+                model = {"id": MODEL, "object": "model", "created": 0, "owned_by": "stand-in"}
+                self._send(200, {"object": "list", "data": [model]})
+            else:
+                self._send(404, {"error": f"unknown path {path}"})
+
+        def do_POST(self) -> None:
+            path = urlparse(self.path).path
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if path.endswith("/chat/completions"):
+                prompt = "\n".join(
+                    str(message.get("content", "")) for message in request.get("messages", [])
+                )
+                _, text = provider.respond(prompt)
+                self._send(200, _openai_body(request, prompt, text))
+            elif path.endswith("/messages"):
+                prompt = "\n".join(
+                    str(message.get("content", "")) for message in request.get("messages", [])
+                )
+                _, text = provider.respond(prompt)
+                self._send(200, _anthropic_body(request, prompt, text))
+            elif path == "/api/generate":
+                prompt = request.get("prompt", "")
+                _, text = provider.respond(prompt)
+                self._send(200, _ollama_body(request, prompt, text))
+            else:
+                self._send(404, {"error": f"unknown path {path}"})
+
+    return Handler
+
+
+def _openai_body(request: Dict[str, Any], prompt: str, text: str) -> Dict[str, Any]:
+    prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(text)
+    return {
+        "id": "chatcmpl-stand-in",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", MODEL),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _anthropic_body(request: Dict[str, Any], prompt: str, text: str) -> Dict[str, Any]:
+    return {
+        "id": "msg_stand_in",
+        "type": "message",
+        "role": "assistant",
+        "model": request.get("model", MODEL),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": estimate_tokens(prompt),
+            "output_tokens": estimate_tokens(text),
+        },
+    }
+
+
+def _ollama_body(request: Dict[str, Any], prompt: str, text: str) -> Dict[str, Any]:
+    return {
+        "model": request.get("model", MODEL),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "response": text,
+        "done": True,
+        "prompt_eval_count": estimate_tokens(prompt),
+        "eval_count": estimate_tokens(text),
+    }
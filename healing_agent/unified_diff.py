@@ -0,0 +1,104 @@
+"""A small, strict unified-diff applier for single-file patches.
+
+Patches produced by ``git_patch_saver`` are checked and applied with this
+module instead of ``git apply``: no subprocess, and no Git binary needed.
+Hunks must match the original exactly at their recorded positions; there is
+no fuzz or offset search, so anything unexpected is rejected rather than
+applied somewhere else.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List, Tuple
+
+NO_NEWLINE_MARKER = "\\ No newline at end of file"
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchApplyError(ValueError):
+    """Raised when a patch does not apply cleanly to the given text."""
+
+
+def _hunks(patch: str) -> List[Tuple[int, int, List[str], List[str]]]:
+    """Parse ``(old_start, old_length, old_lines, new_lines)`` for every hunk."""
+    lines = patch.splitlines(keepends=True)
+    hunks = []
+    index = 0
+    seen_file = False
+    while index < len(lines):
+        line = lines[index]
+        if line.startswith("diff --git ") or line.startswith("--- "):
+            if hunks or (seen_file and line.startswith("diff --git ")):
+                raise PatchApplyError("Only single-file patches are supported")
+            seen_file = True
+            index += 1
+            continue
+        match = _HUNK_HEADER.match(line)
+        if match is None:
+            index += 1  # "+++", "index ..." and other header lines
+            continue
+        old_start = int(match.group(1))
+        old_length = int(match.group(2)) if match.group(2) is not None else 1
+        new_length = int(match.group(4)) if match.group(4) is not None else 1
+        old_lines: List[str] = []
+        new_lines: List[str] = []
+        index += 1
+        while len(old_lines) < old_length or len(new_lines) < new_length:
+            if index >= len(lines):
+                raise PatchApplyError("Patch ends inside a hunk")
+            body = lines[index]
+            marker, text = body[:1], body[1:]
+            if marker == " ":
+                old_lines.append(text)
+                new_lines.append(text)
+            elif marker == "-":
+                old_lines.append(text)
+            elif marker == "+":
+                new_lines.append(text)
+            elif body.rstrip("\n") == NO_NEWLINE_MARKER:
+                _strip_newline(old_lines, new_lines, lines[index - 1][:1])
+            else:
+                raise PatchApplyError(f"Malformed hunk line: {body!r}")
+            index += 1
+        # A missing final newline is marked after the hunk's last line.
+        if index < len(lines) and lines[index].rstrip("\n") == NO_NEWLINE_MARKER:
+            _strip_newline(old_lines, new_lines, lines[index - 1][:1])
+            index += 1
+        hunks.append((old_start, old_length, old_lines, new_lines))
+    return hunks
+
+
+def _strip_newline(old_lines: List[str], new_lines: List[str], marker: str) -> None:
+    sides = {" ": (old_lines, new_lines), "-": (old_lines,), "+": (new_lines,)}
+    for side in sides.get(marker, ()):
+        if side and side[-1].endswith("\n"):
+            side[-1] = side[-1][:-1]
+
+
+def apply_unified_diff(original: str, patch: str) -> str:
+    """Apply a single-file unified diff to ``original`` and return the result.
+
+    Raises:
+        PatchApplyError: If the patch is malformed or its context and removed
+            lines do not match ``original`` exactly.
+    """
+    hunks = _hunks(patch)
+    if not hunks:
+        raise PatchApplyError("Patch contains no hunks")
+    source = original.splitlines(keepends=True)
+    result: List[str] = []
+    position = 0
+    for old_start, old_length, old_lines, new_lines in hunks:
+        # An empty old range names the line *after which* lines are added.
+        start = old_start if old_length == 0 else old_start - 1
+        if start < position:
+            raise PatchApplyError(f"Hunk at line {old_start} overlaps the previous hunk")
+        if source[start : start + old_length] != old_lines:
+            raise PatchApplyError(f"Hunk at line {old_start} does not match the source")
+        result.extend(source[position:start])
+        result.extend(new_lines)
+        position = start + old_length
+    result.extend(source[position:])
+    return "".join(result)
@@ -0,0 +1,282 @@
+"""Verify a candidate fix in a resource-limited worker process.
+
+A generated fix that loops forever or allocates without bound must not take
+the supervised process down.  Candidates are therefore executed against the
+captured call arguments in pre-forked worker processes, each job guarded by
+a CPU-time limit (``RLIMIT_CPU``), an address-space ceiling (``RLIMIT_AS``, the
+closest enforceable stand-in for RSS on Linux) and a wall-clock timeout
+enforced by the parent.  Workers are forked ahead of time and reused, so fork
+cost stays off the healing path; a worker that is killed is replaced in the
+background.
+
+Only POSIX ``fork`` is supported.  Where it is unavailable, or when the call
+arguments cannot be pickled, verification reports ``unsupported`` and the
+caller keeps its in-process behavior.
+"""
+
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import traceback
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class SandboxLimits:
+    """Per-job resource limits."""
+
+    cpu_seconds: int = 10
+    wall_seconds: float = 30.0
+    memory_mb: int = 512
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SandboxLimits":
+        return cls(
+            cpu_seconds=config.get("SANDBOX_CPU_SECONDS", cls.cpu_seconds),
+            wall_seconds=config.get("SANDBOX_WALL_SECONDS", cls.wall_seconds),
+            memory_mb=config.get("SANDBOX_MEMORY_MB", cls.memory_mb),
+        )
+
+
+@dataclass(frozen=True)
+class VerificationResult:
+    """Outcome of one sandboxed run.
+
+    ``status`` is one of ``passed``, ``failed`` (the candidate raised),
+    ``timeout``, ``crashed`` (the worker died, e.g. on a CPU limit) or
+    ``unsupported``.
+    """
+
+    status: str
+    error_type: Optional[str] = None
+    message: str = ""
+    traceback: str = ""
+
+    @property
+    def passed(self) -> bool:
+        return self.status == "passed"
+
+
+def _address_space_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as statm:
+            return int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _apply_limits(cpu_seconds: int, memory_mb: int) -> None:
+    import resource
+
+    # Limits are relative to what this warm worker has already used.
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)
+    cpu_soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+    if cpu_hard != resource.RLIM_INFINITY:
+        cpu_soft = min(cpu_soft, cpu_hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_soft, cpu_hard))
+
+    current = _address_space_bytes()
+    if current is not None:
+        _, as_hard = resource.getrlimit(resource.RLIMIT_AS)
+        as_soft = current + memory_mb * 1024 * 1024
+        if as_hard != resource.RLIM_INFINITY:
+            as_soft = min(as_soft, as_hard)
+        resource.setrlimit(resource.RLIMIT_AS, (as_soft, as_hard))
+
+
+def _release_memory_limit() -> None:
+    import resource
+
+    _, as_hard = resource.getrlimit(resource.RLIMIT_AS)
+    resource.setrlimit(resource.RLIMIT_AS, (as_hard, as_hard))
+
+
+def _run_job(job: Tuple) -> Tuple:
+    import importlib
+
+    from .hot_patcher import compile_definition
+
+    module_name, func_name, file_path, fixed_code, args, kwargs, cpu, memory = job
+    try:
+        module = sys.modules.get(module_name) or importlib.import_module(module_name)
+        # A copy keeps ``global`` writes of one candidate out of later jobs.
+        candidate = compile_definition(
+            fixed_code, func_name, file_path, dict(vars(module))
+        )
+        _apply_limits(cpu, memory)
+        try:
+            candidate(*args, **kwargs)
+        finally:
+            _release_memory_limit()
+        return ("passed",)
+    except BaseException as error:
+        return ("failed", type(error).__name__, str(error), traceback.format_exc())
+
+
+def _worker_main(connection) -> None:
+    import importlib
+
+    core = importlib.import_module(".healing_agent", __package__)
+
+    # A failure inside the sandbox must surface, never start a nested heal.
+    core._healing_suspended = True
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if job is None:
+            return
+        connection.send(_run_job(job))
+
+
+class VerificationPool:
+    """A small pool of pre-forked, reusable verification workers."""
+
+    def __init__(self, size: int = 2):
+        self.size = max(1, size)
+        self._context = multiprocessing.get_context("fork")
+        self._idle: List[Tuple[Any, Any]] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _spawn(self) -> Tuple[Any, Any]:
+        parent_end, child_end = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, args=(child_end,), daemon=True
+        )
+        process.start()
+        child_end.close()
+        return process, parent_end
+
+    def start(self) -> None:
+        """Fork workers until the pool is full."""
+        with self._lock:
+            while not self._closed and len(self._idle) < self.size:
+                self._idle.append(self._spawn())
+
+    def _replenish_in_background(self) -> None:
+        threading.Thread(target=self.start, daemon=True).start()
+
+    def _acquire(self) -> Tuple[Any, Any]:
+        with self._lock:
+            while self._idle:
+                process, connection = self._idle.pop()
+                if process.is_alive():
+                    return process, connection
+                connection.close()
+            worker = self._spawn()
+        # A cold pool pays for one fork now and warms the rest meanwhile.
+        self._replenish_in_background()
+        return worker
+
+    def verify(
+        self,
+        func: Callable[..., Any],
+        fixed_code: str,
+        args: tuple,
+        kwargs: dict,
+        limits: SandboxLimits,
+    ) -> VerificationResult:
+        """Run ``fixed_code`` in a worker with the original call arguments."""
+        job = (
+            func.__module__,
+            func.__name__,
+            func.__code__.co_filename,
+            fixed_code,
+            args,
+            kwargs,
+            limits.cpu_seconds,
+            limits.memory_mb,
+        )
+        process, connection = self._acquire()
+        try:
+            connection.send(job)
+        except Exception as error:
+            # Unpicklable arguments: the worker never saw the job.
+            with self._lock:
+                self._idle.append((process, connection))
+            return VerificationResult("unsupported", type(error).__name__, str(error))
+
+        reply = None
+        if connection.poll(limits.wall_seconds):
+            try:
+                reply = connection.recv()
+            except EOFError:
+                reply = None
+        else:
+            process.kill()
+            process.join()
+            connection.close()
+            self._replenish_in_background()
+            return VerificationResult(
+                "timeout", message=f"exceeded {limits.wall_seconds}s wall-clock limit"
+            )
+
+        if reply is None:
+            process.join(1)
+            exitcode = process.exitcode
+            connection.close()
+            self._replenish_in_background()
+            reason = f"worker exited with code {exitcode}"
+            if exitcode == -signal.SIGXCPU:
+                reason = f"exceeded {limits.cpu_seconds}s CPU limit"
+            return VerificationResult("crashed", message=reason)
+
+        with self._lock:
+            self._idle.append((process, connection))
+        if reply[0] == "passed":
+            return VerificationResult("passed")
+        _, error_type, message, error_traceback = reply
+        return VerificationResult("failed", error_type, message, error_traceback)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers, self._idle = self._idle, []
+        for process, connection in workers:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            process.join(1)
+            if process.is_alive():
+                process.kill()
+            connection.close()
+
+
+_pool: Optional[VerificationPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_verification_pool(size: int = 2) -> Optional[VerificationPool]:
+    """Return the shared pool, or ``None`` where ``fork`` is unavailable."""
+    global _pool
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = VerificationPool(size)
+            atexit.register(_pool.close)
+    return _pool
+
+
+def verify_in_sandbox(
+    func: Callable[..., Any],
+    fixed_code: str,
+    args: tuple,
+    kwargs: dict,
+    config: Dict[str, Any],
+) -> VerificationResult:
+    """Verify ``fixed_code`` against the original arguments of ``func``."""
+    pool = get_verification_pool(config.get("SANDBOX_WORKERS", 2))
+    if pool is None:
+        return VerificationResult("unsupported", message="fork is not available")
+    return pool.verify(func, fixed_code, args, kwargs, SandboxLimits.from_config(config))
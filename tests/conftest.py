@@ -0,0 +1,28 @@
+import importlib.util
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def load_module(tmp_path):
+    """Write ``source`` to ``<tmp_path>/<name>.py`` and import it as ``name``.
+
+    Returns ``(path, module)``; the module leaves ``sys.modules`` when the
+    test ends.
+    """
+    loaded = []
+
+    def load(name, source):
+        path = tmp_path / f"{name}.py"
+        path.write_text(source, encoding="utf-8")
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loaded.append(name)
+        spec.loader.exec_module(module)
+        return path, module
+
+    yield load
+    for name in loaded:
+        sys.modules.pop(name, None)
@@ -0,0 +1,123 @@
+import importlib
+import importlib.util
+import logging
+import threading
+
+import pytest
+
+from healing_agent import agent_logging
+
+
+healing_module = importlib.import_module("healing_agent.healing_agent")
+
+
+@pytest.fixture(autouse=True)
+def default_logging():
+    agent_logging.configure({})
+    yield
+    agent_logging.configure({})
+
+
+class _Recorder(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        record.handler_thread = threading.current_thread().name
+        self.records.append(record)
+
+
+@pytest.fixture
+def recorder():
+    handler = _Recorder()
+    logger = logging.getLogger("healing_agent")
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+
+
+def test_arguments_below_the_level_are_never_formatted(recorder):
+    formatted = []
+
+    class Expensive:
+        def __str__(self):
+            formatted.append(True)
+            return "expensive"
+
+    logger = agent_logging.get_logger("healing_agent.example")
+    agent_logging.configure({"DEBUG": False})
+    logger.debug("value: %s", Expensive())
+    assert formatted == []
+    assert recorder.records == []
+
+    agent_logging.configure({"LOG_LEVEL": "debug"})
+    logger.debug("value: %s", Expensive())
+    assert recorder.records[0].getMessage() == "value: expensive"
+
+
+def test_default_handler_prints_classic_lines_until_logging_is_configured(
+    capsys, monkeypatch
+):
+    logger = agent_logging.get_logger("healing_agent.example")
+    monkeypatch.setattr(logging.getLogger(), "handlers", [])
+    logger.info("Healing %s", "started")
+    assert capsys.readouterr().out == "♣ Healing started\n"
+
+    monkeypatch.setattr(logging.getLogger(), "handlers", [logging.NullHandler()])
+    logger.info("Healing %s", "started")
+    assert capsys.readouterr().out == ""
+
+
+def test_queue_moves_handler_io_off_the_logging_thread(recorder):
+    agent_logging.configure({"LOG_QUEUE": True})
+    agent_logging.get_logger("healing_agent.example").warning("queued")
+    agent_logging.configure({})  # stops the listener after draining it
+
+    assert [record.getMessage() for record in recorder.records] == ["queued"]
+    assert recorder.records[0].handler_thread != threading.current_thread().name
+    assert recorder in logging.getLogger("healing_agent").handlers
+
+
+def test_heal_records_carry_heal_id_function_and_stage(tmp_path, monkeypatch, recorder):
+    import sys
+
+    config = {
+        "MAX_ATTEMPTS": 1,
+        "AUTO_FIX": False,
+        "AUTO_SYSCHANGE": False,
+        "BACKUP_ENABLED": False,
+        "SAVE_EXCEPTIONS": False,
+        "SAVE_AI_FIXES": False,
+        "DEBUG": False,
+    }
+    monkeypatch.setattr(healing_module, "load_config", lambda: (config, None))
+
+    def fake_hint(*_args):
+        agent_logging.get_logger("healing_agent.example").info("asking")
+        return "hint"
+
+    monkeypatch.setattr(healing_module, "generate_hint", fake_hint)
+    monkeypatch.setattr(healing_module, "fix", lambda *_args: None)
+    path = tmp_path / "logging_target.py"
+    path.write_text(
+        "from healing_agent.healing_agent import healing_agent\n\n"
+        "@healing_agent\n"
+        "def ratio(a, b):\n"
+        "    return a / b\n",
+        encoding="utf-8",
+    )
+    spec = importlib.util.spec_from_file_location("logging_target", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["logging_target"] = module
+    spec.loader.exec_module(module)
+
+    with pytest.raises(ZeroDivisionError):
+        module.ratio(1, 0)
+
+    asking = next(record for record in recorder.records if record.getMessage() == "asking")
+    assert asking.function == "ratio"
+    assert asking.stage == "hint"
+    assert len(asking.heal_id) == 32
+    agent_logging.get_logger("healing_agent.example").info("after")
+    assert recorder.records[-1].heal_id == "-"
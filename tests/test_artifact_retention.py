@@ -0,0 +1,147 @@
+import os
+import zipfile
+
+from healing_agent import artifact_retention
+from healing_agent.artifact_retention import (
+    RetentionManager,
+    RetentionPolicy,
+    enforce_retention,
+    prune,
+)
+from healing_agent.context_bundle import iter_index, read_context
+from healing_agent.exception_saver import save_context
+
+NOW = 1_800_000_000.0
+
+
+def _write(directory, name, size=10, age_days=0.0):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    mtime = NOW - age_days * 86400
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_count_and_bytes_limits_evict_oldest_first(tmp_path):
+    fixes = tmp_path / "_healing_agent_fixes"
+    fixes.mkdir()
+    manager = RetentionManager(clock=lambda: NOW)
+    policy = RetentionPolicy(max_count=3, max_bytes=35)
+
+    for number in range(4):
+        _write(fixes, f"{number}.py", age_days=4 - number)
+    newest = _write(fixes, "4.py", size=20)
+
+    evicted = manager.record(newest, policy)
+
+    assert sorted(evicted) == ["0.py", "1.py", "2.py"]
+    assert sorted(path.name for path in fixes.iterdir()) == ["3.py", "4.py"]
+
+
+def test_age_limit_and_sidecars_are_evicted_together(tmp_path):
+    fixes = tmp_path / "_healing_agent_fixes"
+    fixes.mkdir()
+    _write(fixes, "old.patch", age_days=10)
+    _write(fixes, "old.json", age_days=1)
+    _write(fixes, "recent.py", age_days=1)
+    newest = _write(fixes, "new.py")
+
+    evicted = RetentionManager(clock=lambda: NOW).record(
+        newest, RetentionPolicy(max_age_days=7)
+    )
+
+    assert sorted(evicted) == ["old.json", "old.patch"]
+
+
+def test_compaction_moves_evicted_files_into_an_archive(tmp_path):
+    backups = tmp_path / "_healing_agent_backups"
+    backups.mkdir()
+    _write(backups, "app.1.py", age_days=2)
+    newest = _write(backups, "app.2.py")
+
+    RetentionManager(clock=lambda: NOW).record(
+        newest, RetentionPolicy(max_count=1, compact=True)
+    )
+
+    [archive] = (backups / "_archive").glob("*.zip")
+    with zipfile.ZipFile(archive) as bundle:
+        assert bundle.namelist() == ["app.1.py"]
+    assert sorted(path.name for path in backups.iterdir()) == ["_archive", "app.2.py"]
+
+
+def test_config_driven_entry_points(tmp_path):
+    exceptions = tmp_path / "src" / "_healing_agent_exceptions"
+    exceptions.mkdir(parents=True)
+    for number in range(5):
+        _write(exceptions, f"{number}.json", age_days=5 - number)
+    config = {"ARTIFACT_RETENTION": {"exceptions": {"max_count": 2}}}
+
+    assert enforce_retention(None, config) == []
+    assert enforce_retention(tmp_path / "elsewhere.json", config) == []
+    assert sorted(prune(tmp_path, config)[str(exceptions)]) == ["0.json", "1.json", "2.json"]
+
+
+def test_out_of_order_mtimes_still_evict_oldest_first(tmp_path):
+    fixes = tmp_path / "_healing_agent_fixes"
+    fixes.mkdir()
+    manager = RetentionManager(clock=lambda: NOW)
+    policy = RetentionPolicy(max_count=3)
+
+    assert manager.record(_write(fixes, "b.py", age_days=1), policy) == []
+    assert manager.record(_write(fixes, "c.py"), policy) == []
+    # Copied in with an older mtime than anything already indexed.
+    assert manager.record(_write(fixes, "a.py", age_days=5), policy) == []
+    assert manager.record(_write(fixes, "d.py"), policy) == ["a.py"]
+
+
+def _bundle_context(number, source_file):
+    return {
+        "heal_id": f"{number:032x}",
+        "function_info": {"name": "load", "source_code": f"def load():\n    return {number}\n" * 40},
+        "error": {"type": "KeyError", "file": str(source_file), "message": f"'k{number}'"},
+    }
+
+
+def test_bundle_segments_are_evicted_with_their_index_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_retention, "_manager", RetentionManager(clock=lambda: NOW))
+    config = {
+        "CONTEXT_FORMAT": "bundle",
+        "CONTEXT_SEGMENT_BYTES": 1024,
+        "ARTIFACT_RETENTION": {"exceptions": {"max_count": 10, "compact": True}},
+    }
+    source_file = tmp_path / "app.py"
+    evicted = []
+    for number in range(1, 41):
+        saved = save_context(_bundle_context(number, source_file), config)
+        evicted += enforce_retention(saved, config)
+
+    bundle = tmp_path / "_healing_agent_exceptions" / "bundle"
+    segments = sorted(path.name for path in bundle.glob("segment-*.hab"))
+    assert evicted and not set(evicted) & set(segments)
+    assert "segment-000001.hab" in evicted
+    entries = list(iter_index(bundle))
+    assert len(entries) <= 10 + 10  # the limit plus at most one partial segment
+    assert {entry["segment"] for entry in entries} <= set(segments)
+    assert entries[-1]["heal_id"] == f"{40:032x}"
+    assert read_context(bundle, f"{40:032x}")["error"]["message"] == "'k40'"
+    assert read_context(bundle, f"{1:032x}") is None
+    [archive] = (bundle / "_archive").glob("*.zip")
+    with zipfile.ZipFile(archive) as archived:
+        assert sorted(archived.namelist()) == sorted(evicted)
+
+
+def test_prune_applies_exception_limits_to_bundles(tmp_path):
+    source_file = tmp_path / "src" / "app.py"
+    source_file.parent.mkdir()
+    config = {"CONTEXT_FORMAT": "bundle", "CONTEXT_SEGMENT_BYTES": 1024}
+    for number in range(1, 31):
+        save_context(_bundle_context(number, source_file), config)
+    bundle = source_file.parent / "_healing_agent_exceptions" / "bundle"
+    segments = sorted(path.name for path in bundle.glob("segment-*.hab"))
+
+    config["ARTIFACT_RETENTION"] = {"exceptions": {"max_age_days": 0}}
+    removed = prune(tmp_path, config)[str(bundle)]
+
+    assert removed == segments[:-1]  # the newest segment is still being written
+    assert sorted(path.name for path in bundle.glob("segment-*.hab")) == segments[-1:]
+    assert {entry["segment"] for entry in iter_index(bundle)} == {segments[-1]}
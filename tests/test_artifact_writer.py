@@ -0,0 +1,93 @@
+import threading
+
+from healing_agent.artifact_writer import ArtifactWriter
+
+
+def test_full_queue_drops_and_counts_optional_writes():
+    release = threading.Event()
+    started = threading.Event()
+    written = []
+
+    def slow_write(name):
+        started.set()
+        release.wait(5)
+        written.append(name)
+
+    writer = ArtifactWriter(maxsize=1, put_timeout=0.01)
+    assert writer.submit("context", slow_write, "first")
+    started.wait(5)  # the worker is busy with "first"
+    assert writer.submit("context", written.append, "second")  # fills the queue
+    assert not writer.submit("context", written.append, "dropped")
+    assert not writer.submit("ai_fix", written.append, "dropped too")
+
+    # Required writes are never dropped: they run inline instead.
+    assert writer.submit("backup", written.append, "backup", required=True)
+    assert written == ["backup"]
+
+    release.set()
+    assert writer.flush(5)
+    assert written == ["backup", "first", "second"]
+    assert writer.dropped == {"context": 1, "ai_fix": 1}
+
+
+def test_failing_write_does_not_stop_the_writer(caplog):
+    written = []
+
+    def broken():
+        raise OSError("disk full")
+
+    writer = ArtifactWriter()
+    writer.submit("context", broken)
+    writer.submit("context", written.append, "after")
+
+    assert writer.flush(5)
+    assert written == ["after"]
+    assert "Failed to write context artifact: disk full" in caplog.text
+
+
+def test_async_backup_holds_the_source_before_the_fix(tmp_path, monkeypatch):
+    import importlib
+    import importlib.util
+    import sys
+
+    from healing_agent.artifact_writer import flush_artifacts
+
+    healing_module = importlib.import_module("healing_agent.healing_agent")
+    config = {
+        "MAX_ATTEMPTS": 3,
+        "AUTO_FIX": True,
+        "AUTO_SYSCHANGE": False,
+        "BACKUP_ENABLED": True,
+        "SAVE_EXCEPTIONS": True,
+        "SAVE_AI_FIXES": True,
+        "DEBUG": False,
+        "RELOAD_MODE": "hotpatch",
+        "ASYNC_ARTIFACTS": True,
+    }
+    monkeypatch.setattr(healing_module, "load_config", lambda: (dict(config), None))
+    monkeypatch.setattr(healing_module, "generate_hint", lambda *_args: "divide safely")
+    monkeypatch.setattr(
+        healing_module,
+        "fix",
+        lambda *_args: "@healing_agent\ndef ratio(a, b):\n    return a / b if b else 0\n",
+    )
+    original = (
+        "from healing_agent.healing_agent import healing_agent\n\n"
+        "@healing_agent\n"
+        "def ratio(a, b):\n"
+        "    return a / b\n"
+    )
+    path = tmp_path / "async_artifacts_target.py"
+    path.write_text(original, encoding="utf-8")
+    spec = importlib.util.spec_from_file_location("async_artifacts_target", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["async_artifacts_target"] = module
+    spec.loader.exec_module(module)
+
+    assert module.ratio(1, 0) == 0
+    assert flush_artifacts(5)
+
+    [backup] = (tmp_path / "_healing_agent_backups").iterdir()
+    assert backup.read_text(encoding="utf-8") == original
+    assert list((tmp_path / "_healing_agent_fixes").glob("*_fix.py"))
+    assert list((tmp_path / "_healing_agent_exceptions").glob("*.json"))
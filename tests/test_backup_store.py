@@ -0,0 +1,72 @@
+import datetime
+
+from healing_agent.artifact_retention import enforce_retention
+from healing_agent.backup_store import BackupStore
+from healing_agent.cli import main
+from healing_agent.code_backup import create_backup
+
+
+def test_identical_states_are_stored_once_and_restorable(tmp_path):
+    source = tmp_path / "app.py"
+    store = BackupStore.for_source(source)
+
+    first = store.put(source, b"x = 1\n", heal_id="heal-1")
+    again = store.put(source, b"x = 1\n", heal_id="heal-2")
+    store.put(source, b"x = 2\n", heal_id="heal-3")
+
+    assert first == again
+    assert len(list((store.root / "objects").rglob("*"))) == 4  # 2 buckets, 2 objects
+    assert [entry["heal_id"] for entry in store.entries(source)] == ["heal-1", "heal-2", "heal-3"]
+
+    source.write_text("broken\n")
+    store.restore(source, "heal-1")
+    assert source.read_bytes() == b"x = 1\n"
+    store.restore(source)
+    assert source.read_bytes() == b"x = 2\n"
+
+
+def test_prune_keeps_newest_entries_and_collects_objects(tmp_path):
+    source = tmp_path / "app.py"
+    store = BackupStore.for_source(source)
+    for number in range(4):
+        store.put(source, f"x = {number}\n".encode(), heal_id=str(number))
+
+    dropped = store.prune(max_count=2)
+
+    assert [entry["heal_id"] for entry in dropped] == ["0", "1"]
+    assert [entry["heal_id"] for entry in store.entries()] == ["2", "3"]
+    assert len([path for path in (store.root / "objects").rglob("*") if path.is_file()]) == 2
+    assert store.prune(max_age_days=1, now=datetime.datetime.now() + datetime.timedelta(days=2))
+    assert store.entries() == []
+
+
+def test_create_backup_and_retention_use_the_store(tmp_path):
+    source = tmp_path / "app.py"
+    source.write_text("x = 1\n")
+    config = {
+        "BACKUP_FORMAT": "store",
+        "ARTIFACT_RETENTION": {"backups": {"max_count": 1}},
+    }
+    context = {"heal_id": "abc", "error": {"file": str(source)}}
+
+    saved = create_backup(context, config)
+    source.write_text("x = 2\n")
+    saved_again = create_backup(context, config)
+    enforce_retention(saved_again, config)
+
+    store = BackupStore.for_source(source)
+    assert [entry["sha256"] for entry in store.entries()] == [store.digest(b"x = 2\n")]
+    assert saved.endswith(store.digest(b"x = 1\n")[2:])
+
+
+def test_cli_rollback(tmp_path, capsys):
+    source = tmp_path / "app.py"
+    store = BackupStore.for_source(source)
+    store.put(source, b"good\n", heal_id="h1")
+    source.write_text("bad\n")
+
+    assert main(["rollback", str(source), "--list"]) == 0
+    assert "h1" in capsys.readouterr().out
+    assert main(["rollback", str(source), "h1"]) == 0
+    assert source.read_text() == "good\n"
+    assert main(["rollback", str(source), "missing"]) == 1
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from healing_agent import metrics
+from healing_agent.ai_broker import get_ai_response
+from healing_agent.bench import run_bench
+from healing_agent.cli import main
+from healing_agent.config_loader import find_config_path
+from healing_agent.stand_in_provider import StandInProvider
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    metrics.get_registry().reset()
+    yield
+    metrics.get_registry().reset()
+
+
+def test_run_bench_scores_corpus(tmp_path):
+    report = run_bench(iterations=1, workdir=tmp_path, trace_memory=False)
+
+    assert report["runs"] == 8
+    assert report["outcomes"] == {"healed": 7, "false_fix": 1, "failed": 0}
+    assert report["scenarios"]["average_wrong_fix"]["false_fix"] == 1
+    assert report["false_fix_rate"] == pytest.approx(1 / 8)
+    assert {"capture", "hint", "fix", "replace"} <= set(report["stage_latency_ms"])
+    assert set(report["heal_latency_ms"]) == {"p50", "p95", "p99"}
+    assert report["provider_requests"]["fix"] > 0
+
+
+def test_stand_in_speaks_openai_wire_format():
+    pytest.importorskip("openai")
+    responses = {"ratio": {"hint": "guard the divisor", "fix": "def ratio(a, b):\n    return 0"}}
+    with StandInProvider(responses) as provider:
+        config = {"AI_PROVIDER": "openai", "OPENAI": provider.provider_config("openai")}
+        recorder = metrics.start_heal("ratio", {"METRICS_SINKS": ["memory"]})
+        try:
+            text = get_ai_response("def ratio(a, b):\n    return a / b", config)
+        finally:
+            recorder.finish("healed")
+
+    assert text == responses["ratio"]["fix"]
+    counters = metrics.get_registry().snapshot()["counters"]
+    assert counters["prompt_tokens"] > 0
+    assert counters["completion_tokens"] > 0
+
+
+def test_config_path_from_environment(tmp_path, monkeypatch):
+    config_path = tmp_path / "bench_config.py"
+    config_path.write_text("AUTO_FIX = True\n")
+    monkeypatch.setenv("HEALING_AGENT_CONFIG", str(config_path))
+    assert str(find_config_path()) == str(config_path)
+
+    monkeypatch.setenv("HEALING_AGENT_CONFIG", str(tmp_path / "missing.py"))
+    with pytest.raises(FileNotFoundError):
+        find_config_path()
+
+
+def test_cli_bench_thresholds(tmp_path, capsys):
+    report_path = tmp_path / "report.json"
+    common = [
+        "bench", "--iterations", "1", "--no-tracemalloc",
+        "--scenario", "zero_division", "--scenario", "average_wrong_fix",
+        "--workdir", str(tmp_path / "work"),
+    ]
+
+    assert main(common + ["--json", str(report_path)]) == 0
+    assert json.loads(report_path.read_text())["outcomes"]["false_fix"] == 1
+    assert main(common + ["--max-false-fix-rate", "0.1"]) == 1
+    assert "false-fix rate" in capsys.readouterr().err
@@ -0,0 +1,110 @@
+import gc
+import json
+import tracemalloc
+import weakref
+
+import pytest
+
+from healing_agent.exception_handler import bounded_str, capture_context
+
+MAX_BYTES = 64 * 1024
+# Python dicts and strings take more room than their JSON form.
+ALLOCATION_CEILING = 2 * MAX_BYTES
+LARGE_GLOBAL = "g" * 2_000_000
+MANY_GLOBALS = {f"setting_{i}": "v" * 150 for i in range(2_000)}
+globals().update(MANY_GLOBALS)
+
+
+class Payload:
+    def __init__(self):
+        self.data = bytearray(1_000_000)
+
+
+def parse_report(rows, text):
+    blob = bytearray(3_000_000)  # noqa: F841 - a large local in the failing frame
+    total = sum(rows)  # noqa: F841
+    return json.loads(text)
+
+
+def _capture(config, rows, text, measure=False):
+    try:
+        parse_report(rows, text)
+    except Exception as error:
+        if not measure:
+            return capture_context(parse_report, (rows, text), None, config, error)
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        context = capture_context(parse_report, (rows, text), None, config, error)
+        return context, tracemalloc.get_traced_memory()[1] - before
+
+
+def _inputs():
+    return list(range(300_000)), '{"a": 1,' + " " * 2_000_000
+
+
+def test_bounded_capture_peak_allocation_stays_under_ceiling():
+    config = {"CONTEXT_MAX_BYTES": MAX_BYTES}
+    rows, text = _inputs()
+    _capture(config, rows, text)  # parse this module once, like any repeat failure
+
+    tracemalloc.start()
+    try:
+        context, peak = _capture(config, rows, text, measure=True)
+        _, unbounded_peak = _capture({}, rows, text, measure=True)
+    finally:
+        tracemalloc.stop()
+
+    assert peak < ALLOCATION_CEILING < unbounded_peak
+    assert len(json.dumps(context, default=str)) <= MAX_BYTES
+    assert context["capture_limits"]["max_bytes"] == MAX_BYTES
+    assert "more chars" in context["function_arguments"]["text"]["value"]
+    assert len(context["error"]["exception_attrs"]["doc"]) < 1100
+
+
+def test_unbounded_capture_keeps_classic_shape():
+    rows, text = list(range(10)), '{"a": 1,'
+    context = _capture({}, rows, text)
+    assert "capture_limits" not in context
+    assert context["function_arguments"]["rows"]["value"] == str(rows)
+    assert context["error"]["exception_attrs"]["doc"] == text
+    assert context["error"]["traceback"].startswith("Traceback")
+
+
+def test_variable_previews_stop_at_the_budget():
+    config = {"CONTEXT_MAX_BYTES": 32 * 1024}
+    context = _capture(config, [1], "{")
+    notes = context["capture_limits"]["truncated"]
+    assert any(note.startswith("globals:") for note in notes)
+    assert len(json.dumps(context, default=str)) <= 32 * 1024
+    assert len(context["variables"]["globals"]) < len(MANY_GLOBALS)
+
+
+def test_capture_releases_the_failing_frame():
+    def failing():
+        payload = Payload()
+        refs.append(weakref.ref(payload))
+        raise ValueError("broken")
+
+    refs = []
+    gc.disable()
+    try:
+        try:
+            failing()
+        except ValueError as error:
+            capture_context(failing, (), None, {"CONTEXT_MAX_BYTES": MAX_BYTES}, error)
+        # No reference cycle keeps the frame, so refcounting alone frees it.
+        assert refs[0]() is None
+    finally:
+        gc.enable()
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("abc", "abc"),
+        ("x" * 30, "x" * 10 + "... <20 more chars>"),
+        (list(range(5)), "[0, 1, 2, 3, 4]"),
+    ],
+)
+def test_bounded_str(value, expected):
+    assert bounded_str(value, 10 if len(str(value)) > 20 else 100) == expected
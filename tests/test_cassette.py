@@ -0,0 +1,98 @@
+import gzip
+import json
+
+import pytest
+
+from healing_agent import ai_broker, cassette, metrics
+from healing_agent.bench import run_bench
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    for name in ("HEALING_AGENT_CASSETTE_MODE", "HEALING_AGENT_CASSETTE", "HEALING_AGENT_CASSETTE_MATCH"):
+        monkeypatch.delenv(name, raising=False)
+    cassette.reset()
+    metrics.get_registry().reset()
+    yield
+    cassette.reset()
+    metrics.get_registry().reset()
+
+
+def _config(mode, path, **extra):
+    return {
+        "AI_PROVIDER": "ollama",
+        "OLLAMA": {"host": "http://127.0.0.1:9", "model": "m"},
+        "CASSETTE_MODE": mode,
+        "CASSETTE_PATH": str(path),
+        **extra,
+    }
+
+
+def _live(answers, calls):
+    def call_provider(provider, prompt, config, system_prompt):
+        calls.append(prompt)
+        metrics.record_tokens(10, 2)
+        return answers[len(calls) - 1]
+    return call_provider
+
+
+def test_record_then_replay_exact(tmp_path, monkeypatch):
+    path = tmp_path / "cassette.jsonl.gz"
+    calls = []
+    monkeypatch.setattr(ai_broker, "_call_provider", _live(["first", "second"], calls))
+    recorder = metrics.start_heal("f", {"METRICS_SINKS": ["memory"]})
+    try:
+        assert ai_broker.get_ai_response("fix f", _config("record", path)) == "first"
+        assert ai_broker.get_ai_response("fix f", _config("record", path)) == "second"
+    finally:
+        recorder.finish("healed")
+    with gzip.open(path, "rt", encoding="utf-8") as recorded:
+        entries = [json.loads(line) for line in recorded]
+    assert [entry["usage"] for entry in entries] == [[10, 2], [10, 2]]
+    assert {entry["role"] for entry in entries} == {"code_fixer"}
+
+    cassette.reset()
+    metrics.get_registry().reset()
+    monkeypatch.setattr(ai_broker, "_call_provider", _live([], calls))
+    replay = _config("replay", path)
+    recorder = metrics.start_heal("f", {"METRICS_SINKS": ["memory"]})
+    try:
+        answers = [ai_broker.get_ai_response("fix f", replay) for _ in range(3)]
+    finally:
+        recorder.finish("healed")
+    assert answers == ["first", "second", "second"]
+    assert len(calls) == 2  # nothing reached the provider on replay
+    assert metrics.get_registry().snapshot()["counters"]["prompt_tokens"] == 30
+
+    with pytest.raises(cassette.CassetteMiss):
+        ai_broker.get_ai_response("fix g", replay)
+    with pytest.raises(cassette.CassetteMiss):
+        ai_broker.get_ai_response("fix f", replay, system_role="analyzer")
+
+
+def test_sequence_match_ignores_prompt(tmp_path, monkeypatch):
+    path = tmp_path / "cassette.jsonl"
+    monkeypatch.setattr(ai_broker, "_call_provider", _live(["a", "b"], []))
+    ai_broker.get_ai_response("prompt one", _config("record", path))
+    ai_broker.get_ai_response("prompt two", _config("record", path))
+
+    cassette.reset()
+    monkeypatch.setenv("HEALING_AGENT_CASSETTE_MODE", "replay")
+    monkeypatch.setenv("HEALING_AGENT_CASSETTE_MATCH", "sequence")
+    config = _config("off", path)
+    assert ai_broker.get_ai_response("changed prompt", config) == "a"
+    assert ai_broker.get_ai_response("another prompt", config) == "b"
+    with pytest.raises(cassette.CassetteMiss):
+        ai_broker.get_ai_response("one too many", config)
+
+
+def test_bench_replays_recording_offline(tmp_path):
+    path = tmp_path / "bench.jsonl.gz"
+    options = dict(iterations=1, scenarios=["zero_division", "average_wrong_fix"], trace_memory=False)
+
+    recorded = run_bench(cassette=str(path), cassette_mode="record", **options)
+    replayed = run_bench(cassette=str(path), cassette_mode="replay", **options)
+
+    assert recorded["provider_requests"]
+    assert replayed["provider_requests"] == {}
+    assert replayed["scenarios"] == recorded["scenarios"]
@@ -0,0 +1,127 @@
+import importlib
+
+import pytest
+
+from healing_agent.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    DeterministicSampler,
+    StormGuard,
+)
+
+
+healing_module = importlib.import_module("healing_agent.healing_agent")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_threshold_and_probes_after_cooldown():
+    clock = FakeClock()
+    breaker = CircuitBreaker(clock)
+
+    assert [breaker.allow("k", 3, 60, 300) for _ in range(4)] == [True, True, True, False]
+    assert breaker.state("k") == OPEN
+    assert breaker.is_open("k")
+
+    clock.now += 301
+    assert not breaker.is_open("k")
+    assert breaker.allow("k", 3, 60, 300) is True
+    assert breaker.state("k") == HALF_OPEN
+    assert breaker.allow("k", 3, 60, 300) is False  # one probe at a time
+
+    breaker.record_result("k", healed=False, cooldown=300)
+    assert breaker.state("k") == OPEN
+
+    clock.now += 301
+    assert breaker.allow("k", 3, 60, 300) is True
+    breaker.record_result("k", healed=True, cooldown=300)
+    assert breaker.state("k") == CLOSED
+
+
+def test_failures_outside_the_window_do_not_open_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(clock)
+
+    for _ in range(10):
+        assert breaker.allow("k", 2, 60, 300)
+        clock.now += 31
+
+
+def test_sampled_out_probe_reopens_the_breaker():
+    clock = FakeClock()
+    guard = StormGuard(clock)
+    config = {
+        "CIRCUIT_BREAKER_THRESHOLD": 1,
+        "CIRCUIT_BREAKER_WINDOW": 60,
+        "CIRCUIT_BREAKER_COOLDOWN": 300,
+        "OBSERVATION_SAMPLE_RATE": 0.5,
+    }
+
+    assert guard.admit("k", config) is True  # sample count 1: admitted
+    assert guard.admit("k", config) is False  # second failure opens the breaker
+    assert guard.breaker.state("k") == OPEN
+
+    clock.now += 301
+    assert guard.admit("k", config) is False  # probe lands on sample count 2
+    assert guard.breaker.state("k") == OPEN
+    assert guard.is_open("k")
+
+    clock.now += 301
+    assert not guard.is_open("k")
+    assert guard.admit("k", config) is True  # sample count 3: the probe runs
+    assert guard.breaker.state("k") == HALF_OPEN
+    guard.record_result("k", True, config)
+    assert guard.breaker.state("k") == CLOSED
+
+
+def test_sampler_admits_first_then_every_nth():
+    sampler = DeterministicSampler()
+
+    admitted = [n for n in range(1, 31) if sampler.sample("k", 0.1)]
+
+    assert admitted == [1, 11, 21]
+    assert sampler.sample("other", 0.0) is False
+    assert sampler.sample("other", 1.0) is True
+
+
+def test_open_circuit_reraises_without_loading_config(monkeypatch):
+    monkeypatch.setattr(healing_module, "_storm_guard", healing_module.StormGuard())
+    loads = []
+    config = {
+        "MAX_ATTEMPTS": 3,
+        "DEBUG": False,
+        "AUTO_FIX": False,
+        "SAVE_EXCEPTIONS": False,
+        "CIRCUIT_BREAKER_THRESHOLD": 2,
+    }
+
+    def load_config():
+        loads.append(1)
+        return dict(config), None
+
+    monkeypatch.setattr(healing_module, "load_config", load_config)
+    heals = []
+    monkeypatch.setattr(
+        healing_module,
+        "_attempt_healing",
+        lambda *_args: heals.append(1) or (False, None),
+    )
+
+    @healing_module.healing_agent
+    def broken():
+        raise ConnectionError("dependency down")
+
+    for _ in range(6):
+        with pytest.raises(ConnectionError):
+            broken()
+
+    assert len(heals) == 2
+    assert len(loads) == 3  # the third failure opened the circuit
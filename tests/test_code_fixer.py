@@ -1,5 +1,9 @@
 import importlib
 
+import pytest
+
+from healing_agent.code_replacer import apply_line_edits
+
 
 ai_code_fixer = importlib.import_module("healing_agent.ai_code_fixer")
 
@@ -52,3 +56,85 @@ def test_invalid_generated_code_is_rejected(monkeypatch):
     )
 
     assert ai_code_fixer.fix(_context(), {}) is None
+
+
+def _long_context():
+    context = _context()
+    context["function_info"]["source_lines"] = {
+        10: "def divide_numbers(a, b):",
+        11: "    result = a / b",
+        12: "    return result",
+    }
+    return context
+
+
+def test_edit_mode_applies_line_edits_to_captured_source(monkeypatch):
+    prompts = []
+
+    def respond(prompt, *_args, **_kwargs):
+        prompts.append(prompt)
+        return (
+            "<<<<<<< LINES 11-11\n"
+            "    if b == 0:\n"
+            "        return None\n"
+            "    result = a / b\n"
+            ">>>>>>>\n"
+        )
+
+    monkeypatch.setattr(ai_code_fixer, "get_ai_response", respond)
+
+    fixed = ai_code_fixer.fix(_long_context(), {"FIX_FORMAT": "edits"})
+
+    assert "    11| " in prompts[0]
+    assert fixed == (
+        "@healing_agent\n"
+        "def divide_numbers(a, b):\n"
+        "    if b == 0:\n"
+        "        return None\n"
+        "    result = a / b\n"
+        "    return result"
+    )
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_insertion_and_replacement_at_the_same_line(reverse):
+    edits = [(11, 10, ["    b = b or 1"]), (11, 11, ["    y = a + 1"])]
+    if reverse:
+        edits.reverse()
+
+    edited = apply_line_edits(_long_context()["function_info"]["source_lines"], edits)
+
+    assert edited == (
+        "def divide_numbers(a, b):\n"
+        "    b = b or 1\n"
+        "    y = a + 1\n"
+        "    return result\n"
+    )
+
+
+def test_auto_mode_keeps_whole_function_prompt_for_short_functions(monkeypatch):
+    prompts = []
+
+    def respond(prompt, *_args, **_kwargs):
+        prompts.append(prompt)
+        return "def divide_numbers(a, b):\n    return a / b if b else None"
+
+    monkeypatch.setattr(ai_code_fixer, "get_ai_response", respond)
+
+    ai_code_fixer.fix(_long_context(), {"FIX_FORMAT": "auto", "EDIT_MIN_LINES": 300})
+
+    assert "<<<<<<< LINES" not in prompts[0]
+
+
+def test_unusable_edits_fall_back_to_whole_function(monkeypatch):
+    responses = iter([
+        "<<<<<<< LINES 40-41\n    pass\n>>>>>>>\n",
+        "def divide_numbers(a, b):\n    return a / b if b else None",
+    ])
+    monkeypatch.setattr(
+        ai_code_fixer, "get_ai_response", lambda *_args, **_kwargs: next(responses)
+    )
+
+    fixed = ai_code_fixer.fix(_long_context(), {"FIX_FORMAT": "edits"})
+
+    assert fixed.endswith("return a / b if b else None")
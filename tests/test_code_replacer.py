@@ -0,0 +1,88 @@
+import os
+import stat
+import threading
+
+from healing_agent.code_replacer import RepairBatch, function_replacer, write_source
+
+SOURCE = (
+    "def first(value):\n"
+    "    return value / 0\n\n"
+    "def second(value):\n"
+    "    return value - None\n"
+)
+
+
+def _context(source_path, name):
+    return {"error": {"file": str(source_path)}, "function_info": {"name": name}}
+
+
+def test_write_source_keeps_mode_and_skips_unchanged_content(tmp_path):
+    source_path = tmp_path / "service.py"
+    source_path.write_text("x = 1\n", encoding="utf-8")
+    os.chmod(source_path, 0o640)
+    os.utime(source_path, (1_000_000, 1_000_000))
+
+    assert write_source(str(source_path), "x = 1\n") is False
+    assert source_path.stat().st_mtime == 1_000_000
+
+    assert write_source(str(source_path), "x = 2\n") is True
+    assert source_path.read_text(encoding="utf-8") == "x = 2\n"
+    assert stat.S_IMODE(source_path.stat().st_mode) == 0o640
+    assert [path.name for path in tmp_path.iterdir()] == ["service.py"]
+
+
+def test_concurrent_replacements_in_one_file_are_not_lost(tmp_path):
+    source_path = tmp_path / "service.py"
+    source_path.write_text(SOURCE, encoding="utf-8")
+    fixes = {
+        "first": "def first(value):\n    return value * 2\n",
+        "second": "def second(value):\n    return value - 1\n",
+    }
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda name=name: results.append(
+                function_replacer(_context(source_path, name), fixes[name])
+            )
+        )
+        for name in fixes
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    updated = source_path.read_text(encoding="utf-8")
+    assert results == [True, True]
+    assert "return value * 2" in updated and "return value - 1" in updated
+
+
+def test_reapplying_the_same_fix_does_not_rewrite_the_file(tmp_path):
+    source_path = tmp_path / "service.py"
+    source_path.write_text(SOURCE, encoding="utf-8")
+    fix = "def first(value):\n    return value * 2\n"
+
+    assert function_replacer(_context(source_path, "first"), fix)
+    inode = source_path.stat().st_ino
+    assert function_replacer(_context(source_path, "first"), fix)
+    assert source_path.stat().st_ino == inode
+
+
+def test_repair_batch_splices_every_function_in_one_write(tmp_path, monkeypatch):
+    source_path = tmp_path / "service.py"
+    source_path.write_text(SOURCE, encoding="utf-8")
+    writes = []
+    monkeypatch.setattr(
+        "healing_agent.code_replacer.atomic_write_text",
+        lambda path, text, **_kwargs: writes.append(path) or source_path.write_text(text),
+    )
+
+    batch = RepairBatch(str(source_path))
+    assert batch.add("first", "def first(value):\n    return value * 2\n")
+    assert batch.add("second", "def second(value):\n    return value - 1\n")
+    assert not batch.add("second", "def renamed(value):\n    return value\n")
+    assert batch.apply()
+
+    updated = source_path.read_text(encoding="utf-8")
+    assert len(writes) == 1
+    assert "return value * 2" in updated and "return value - 1" in updated
@@ -0,0 +1,117 @@
+import json
+import multiprocessing
+
+import pytest
+
+from healing_agent.cli import main
+from healing_agent.context_bundle import (
+    MAGIC,
+    append_context,
+    iter_contexts,
+    iter_index,
+    read_context,
+)
+from healing_agent.exception_saver import save_context
+
+
+def _context(number, source_file):
+    return {
+        "heal_id": f"{number:032x}",
+        "timestamp": f"2026-01-01T00:00:{number:02d}",
+        "function_info": {"name": "load", "source_code": "def load():\n    pass\n" * 50},
+        "error": {"type": "KeyError", "file": str(source_file), "message": f"'k{number}'"},
+    }
+
+
+def test_records_round_trip_through_index_and_scan(tmp_path):
+    bundle = tmp_path / "bundle"
+    for number in range(1, 31):
+        append_context(bundle, _context(number, tmp_path / "app.py"), max_segment_bytes=1024)
+
+    assert len(list(bundle.glob("segment-*.hab"))) > 1  # rotated
+    assert [entry["heal_id"] for entry in iter_index(bundle)] == [
+        f"{number:032x}" for number in range(1, 31)
+    ]
+    assert read_context(bundle, f"{17:032x}")["error"]["message"] == "'k17'"
+    assert [context["error"]["message"] for context in iter_contexts(bundle)] == [
+        f"'k{number}'" for number in range(1, 31)
+    ]
+
+
+def test_torn_tail_is_ignored(tmp_path):
+    bundle = tmp_path / "bundle"
+    append_context(bundle, _context(1, tmp_path / "app.py"))
+    with open(bundle / "segment-000001.hab", "ab") as segment:
+        segment.write(b"\x00\x00\x10\x00\x00partial")
+
+    assert len(list(iter_contexts(bundle))) == 1
+
+
+def test_bundle_is_much_smaller_than_indented_json(tmp_path):
+    source_file = tmp_path / "app.py"
+    config = {"CONTEXT_FORMAT": "bundle"}
+    for number in range(1, 21):
+        save_context(_context(number, source_file), config)
+        save_context(_context(number, source_file))
+
+    exceptions = tmp_path / "_healing_agent_exceptions"
+    json_bytes = sum(path.stat().st_size for path in exceptions.glob("*.json"))
+    bundle_bytes = sum(path.stat().st_size for path in (exceptions / "bundle").glob("*.hab"))
+
+    assert len(list(exceptions.glob("*.json"))) == 20  # no same-second collisions
+    assert bundle_bytes * 5 < json_bytes
+
+
+def test_cli_lists_and_shows_contexts(tmp_path, capsys):
+    bundle = tmp_path / "bundle"
+    append_context(bundle, _context(5, tmp_path / "app.py"))
+
+    assert main(["contexts", str(bundle)]) == 0
+    assert f"{5:032x}" in capsys.readouterr().out
+    assert main(["contexts", str(bundle), "0000"]) == 0
+    assert json.loads(capsys.readouterr().out)["error"]["type"] == "KeyError"
+    assert main(["contexts", str(bundle), "ffff"]) == 1
+
+
+def test_empty_segment_is_initialized_by_the_first_append(tmp_path):
+    bundle = tmp_path / "bundle"
+    bundle.mkdir()
+    # Created by a writer that has not written its magic bytes yet.
+    (bundle / "segment-000001.hab").touch()
+    assert list(iter_contexts(bundle)) == []
+
+    append_context(bundle, _context(1, tmp_path / "app.py"))
+
+    data = (bundle / "segment-000001.hab").read_bytes()
+    assert data.startswith(MAGIC)
+    assert [entry["offset"] for entry in iter_index(bundle)] == [len(MAGIC)]
+    assert read_context(bundle, f"{1:032x}")["error"]["message"] == "'k1'"
+
+
+def _append_many(bundle, first, source_file):
+    for number in range(first, first + 20):
+        append_context(bundle, _context(number, source_file), max_segment_bytes=1024)
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="fork is not available"
+)
+def test_concurrent_writers_rotating_together_keep_every_record(tmp_path):
+    bundle = tmp_path / "bundle"
+    context = multiprocessing.get_context("fork")
+    writers = [
+        context.Process(target=_append_many, args=(bundle, first, tmp_path / "app.py"))
+        for first in (1, 21, 41, 61)
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join(30)
+
+    assert [writer.exitcode for writer in writers] == [0, 0, 0, 0]
+    for segment in bundle.glob("segment-*.hab"):
+        assert segment.read_bytes().startswith(MAGIC)
+    expected = {f"{number:032x}" for number in range(1, 81)}
+    assert {entry["heal_id"] for entry in iter_index(bundle)} == expected
+    assert {context["heal_id"] for context in iter_contexts(bundle)} == expected
+    assert read_context(bundle, f"{57:032x}")["error"]["message"] == "'k57'"
@@ -13,12 +13,17 @@ Each scenario:
   4. re-import the healed file and assert BOTH old and new inputs produce the
      same expected business result.
 
-Skipped automatically when no usable AI provider is configured.
+Skipped automatically when no usable AI provider is configured, unless a
+recorded cassette is replayed instead of calling the provider.
 
 Run with:  python -m pytest tests/test_data_drift.py -v
+Record:    HEALING_AGENT_CASSETTE_MODE=record HEALING_AGENT_CASSETTE_MATCH=sequence \
+           HEALING_AGENT_CASSETTE=drift.jsonl.gz python -m pytest tests/test_data_drift.py
+Replay:    same with HEALING_AGENT_CASSETTE_MODE=replay (offline, no key needed)
 """
 
 import importlib.util
+import os
 import sys
 from pathlib import Path
 
@@ -42,8 +47,19 @@ def _ai_ready() -> bool:
         return False
 
 
+def _replaying() -> bool:
+    """True when a recorded cassette will answer instead of the provider."""
+    cassette = os.environ.get("HEALING_AGENT_CASSETTE")
+    return (
+        os.environ.get("HEALING_AGENT_CASSETTE_MODE") == "replay"
+        and cassette is not None
+        and Path(cassette).expanduser().exists()
+    )
+
+
 pytestmark = pytest.mark.skipif(
-    not _ai_ready(), reason="No usable AI provider configured (live demo test)"
+    not (_ai_ready() or _replaying()),
+    reason="No usable AI provider configured and no cassette to replay (live demo test)",
 )
 
 
@@ -0,0 +1,101 @@
+import importlib
+import urllib.error
+
+import pytest
+import requests
+
+from healing_agent.error_classifier import (
+    TransientError,
+    classify_transient,
+    retry_transient,
+)
+
+healing_module = importlib.import_module("healing_agent.healing_agent")
+
+
+def _http_error(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.exceptions.HTTPError(f"{status} error", response=response)
+
+
+def test_classifies_network_and_overload_errors():
+    assert classify_transient(requests.exceptions.ReadTimeout()).reason == "timeout"
+    assert classify_transient(requests.exceptions.ConnectionError()).reason == "connection"
+    assert classify_transient(ConnectionResetError()).reason == "connection"
+    assert classify_transient(TimeoutError()).reason == "timeout"
+
+    overloaded = classify_transient(_http_error(429, {"Retry-After": "2"}))
+    assert overloaded == TransientError("http 429", 429, 2.0)
+    assert classify_transient(
+        urllib.error.HTTPError("http://x", 503, "unavailable", {}, None)
+    ).status_code == 503
+
+
+def test_code_bugs_and_permanent_failures_are_not_transient():
+    assert classify_transient(KeyError("name")) is None
+    assert classify_transient(_http_error(404)) is None
+    assert classify_transient(_http_error(500)) is None
+    assert classify_transient(requests.exceptions.SSLError()) is None
+
+
+def test_retry_backs_off_and_honors_retry_after():
+    delays = []
+    outcomes = iter([TimeoutError(), TimeoutError(), "ok"])
+
+    def call():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert retry_transient(
+        call, TransientError("timeout"), retries=5, backoff=1, backoff_max=3,
+        sleep=delays.append,
+    ) == (True, "ok")
+    assert delays == [1, 2, 3]
+
+    delays.clear()
+    recovered, error = retry_transient(
+        lambda: (_ for _ in ()).throw(ValueError("bug")),
+        TransientError("http 503", 503, 7.0),
+        sleep=delays.append,
+    )
+    assert not recovered and isinstance(error, ValueError)
+    assert delays == [7.0]  # a non-transient failure stops retrying
+
+
+def test_transient_failure_is_retried_without_calling_the_provider(monkeypatch):
+    monkeypatch.setattr(healing_module, "_storm_guard", healing_module.StormGuard())
+    monkeypatch.setattr(
+        healing_module,
+        "load_config",
+        lambda: (
+            {
+                "MAX_ATTEMPTS": 3,
+                "DEBUG": False,
+                "AUTO_FIX": True,
+                "SAVE_EXCEPTIONS": False,
+                "CLASSIFY_TRANSIENT": True,
+                "TRANSIENT_BACKOFF": 0.001,
+            },
+            None,
+        ),
+    )
+    monkeypatch.setattr(
+        healing_module,
+        "_attempt_healing",
+        lambda *_args: pytest.fail("transient errors must not reach the provider"),
+    )
+    calls = []
+
+    @healing_module.healing_agent
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise requests.exceptions.ConnectTimeout("connect timed out")
+        return "recovered"
+
+    assert flaky() == "recovered"
+    assert len(calls) == 3
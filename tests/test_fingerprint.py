@@ -0,0 +1,95 @@
+import json
+
+from healing_agent.exception_handler import capture_context
+from healing_agent.fingerprint import (
+    FingerprintIndex,
+    fingerprint_exception,
+    load_index,
+    normalize_message,
+)
+
+
+def _raise(func, *args):
+    try:
+        func(*args)
+    except Exception as error:
+        return error
+    raise AssertionError("expected a failure")
+
+
+def test_normalize_message_strips_occurrence_details():
+    assert normalize_message(
+        "row 42 in /srv/data/input-7.csv failed for 3f2a9c1e-0b4d-4c2a-9e7f-1a2b3c4d5e6f at 0x7f3a"
+    ) == "row <n> in <path> failed for <id> at <id>"
+
+
+def test_unprintable_exception_still_gets_a_fingerprint():
+    class Unprintable(Exception):
+        def __str__(self):
+            raise RuntimeError("__str__ is broken")
+
+    def fail():
+        raise Unprintable()
+
+    fingerprint = fingerprint_exception(_raise(fail), fail)
+
+    assert fingerprint.message == "<Unprintable Unprintable object>"
+
+
+def test_same_bug_with_different_values_shares_a_fingerprint():
+    def lookup(record_id):
+        return {}[f"user-{record_id}"]
+
+    first = fingerprint_exception(_raise(lookup, 1), lookup)
+    second = fingerprint_exception(_raise(lookup, 99), lookup)
+
+    assert first == second
+    assert first.type == "builtins.KeyError"
+    assert first.qualname.endswith("lookup")
+    assert first.line_offset == 1
+
+
+def test_frame_offset_survives_edits_above_the_function():
+    source = "def parse(text):\n    return int(text)\n"
+    namespaces = []
+    for padding in ("", "\n\n\n# moved down\n"):
+        namespace = {}
+        exec(compile(padding + source, "moved.py", "exec"), namespace)
+        namespaces.append(namespace["parse"])
+
+    fingerprints = [fingerprint_exception(_raise(parse, "x"), parse) for parse in namespaces]
+
+    assert fingerprints[0].id == fingerprints[1].id
+
+
+def test_index_counts_in_memory_and_merges_on_flush(tmp_path):
+    path = tmp_path / "fingerprints.json"
+    path.write_text(json.dumps({}))
+
+    def broken():
+        raise ValueError("bad value 7")
+
+    fingerprint = fingerprint_exception(_raise(broken), broken)
+    for _ in range(2):
+        index = FingerprintIndex()
+        index.record(fingerprint)
+        assert index.record(fingerprint) == 2
+        assert index.flush(path)
+        assert not index.flush(path)  # nothing new to merge
+
+    stored = load_index(path)
+    assert stored[fingerprint.id]["count"] == 4
+    assert stored[fingerprint.id]["fingerprint"]["message"] == "bad value <n>"
+
+
+def test_capture_context_includes_fingerprint():
+    def broken():
+        raise ValueError("bad value 7")
+
+    try:
+        broken()
+    except ValueError as error:
+        context = capture_context(func=broken, error=error)
+        expected = fingerprint_exception(error, broken).id
+
+    assert context["error"]["fingerprint"]["id"] == expected
@@ -1,10 +1,12 @@
 from pathlib import Path
 import importlib.util
+import json
 import subprocess
 
 from healing_agent.code_replacer import build_replacement_source
 from healing_agent.git_patch_saver import (
     GitPatchError,
+    GitRepository,
     apply_git_patch,
     save_git_patch,
     save_text_patch,
@@ -147,3 +149,63 @@ def test_new_configuration_keeps_automatic_fixing_as_default():
     assert config_template.AUTO_SYSCHANGE is False
     assert config_template.SAVE_GIT_PATCHES is False
     assert config_template.GIT_MODE == "off"
+
+
+def test_own_patches_are_generated_and_applied_without_git_processes(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    subprocess.run(["git", "init"], cwd=repo, capture_output=True, check=True)
+    script = repo / "run.sh"
+    script.write_text("echo old\n", encoding="utf-8")
+    subprocess.run(["git", "add", "run.sh"], cwd=repo, capture_output=True, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-m", "base"],
+        cwd=repo,
+        capture_output=True,
+        check=True,
+    )
+    expected_head = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=repo, capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+    calls = []
+    real_run = subprocess.run
+    monkeypatch.setattr(
+        subprocess, "run", lambda command, **kwargs: calls.append(command) or real_run(command, **kwargs)
+    )
+    GitRepository.clear_cache()
+
+    artifact = save_text_patch(script, "echo old\n", "echo new\n")
+    metadata = json.loads(artifact.metadata_path.read_text(encoding="utf-8"))
+    assert apply_git_patch(artifact.patch_path) is True
+
+    assert artifact.verified is True
+    assert metadata["git_head"] == expected_head
+    assert calls == []
+    assert GitRepository.discover(script) == GitRepository(repo.resolve())
+
+
+def test_missing_final_newline_round_trips_in_process_and_with_git(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / ".git").mkdir(parents=True)
+    script = repo / "tail.py"
+    original = "a = 1\nb = 2"
+    candidate = "a = 1\nb = 3"
+    script.write_text(original, encoding="utf-8")
+
+    artifact = save_text_patch(script, original, candidate)
+    patch = artifact.patch_path.read_text(encoding="utf-8")
+    assert "\\ No newline at end of file\n" in patch
+    check = subprocess.run(
+        ["git", "apply", "--check", str(artifact.patch_path)],
+        cwd=repo,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert check.returncode == 0, check.stderr
+
+    monkeypatch.setenv("PATH", "")  # no git binary
+    assert artifact.verified is True
+    assert apply_git_patch(artifact.patch_path) is True
+    assert script.read_text(encoding="utf-8") == candidate
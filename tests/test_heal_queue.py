@@ -0,0 +1,151 @@
+import importlib
+import os
+
+import pytest
+
+from healing_agent.heal_queue import HealQueue
+
+
+heal_queue = importlib.import_module("healing_agent.heal_queue")
+heal_worker = importlib.import_module("healing_agent.heal_worker")
+healing_module = importlib.import_module("healing_agent.healing_agent")
+
+
+def _context(source_path, message="division by zero"):
+    return {
+        "error": {"file": str(source_path), "type": "ZeroDivisionError", "message": message},
+        "function_info": {"name": "calculate"},
+    }
+
+
+def test_jobs_move_through_states_in_fifo_order(tmp_path):
+    queue = HealQueue(tmp_path / "queue")
+    first = queue.enqueue({"n": 1})
+    second = queue.enqueue({"n": 2})
+
+    assert queue.pending() == 2
+    job = queue.claim()
+    assert job.job_id == first and job.context == {"n": 1}
+    assert not list((tmp_path / "queue" / "tmp").iterdir())
+
+    done = queue.complete(job, {"status": "patched"})
+    assert done.parent.name == "done"
+
+    retried = queue.claim()
+    assert retried.job_id == second
+    queue.fail(retried, "provider down", max_attempts=2, backoff=0)
+    again = queue.claim()
+    assert again.payload["attempts"] == 1
+    assert queue.fail(again, "provider down", max_attempts=2).parent.name == "failed"
+    assert queue.claim() is None
+
+
+def test_failed_jobs_back_off_exponentially(tmp_path, monkeypatch):
+    queue = HealQueue(tmp_path / "queue")
+    queue.enqueue({"n": 1})
+    now = [1_000.0]
+    monkeypatch.setattr(heal_queue.time, "time", lambda: now[0])
+
+    queue.fail(queue.claim(), "provider down", max_attempts=5, backoff=10)
+    assert queue.claim() is None
+    now[0] += 10
+    job = queue.claim()
+    queue.fail(job, "provider down", max_attempts=5, backoff=10)
+    now[0] += 19
+    assert queue.claim() is None
+    now[0] += 1
+    assert queue.claim().payload["attempts"] == 2
+
+
+@pytest.mark.skipif(not heal_queue.HAS_CLAIM_LOCKS, reason="claims are not locked")
+def test_only_claims_without_a_live_worker_are_recovered(tmp_path):
+    queue = HealQueue(tmp_path / "queue")
+    queue.enqueue({"n": 1})
+    queue.enqueue({"n": 2})
+    running = queue.claim()
+    crashed = queue.claim()
+    for job in (running, crashed):
+        os.utime(job.path, (0, 0))  # both claimed long ago
+    crashed.release()  # what the OS does when a worker dies
+
+    assert queue.recover_stale(max_attempts=3, backoff=0) == 1
+    recovered = queue.claim()
+    assert recovered.job_id == crashed.job_id
+    assert recovered.payload["attempts"] == 1
+    assert running.path.exists()
+    running.release()
+
+
+def test_jobs_abandoned_too_often_fail(tmp_path):
+    queue = HealQueue(tmp_path / "queue")
+    queue.enqueue({"n": 1})
+    job = queue.claim()
+    job.release()
+    os.utime(job.path, (0, 0))
+
+    assert queue.recover_stale(max_attempts=1) == 1
+    assert queue.claim() is None
+    [failed] = (tmp_path / "queue" / "failed").glob("*.json")
+    assert "worker exited" in failed.read_text(encoding="utf-8")
+
+
+def test_worker_heals_duplicates_once_and_writes_patch(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / ".git").mkdir(parents=True)
+    source_path = repo / "service.py"
+    source_path.write_text(
+        "from healing_agent import healing_agent\n\n"
+        "@healing_agent\n"
+        "def calculate(value):\n"
+        "    return value / 0\n",
+        encoding="utf-8",
+    )
+    calls = []
+    monkeypatch.setattr(heal_worker, "generate_hint", lambda *_args: "avoid zero")
+
+    def fake_fix(context, _config):
+        calls.append(context["function_info"]["name"])
+        return "@healing_agent\ndef calculate(value):\n    return value * 2\n"
+
+    monkeypatch.setattr(heal_worker, "fix", fake_fix)
+    queue = HealQueue(tmp_path / "queue")
+    queue.enqueue(_context(source_path))
+    queue.enqueue(_context(source_path))
+
+    claimed = heal_worker.run_worker(queue, {}, concurrency=2, once=True)
+
+    assert claimed == 2
+    assert calls == ["calculate"]
+    done = sorted((tmp_path / "queue" / "done").glob("*.json"))
+    assert len(done) == 2
+    assert source_path.read_text(encoding="utf-8").endswith("return value / 0\n")
+    patches = list((repo / "_healing_agent_fixes").glob("*.patch"))
+    assert len(patches) == 1
+    assert "+    return value * 2" in patches[0].read_text(encoding="utf-8")
+
+
+def test_queue_mode_enqueues_and_reraises(tmp_path, monkeypatch):
+    config = {
+        "MAX_ATTEMPTS": 3,
+        "DEBUG": False,
+        "HEALING_MODE": "queue",
+        "HEAL_QUEUE_DIR": str(tmp_path / "queue"),
+    }
+    monkeypatch.setattr(healing_module, "load_config", lambda: (config, None))
+    monkeypatch.setattr(
+        healing_module,
+        "_attempt_healing",
+        lambda *_args: pytest.fail("queue mode must not heal in-process"),
+    )
+
+    @healing_module.healing_agent
+    def broken(api_key):
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError, match="bad input"):
+        broken("sk-secret")
+
+    job = HealQueue(tmp_path / "queue").claim()
+    assert job.context["error"]["type"] == "ValueError"
+    assert job.context["function_arguments"]["api_key"] == "<redacted>"
+    job.release()
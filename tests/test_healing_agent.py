@@ -1,7 +1,10 @@
 import importlib
+import threading
 
 import pytest
 
+from healing_agent import metrics
+
 
 healing_module = importlib.import_module("healing_agent.healing_agent")
 
@@ -99,3 +102,243 @@ def test_invalid_local_max_attempts_preserves_application_error(monkeypatch):
         broken()
 
     assert isinstance(caught.value.__cause__, ValueError)
+
+
+class Unprintable(Exception):
+    def __str__(self):
+        raise RuntimeError("__str__ is broken")
+
+
+def test_unprintable_exception_is_reraised_unchanged(monkeypatch):
+    original = Unprintable()
+    monkeypatch.setattr(
+        healing_module, "load_config", lambda: (_config(auto_fix=False), None)
+    )
+    monkeypatch.setattr(
+        healing_module, "_attempt_healing", lambda *_args, **_kwargs: (False, None)
+    )
+
+    @healing_module.healing_agent
+    def broken():
+        raise original
+
+    with pytest.raises(Unprintable) as caught:
+        broken()
+
+    assert caught.value is original
+
+
+def test_fingerprint_failure_preserves_application_error(monkeypatch):
+    def broken_fingerprint(*_args):
+        raise RuntimeError("fingerprint failed")
+
+    monkeypatch.setattr(healing_module, "fingerprint_exception", broken_fingerprint)
+
+    @healing_module.healing_agent
+    def broken():
+        raise KeyError("application failure")
+
+    with pytest.raises(KeyError) as caught:
+        broken()
+
+    assert isinstance(caught.value.__cause__, RuntimeError)
+
+
+def test_hotpatch_mode_repairs_without_reexecuting_module(load_module, monkeypatch):
+    config = _config()
+    config["RELOAD_MODE"] = "hotpatch"
+    monkeypatch.setattr(healing_module, "load_config", lambda: (config, None))
+    monkeypatch.setattr(healing_module, "generate_hint", lambda *_args: "divide safely")
+    monkeypatch.setattr(
+        healing_module,
+        "fix",
+        lambda *_args: (
+            "@healing_agent\n"
+            "def ratio(a, b):\n"
+            "    return a / b if b else 0\n"
+        ),
+    )
+    path, module = load_module(
+        "hotpatch_e2e_target",
+        "from healing_agent.healing_agent import healing_agent\n\n"
+        "LOADS = []\n"
+        "LOADS.append('loaded')\n\n"
+        "@healing_agent\n"
+        "def ratio(a, b):\n"
+        "    return a / b\n",
+    )
+    wrapper = module.ratio
+
+    assert wrapper(1, 0) == 0
+    assert module.ratio is wrapper
+    assert module.LOADS == ["loaded"]
+    assert "return a / b if b else 0" in path.read_text(encoding="utf-8")
+
+
+def test_background_mode_reraises_then_later_calls_use_the_fix(load_module, monkeypatch):
+    config = _config()
+    config["HEALING_MODE"] = "background"
+    release = threading.Event()
+    monkeypatch.setattr(healing_module, "load_config", lambda: (config, None))
+    monkeypatch.setattr(healing_module, "generate_hint", lambda *_args: "divide safely")
+
+    def slow_fix(*_args):
+        release.wait(5)
+        return "@healing_agent\ndef ratio(a, b):\n    return a / b if b else 0\n"
+
+    monkeypatch.setattr(healing_module, "fix", slow_fix)
+    _, module = load_module(
+        "background_e2e_target",
+        "from healing_agent.healing_agent import healing_agent\n\n"
+        "@healing_agent\n"
+        "def ratio(a, b):\n"
+        "    return a / b\n",
+    )
+
+    with pytest.raises(ZeroDivisionError):
+        module.ratio(1, 0)
+    # A second failure while the heal is pending is not queued again.
+    with pytest.raises(ZeroDivisionError):
+        module.ratio(2, 0)
+
+    release.set()
+    assert healing_module.wait_for_background_heals(timeout=5)
+    assert module.ratio(1, 0) == 0
+
+
+def test_background_failures_in_one_file_are_written_in_one_batch(load_module, monkeypatch):
+    config = _config()
+    config["HEALING_MODE"] = "background"
+    config["REPAIR_BATCH_WINDOW"] = 0.5
+    monkeypatch.setattr(healing_module, "load_config", lambda: (config, None))
+    monkeypatch.setattr(healing_module, "generate_hint", lambda *_args: "use the new key")
+    fixes = {
+        "load_user": "def load_user(row):\n    return row['user_name']\n",
+        "load_team": "def load_team(row):\n    return row['team_name']\n",
+    }
+    monkeypatch.setattr(
+        healing_module, "fix", lambda context, _config: fixes[context["function_info"]["name"]]
+    )
+    applied = []
+    original_apply = healing_module.RepairBatch.apply
+
+    def counting_apply(batch):
+        applied.append(sorted(batch.fixes))
+        return original_apply(batch)
+
+    monkeypatch.setattr(healing_module.RepairBatch, "apply", counting_apply)
+    path, module = load_module(
+        "batch_e2e_target",
+        "from healing_agent.healing_agent import healing_agent\n\n"
+        "@healing_agent\n"
+        "def load_user(row):\n"
+        "    return row['user']\n\n"
+        "@healing_agent\n"
+        "def load_team(row):\n"
+        "    return row['team']\n",
+    )
+    row = {"user_name": "ada", "team_name": "core"}
+
+    with pytest.raises(KeyError):
+        module.load_user(row)
+    with pytest.raises(KeyError):
+        module.load_team(row)
+
+    assert healing_module.wait_for_background_heals(timeout=5)
+    assert applied == [["load_team", "load_user"]]
+    assert (module.load_user(row), module.load_team(row)) == ("ada", "core")
+    assert "row['team_name']" in path.read_text(encoding="utf-8")
+
+
+def test_background_fix_that_cannot_be_hot_patched_is_not_healed(load_module, monkeypatch):
+    config = _config(max_attempts=1)
+    config["HEALING_MODE"] = "background"
+    config["METRICS_SINKS"] = ["memory"]
+    monkeypatch.setattr(healing_module, "load_config", lambda: (config, None))
+    monkeypatch.setattr(healing_module, "generate_hint", lambda *_args: "divide safely")
+    monkeypatch.setattr(
+        healing_module,
+        "fix",
+        lambda *_args: "def share(a, b):\n    return a / b if b else 0\n",
+    )
+
+    def refuse(_funcs):
+        raise RuntimeError("closure layout changed")
+
+    monkeypatch.setattr(healing_module, "hot_patch_many", refuse)
+    metrics.get_registry().reset()
+    path, module = load_module(
+        "background_unpatched_target",
+        "from healing_agent.healing_agent import healing_agent\n\n"
+        "@healing_agent\n"
+        "def share(a, b):\n"
+        "    return a / b\n",
+    )
+
+    with pytest.raises(ZeroDivisionError):
+        module.share(1, 0)
+    assert healing_module.wait_for_background_heals(timeout=5)
+
+    assert "a / b if b else 0" in path.read_text(encoding="utf-8")
+    with pytest.raises(ZeroDivisionError):
+        module.share(1, 0)  # written, but not live
+    key = healing_module._repair_key(module.share)
+    assert not healing_module._background_healer.accepts(key, config["MAX_ATTEMPTS"])
+    assert metrics.get_registry().snapshot()["heals"] == {"unhealed": 1}
+    metrics.get_registry().reset()
+
+
+def test_installed_fix_that_still_fails_is_bounded_by_max_attempts(load_module, monkeypatch):
+    config = _config(max_attempts=2)
+    config["HEALING_MODE"] = "background"
+    monkeypatch.setattr(healing_module, "load_config", lambda: (config, None))
+    monkeypatch.setattr(healing_module, "generate_hint", lambda *_args: "try again")
+    proposals = []
+
+    def still_broken_fix(*_args):
+        proposals.append(1)
+        return f"def parse(text):\n    raise ValueError('still broken {len(proposals)}')\n"
+
+    monkeypatch.setattr(healing_module, "fix", still_broken_fix)
+    _, module = load_module(
+        "background_still_broken_target",
+        "from healing_agent.healing_agent import healing_agent\n\n"
+        "@healing_agent\n"
+        "def parse(text):\n"
+        "    return int(text)\n",
+    )
+
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            module.parse("x")
+        assert healing_module.wait_for_background_heals(timeout=5)
+
+    assert len(proposals) == 2
+
+
+def test_successful_call_after_an_installed_fix_resets_the_attempts(load_module, monkeypatch):
+    config = _config(max_attempts=1)
+    config["HEALING_MODE"] = "background"
+    monkeypatch.setattr(healing_module, "load_config", lambda: (config, None))
+    monkeypatch.setattr(healing_module, "generate_hint", lambda *_args: "guard zero")
+    monkeypatch.setattr(
+        healing_module,
+        "fix",
+        lambda *_args: "def scale(a, b):\n    return a / b if b else 0\n",
+    )
+    _, module = load_module(
+        "background_confirmed_target",
+        "from healing_agent.healing_agent import healing_agent\n\n"
+        "@healing_agent\n"
+        "def scale(a, b):\n"
+        "    return a / b\n",
+    )
+    key = healing_module._repair_key(module.scale)
+
+    with pytest.raises(ZeroDivisionError):
+        module.scale(1, 0)
+    assert healing_module.wait_for_background_heals(timeout=5)
+    assert not healing_module._background_healer.accepts(key, 1)  # installed, unconfirmed
+
+    assert module.scale(1, 0) == 0
+    assert healing_module._background_healer.accepts(key, 1)
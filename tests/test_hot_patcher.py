@@ -0,0 +1,49 @@
+import pytest
+
+from healing_agent.hot_patcher import HotPatchError, hot_patch
+
+
+def test_hot_patch_swaps_code_without_reexecuting_module(load_module):
+    path, module = load_module(
+        "hot_patch_target",
+        "LOADS = []\n"
+        "LOADS.append('loaded')\n\n"
+        "def scale(value, factor=1):\n"
+        "    return value / 0\n",
+    )
+    original = module.scale
+    alias = module.scale
+    path.write_text(
+        "LOADS = []\n"
+        "LOADS.append('loaded')\n\n"
+        "def scale(value, factor=2):\n"
+        "    return value * factor\n",
+        encoding="utf-8",
+    )
+
+    restore = hot_patch(original)
+
+    assert module.scale is original
+    assert alias(3) == 6
+    assert module.LOADS == ["loaded"]
+
+    restore()
+    with pytest.raises(ZeroDivisionError):
+        alias(3)
+
+
+def test_hot_patch_rejects_decorators_below_healing_agent(load_module):
+    source = (
+        "import functools\n\n"
+        "def healing_agent(func):\n"
+        "    return func\n\n"
+        "@healing_agent\n"
+        "@functools.lru_cache\n"
+        "def cached(value):\n"
+        "    return value\n"
+    )
+    _, module = load_module(
+        "hot_patch_cached", source)
+
+    with pytest.raises(HotPatchError):
+        hot_patch(module.cached.__wrapped__)
@@ -0,0 +1,59 @@
+"""Import-time regression check: decorating must not load heal machinery."""
+
+import os
+import subprocess
+import sys
+
+# Loaded on the first failure, never by ``import healing_agent``.
+LAZY_MODULES = {
+    "openai",
+    "anthropic",
+    "litellm",
+    "httpx",
+    "requests",
+    "multiprocessing",
+    "subprocess",
+    "zipfile",
+    "healing_agent.git_patch_saver",
+    "healing_agent.local_fixers",
+    "healing_agent.verification_sandbox",
+    "healing_agent.heal_queue",
+}
+# Generous: the package alone takes a few tens of milliseconds; eagerly
+# importing the provider SDKs cost close to a second.
+IMPORT_BUDGET_US = 400_000
+
+
+def _importtime(code, home):
+    # An isolated HOME has no config, so nothing is pre-warmed either.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, HOME=str(home)),
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total)
+    return cumulative
+
+
+def test_import_and_decoration_load_only_the_wrapper(tmp_path):
+    interpreter = set(_importtime("pass", tmp_path))  # site hooks may import some anyway
+    imported = _importtime(
+        "import healing_agent\n"
+        "@healing_agent\n"
+        "def ok():\n"
+        "    return 1\n"
+        "ok()\n",
+        tmp_path,
+    )
+
+    assert "healing_agent" in imported
+    assert not LAZY_MODULES & (set(imported) - interpreter)
+    assert imported["healing_agent"] < IMPORT_BUDGET_US
@@ -0,0 +1,143 @@
+import importlib
+import json
+
+import pytest
+
+from healing_agent.local_fixers import closest_name, iter_local_fixes, normalize_json_text
+
+healing_module = importlib.import_module("healing_agent.healing_agent")
+
+
+def _candidates(func, *args):
+    try:
+        func(*args)
+    except Exception as error:
+        return list(iter_local_fixes(func, error))
+    raise AssertionError("expected a failure")
+
+
+def test_closest_name_prefers_same_spelling_and_rejects_ambiguity():
+    assert closest_name("userName", ["user_name", "email"]) == "user_name"
+    assert closest_name("adress", ["address", "name"]) == "address"
+    assert closest_name("id", ["ID", "Id"]) is None
+    assert closest_name("amount", ["order_no", "date"]) is None
+
+
+def test_renamed_key_keeps_old_and_new_inputs_working(load_module):
+    _, module = load_module(
+        "local_fix_key_target",
+        "def total(row):\n"
+        "    # amounts are in cents\n"
+        "    return row['amount_cents'] / 100\n",
+    )
+
+    [(name, candidate)] = _candidates(module.total, {"amountCents": 250})
+
+    assert name == "renamed_key"
+    assert candidate == (
+        "def total(row):\n"
+        "    # amounts are in cents\n"
+        "    return row['amount_cents' if 'amount_cents' in row else 'amountCents'] / 100\n"
+    )
+
+
+def test_misspelled_attribute_is_renamed(load_module):
+    _, module = load_module(
+        "local_fix_attr_target",
+        "def upper(text):\n"
+        "    return text.uper()\n",
+    )
+
+    [(name, candidate)] = _candidates(module.upper, "abc")
+
+    assert name == "misspelled_attribute"
+    assert candidate == "def upper(text):\n    return text.upper()\n"
+
+
+@pytest.mark.parametrize(
+    "body, fixed",
+    [
+        ("    import jsn\n", "    import json as jsn\n"),
+        (
+            "    from colections import OrderedDict as jsn\n",
+            "    from collections import OrderedDict as jsn\n",
+        ),
+        ("    import xml.etree.ElementTre as jsn\n", "    import xml.etree.ElementTree as jsn\n"),
+    ],
+)
+def test_misspelled_module_keeps_the_bound_name(load_module, body, fixed):
+    _, module = load_module(
+        "local_fix_module_target",
+        "def load(text):\n" + body + "    return jsn\n",
+    )
+
+    [(name, candidate)] = _candidates(module.load, "{}")
+
+    assert name == "misspelled_module"
+    assert candidate == "def load(text):\n" + fixed + "    return jsn\n"
+
+
+def test_unknown_module_is_left_to_the_provider(load_module):
+    _, module = load_module(
+        "local_fix_unknown_module_target",
+        "def load():\n    import qzxv_not_a_module\n",
+    )
+
+    assert _candidates(module.load) == []
+
+
+def test_lenient_json_adds_a_normalizer(load_module):
+    _, module = load_module(
+        "local_fix_json_target",
+        "import json\n\n"
+        "def parse(payload):\n"
+        '    """Parse a payload."""\n'
+        "    return json.loads(payload)\n",
+    )
+    payload = '﻿{"items": [1, 2,], "note": "a,}"}'
+
+    [(name, candidate)] = _candidates(module.parse, payload)
+    namespace = {"json": json}
+    exec(candidate, namespace)
+
+    assert name == "lenient_json"
+    assert namespace["parse"](payload) == {"items": [1, 2], "note": "a,}"}
+    assert json.loads(normalize_json_text(payload.encode("utf-8"))) == {
+        "items": [1, 2],
+        "note": "a,}",
+    }
+
+
+def test_local_fix_heals_without_calling_the_provider(load_module, monkeypatch):
+    config = {
+        "MAX_ATTEMPTS": 3,
+        "AUTO_FIX": True,
+        "AUTO_SYSCHANGE": False,
+        "BACKUP_ENABLED": False,
+        "SAVE_EXCEPTIONS": False,
+        "SAVE_AI_FIXES": False,
+        "DEBUG": False,
+        "LOCAL_FIXERS": True,
+    }
+    monkeypatch.setattr(healing_module, "_storm_guard", healing_module.StormGuard())
+    monkeypatch.setattr(healing_module, "load_config", lambda: (dict(config), None))
+    monkeypatch.setattr(
+        healing_module, "generate_hint", lambda *_args: pytest.fail("provider called")
+    )
+    monkeypatch.setattr(healing_module, "fix", lambda *_args: pytest.fail("provider called"))
+    calls = []
+    path, module = load_module(
+        "local_fix_e2e_target",
+        "from healing_agent.healing_agent import healing_agent\n\n"
+        "CALLS = []\n\n"
+        "@healing_agent\n"
+        "def name_of(user):\n"
+        "    CALLS.append(1)\n"
+        "    return user['fullName']\n",
+    )
+
+    assert module.name_of({"full_name": "Ada"}) == "Ada"
+    assert module.name_of({"fullName": "Grace"}) == "Grace"
+    # Failing call, verified candidate, second call: the fix is not re-run.
+    assert len(module.CALLS) == 3
+    assert "'fullName' if 'fullName' in user else 'full_name'" in path.read_text()
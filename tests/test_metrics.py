@@ -0,0 +1,145 @@
+import importlib
+import importlib.util
+import json
+import sys
+
+import pytest
+
+from healing_agent import metrics
+from healing_agent.ai_broker import _record_usage
+
+
+healing_module = importlib.import_module("healing_agent.healing_agent")
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    metrics.get_registry().reset()
+    yield
+    metrics.get_registry().reset()
+
+
+def _heal_config(sinks, metrics_dir):
+    return {
+        "MAX_ATTEMPTS": 1,
+        "AUTO_FIX": True,
+        "AUTO_SYSCHANGE": False,
+        "BACKUP_ENABLED": False,
+        "SAVE_EXCEPTIONS": False,
+        "SAVE_AI_FIXES": False,
+        "DEBUG": False,
+        "RELOAD_MODE": "hotpatch",
+        "METRICS_SINKS": sinks,
+        "METRICS_DIR": str(metrics_dir),
+    }
+
+
+def _broken_module(tmp_path, name):
+    path = tmp_path / f"{name}.py"
+    path.write_text(
+        "from healing_agent.healing_agent import healing_agent\n\n"
+        "@healing_agent\n"
+        "def ratio(a, b):\n"
+        "    return a / b\n",
+        encoding="utf-8",
+    )
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_disabled_metrics_use_the_null_recorder():
+    recorder = metrics.start_heal("f", {"METRICS_SINKS": []})
+
+    assert recorder is metrics.NULL_RECORDER
+    with recorder.stage("capture"):
+        metrics.record_tokens(10, 5)
+    recorder.finish("healed")
+    assert metrics.current() is metrics.NULL_RECORDER
+    assert metrics.get_registry().snapshot()["heals"] == {}
+
+
+def test_recorder_times_stages_and_counts_tokens(tmp_path):
+    config = {"METRICS_SINKS": ["memory"], "METRICS_DIR": str(tmp_path)}
+    recorder = metrics.start_heal("f", config)
+    assert metrics.current() is recorder
+
+    with recorder.stage("fix"):
+        _record_usage(type("Usage", (), {"input_tokens": 12, "output_tokens": 7})(),
+                      "input_tokens", "output_tokens")
+    with recorder.stage("fix"):
+        pass
+    recorder.finish("healed")
+    recorder.finish("error")  # finishing twice is a no-op
+
+    assert metrics.current() is metrics.NULL_RECORDER
+    snapshot = metrics.get_registry().snapshot()
+    assert snapshot["heals"] == {"healed": 1}
+    assert snapshot["stage_count"] == {"fix": 2}
+    assert snapshot["counters"]["prompt_tokens"] == 12
+    assert snapshot["counters"]["completion_tokens"] == 7
+    assert snapshot["recent"][0]["stages"]["fix"] >= 0
+
+
+def test_heal_is_recorded_by_every_file_sink(tmp_path, monkeypatch):
+    metrics_dir = tmp_path / "metrics"
+    config = _heal_config(["prometheus", "jsonl", "otlp"], metrics_dir)
+    monkeypatch.setattr(healing_module, "load_config", lambda: (config, None))
+
+    def fake_hint(*_args):
+        metrics.record_tokens(100, 20)
+        return "divide safely"
+
+    monkeypatch.setattr(healing_module, "generate_hint", fake_hint)
+    monkeypatch.setattr(
+        healing_module,
+        "fix",
+        lambda *_args: (
+            "@healing_agent\n"
+            "def ratio(a, b):\n"
+            "    return a / b if b else 0\n"
+        ),
+    )
+    module = _broken_module(tmp_path, "metrics_e2e_target")
+
+    assert module.ratio(1, 0) == 0
+
+    record = json.loads((metrics_dir / "heals.jsonl").read_text(encoding="utf-8"))
+    assert record["outcome"] == "healed"
+    assert record["function"] == "ratio"
+    assert record["heal_id"]
+    assert {"capture", "redact", "hint", "fix", "save", "replace", "reload"} <= set(
+        record["stages"]
+    )
+    assert record["counters"]["captured_bytes"] > 0
+    assert record["counters"]["prompt_tokens"] == 100
+
+    exposition = (metrics_dir / "healing_agent.prom").read_text(encoding="utf-8")
+    assert 'healing_agent_heals_total{outcome="healed"} 1' in exposition
+    assert 'healing_agent_stage_seconds_count{stage="fix"} 1' in exposition
+    assert "healing_agent_prompt_tokens_total 100" in exposition
+
+    export = json.loads((metrics_dir / "spans.jsonl").read_text(encoding="utf-8"))
+    spans = export["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root = spans[0]
+    assert root["name"] == "heal"
+    assert all(span["parentSpanId"] == root["spanId"] for span in spans[1:])
+    assert all(span["traceId"] == root["traceId"] for span in spans)
+    assert {span["name"] for span in spans[1:]} == set(record["stages"])
+
+
+def test_failed_heal_is_recorded_with_its_outcome(tmp_path, monkeypatch):
+    config = _heal_config(["memory"], tmp_path)
+    config["AUTO_FIX"] = False
+    monkeypatch.setattr(healing_module, "load_config", lambda: (config, None))
+    monkeypatch.setattr(healing_module, "generate_hint", lambda *_args: "hint")
+    monkeypatch.setattr(healing_module, "fix", lambda *_args: None)
+    module = _broken_module(tmp_path, "metrics_failed_target")
+
+    with pytest.raises(ZeroDivisionError):
+        module.ratio(1, 0)
+
+    assert metrics.get_registry().snapshot()["heals"] == {"unhealed": 1}
+    assert metrics.current() is metrics.NULL_RECORDER
@@ -0,0 +1,61 @@
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / "benchmarks"
+
+
+def _load(name):
+    spec = importlib.util.spec_from_file_location(name, BENCHMARKS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def bench_modules():
+    cases, run = _load("cases"), _load("run")
+    yield cases, run
+    sys.modules.pop("cases", None)
+    sys.modules.pop("run", None)
+
+
+def test_every_case_builds_and_runs(bench_modules, tmp_path):
+    cases, _ = bench_modules
+    built = cases.build_cases(tmp_path)
+    assert sorted(built) == sorted(cases.case_names())
+    for name, (func, _meta) in built.items():
+        func()
+    context = built["capture/module_100_lines"][0]()
+    assert context["error"]["type"] == "ZeroDivisionError"
+    original, replaced = built["replace/100"][0]()
+    assert "return x\n" in replaced and "return x / 0" in original
+
+
+def test_compare_flags_regressions_beyond_threshold_and_noise(bench_modules):
+    _, run = bench_modules
+    baseline = {"slow": {"seconds": 1e-3}, "tiny": {"seconds": 100e-9}, "ok": {"seconds": 1e-3}}
+    results = {
+        "slow": {"seconds": 2e-3},
+        "tiny": {"seconds": 400e-9},  # 4x slower but below the noise floor
+        "ok": {"seconds": 1.2e-3},
+        "new": {"seconds": 1.0},
+    }
+    assert run.compare(results, baseline) == ["slow"]
+    assert run.compare(results, baseline, threshold=0.1) == ["ok", "slow"]
+
+
+def test_load_results_reads_pytest_benchmark_json(bench_modules, tmp_path):
+    _, run = bench_modules
+    path = tmp_path / "bench.json"
+    path.write_text(json.dumps({"benchmarks": [
+        {"params": {"name": "redact/100"}, "stats": {"min": 0.001, "mean": 0.002}},
+    ]}))
+    assert run.load_results(path) == {"redact/100": {"seconds": 0.001, "mean": 0.002}}
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": {"redact/100": {"seconds": 0.0001}}}))
+    assert run.main(["--results", str(path), "--compare", str(baseline)]) == 1
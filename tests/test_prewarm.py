@@ -0,0 +1,118 @@
+import importlib
+import sys
+import threading
+
+from healing_agent import ai_broker, ast_cache, config_loader
+
+prewarm_module = importlib.import_module("healing_agent.prewarm")
+
+
+CONFIG_SOURCE = """
+AI_PROVIDER = "ollama"
+OLLAMA = {"host": "http://localhost:11434", "model": "m"}
+MAX_ATTEMPTS = 3
+DEBUG = False
+AUTO_FIX = True
+BACKUP_ENABLED = False
+SAVE_EXCEPTIONS = False
+SYSTEM_PROMPTS = {"code_fixer": "fix", "analyzer": "analyze", "report": "report"}
+LOADS.append(1)
+"""
+
+
+def test_load_config_executes_the_file_once_until_it_changes(tmp_path, monkeypatch):
+    import builtins
+
+    loads = []
+    monkeypatch.setattr(builtins, "LOADS", loads, raising=False)
+    path = tmp_path / "healing_agent_config.py"
+    path.write_text(CONFIG_SOURCE, encoding="utf-8")
+
+    first, _ = config_loader.load_config(path)
+    first["OLLAMA"]["model"] = "changed by caller"
+    second, _ = config_loader.load_config(path)
+    assert loads == [1]
+    assert second["OLLAMA"]["model"] == "m"
+
+    path.write_text(CONFIG_SOURCE.replace("MAX_ATTEMPTS = 3", "MAX_ATTEMPTS = 4"), encoding="utf-8")
+    assert config_loader.load_config(path)[0]["MAX_ATTEMPTS"] == 4
+    assert loads == [1, 1]
+
+
+def test_load_config_follows_environment_changes(tmp_path, monkeypatch):
+    path = tmp_path / "healing_agent_config.py"
+    path.write_text(
+        "import os\n"
+        + CONFIG_SOURCE.replace("LOADS.append(1)", "")
+        + 'OPENAI = {"api_key": os.getenv("OPENAI_API_KEY", "unset")}\n'
+        + 'ANTHROPIC = {"model": "m"}\n',
+        encoding="utf-8",
+    )
+    monkeypatch.setenv("OPENAI_API_KEY", "first-key")
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    config, _ = config_loader.load_config(path)
+    assert config["OPENAI"]["api_key"] == "first-key"
+    assert config["ANTHROPIC"]["api_key"] is None
+
+    monkeypatch.setenv("OPENAI_API_KEY", "rotated-key")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "fallback-key")
+    config, _ = config_loader.load_config(path)
+    assert config["OPENAI"]["api_key"] == "rotated-key"
+    assert config["ANTHROPIC"]["api_key"] == "fallback-key"
+
+
+def test_decorating_does_not_start_prewarm_unless_opted_in(monkeypatch):
+    started = []
+    monkeypatch.setattr(prewarm_module, "_auto_started", False)
+    monkeypatch.setattr(prewarm_module, "_decorated_files", set())
+    monkeypatch.setattr(prewarm_module, "_auto_prewarm", lambda: started.append(1))
+    monkeypatch.delenv("HEALING_AGENT_PREWARM", raising=False)
+
+    prewarm_module.register_source("service.py")
+    assert started == [] and not prewarm_module._auto_started
+    assert prewarm_module._decorated_files == {"service.py"}
+
+    monkeypatch.setenv("HEALING_AGENT_PREWARM", "1")
+    prewarm_module.register_source("worker.py")
+    prewarm_module.register_source("other.py")
+    for thread in threading.enumerate():
+        if thread.name == "healing-agent-prewarm":
+            thread.join(timeout=5)
+    assert started == [1]
+
+
+def test_prewarm_builds_clients_connects_and_parses_decorated_sources(tmp_path, monkeypatch):
+    requests_made = []
+
+    class FakeSession:
+        def get(self, url, timeout):
+            requests_made.append(url)
+
+    monkeypatch.setitem(ai_broker._CLIENT_FACTORIES, "ollama", lambda _config: FakeSession())
+    monkeypatch.setattr(ai_broker, "_clients", {})
+    source = tmp_path / "service.py"
+    source.write_text("def loader():\n    return 1\n", encoding="utf-8")
+    monkeypatch.setattr(prewarm_module, "_decorated_files", {str(source)})
+    sys.modules.pop("healing_agent.local_fixers", None)
+    config = {
+        "AI_PROVIDER": "ollama",
+        "OLLAMA": {"host": "http://ollama:11434", "model": "m"},
+        "LOCAL_FIXERS": True,
+    }
+
+    thread = prewarm_module.prewarm(config)
+    thread.join(timeout=10)
+
+    assert requests_made == ["http://ollama:11434/api/tags"]
+    assert ai_broker.get_client("ollama", config["OLLAMA"]) is ai_broker.get_client(
+        "ollama", dict(config["OLLAMA"])
+    )
+    assert "healing_agent.local_fixers" in sys.modules
+    hits = ast_cache.parse_source.cache_info().hits
+    ast_cache.parse_file(source)
+    assert ast_cache.parse_source.cache_info().hits == hits + 1
+
+
+def test_prewarm_is_exported_from_the_package():
+    package = importlib.import_module("healing_agent")
+    assert package.prewarm is prewarm_module.prewarm
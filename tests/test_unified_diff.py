@@ -0,0 +1,39 @@
+import difflib
+
+import pytest
+
+from healing_agent.unified_diff import PatchApplyError, apply_unified_diff
+
+
+def _diff(original, candidate, context=3):
+    return "".join(
+        difflib.unified_diff(
+            original.splitlines(keepends=True),
+            candidate.splitlines(keepends=True),
+            "a/f",
+            "b/f",
+            n=context,
+        )
+    )
+
+
+def test_applies_multiple_hunks_insertions_and_deletions():
+    original = "".join(f"line {number}\n" for number in range(1, 30))
+    candidate = original.replace("line 2\n", "").replace("line 20\n", "line 20\nnew\n")
+    candidate = "first\n" + candidate
+
+    assert apply_unified_diff(original, _diff(original, candidate)) == candidate
+    assert apply_unified_diff(original, _diff(original, candidate, context=0)) == candidate
+    assert apply_unified_diff("", _diff("", "only\n")) == "only\n"
+
+
+def test_rejects_patches_whose_context_does_not_match():
+    original = "a\nb\nc\n"
+    patch = _diff(original, "a\nB\nc\n")
+
+    with pytest.raises(PatchApplyError, match="does not match"):
+        apply_unified_diff("a\nx\nc\n", patch)
+    with pytest.raises(PatchApplyError, match="no hunks"):
+        apply_unified_diff(original, "--- a/f\n+++ b/f\n")
+    with pytest.raises(PatchApplyError, match="single-file"):
+        apply_unified_diff(original, patch + patch)
@@ -0,0 +1,101 @@
+import importlib.util
+import multiprocessing
+import sys
+import threading
+
+import pytest
+
+from healing_agent.verification_sandbox import SandboxLimits, VerificationPool
+
+
+pytestmark = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="fork is not available",
+)
+
+LIMITS = SandboxLimits(cpu_seconds=5, wall_seconds=2.0, memory_mb=64)
+
+
+@pytest.fixture()
+def target(tmp_path):
+    path = tmp_path / "sandbox_target.py"
+    path.write_text("OFFSET = 1\n\ndef compute(value):\n    return value / 0\n", encoding="utf-8")
+    spec = importlib.util.spec_from_file_location("sandbox_target", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["sandbox_target"] = module
+    spec.loader.exec_module(module)
+    yield module.compute
+    sys.modules.pop("sandbox_target", None)
+
+
+@pytest.fixture()
+def pool():
+    pool = VerificationPool(size=1)
+    yield pool
+    pool.close()
+
+
+def test_passing_candidate_uses_module_globals(pool, target):
+    fixed = "@healing_agent\ndef compute(value):\n    return value + OFFSET\n"
+
+    assert pool.verify(target, fixed, (1,), {}, LIMITS).passed
+
+
+def test_raising_candidate_is_reported_as_failed(pool, target):
+    fixed = "def compute(value):\n    raise KeyError('amount')\n"
+
+    result = pool.verify(target, fixed, (1,), {}, LIMITS)
+
+    assert result.status == "failed"
+    assert result.error_type == "KeyError"
+
+
+def test_endless_candidate_is_killed_at_wall_clock_limit(pool, target):
+    fixed = "def compute(value):\n    while True:\n        pass\n"
+    limits = SandboxLimits(cpu_seconds=30, wall_seconds=0.5, memory_mb=64)
+
+    result = pool.verify(target, fixed, (1,), {}, limits)
+
+    assert result.status == "timeout"
+    # The pool recovers with a fresh worker.
+    assert pool.verify(target, "def compute(value):\n    return value\n", (1,), {}, LIMITS).passed
+
+
+def test_memory_hungry_candidate_hits_the_ceiling(pool, target):
+    fixed = "def compute(value):\n    return bytearray(1024 * 1024 * 1024)\n"
+
+    result = pool.verify(target, fixed, (1,), {}, LIMITS)
+
+    assert result.status in {"failed", "crashed"}
+    if result.status == "failed":
+        assert result.error_type == "MemoryError"
+
+
+def test_unpicklable_arguments_are_unsupported(pool, target):
+    fixed = "def compute(value):\n    return value\n"
+
+    result = pool.verify(target, fixed, (threading.Lock(),), {}, LIMITS)
+
+    assert result.status == "unsupported"
+
+
+def test_lost_workers_release_their_pipes(pool, target):
+    acquired = []
+    original_acquire = pool._acquire
+
+    def recording_acquire():
+        worker = original_acquire()
+        acquired.append(worker[1])
+        return worker
+
+    pool._acquire = recording_acquire
+    endless = "def compute(value):\n    while True:\n        pass\n"
+    limits = SandboxLimits(cpu_seconds=30, wall_seconds=0.5, memory_mb=64)
+    crashing = "def compute(value):\n    import os\n    os._exit(3)\n"
+
+    assert pool.verify(target, endless, (1,), {}, limits).status == "timeout"
+    result = pool.verify(target, crashing, (1,), {}, LIMITS)
+
+    assert result.status == "crashed"
+    assert result.message == "worker exited with code 3"
+    assert [connection.closed for connection in acquired] == [True, True]